@@ -0,0 +1,326 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from plotlySurvey import electrode_coordinates, geometric_factor, median_depth, midpoint, apparent_resistivity, pseudosection, reciprocal_error, TimeLapse
+from plotlyScatter import PlotlyScatterChart
+from plotlyContour import PlotlyContourChart
+from plotlyMesh import PlotlyMeshChart
+from plotlyReader import read_model_dat, read_instrument
+from plotlySketch import sketch_values, robust_range
+from plotlyColorMap import ColorMap
+
+
+def timeit(label, func, *args, **kwargs):
+    """执行函数并打印耗时"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"  {label}: {time.perf_counter() - start:.3f} s")
+    return result
+
+
+def make_survey(count, electrodes=10000, seed=0):
+    """生成随机的偶极-偶极测量数据
+
+    Args:
+        count: 测量点（四极）数量
+        electrodes: 电极数量
+        seed: 随机种子
+
+    Returns:
+        dict: 列式数据 {a, b, m, n, vp, i}
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, electrodes - 8, count)
+    spacing = rng.integers(1, 3, count)
+    level = rng.integers(1, 6, count)
+    b = a + spacing
+    m = b + level * spacing
+    n = m + spacing
+    return {
+        "a": a,
+        "b": b,
+        "m": m,
+        "n": n,
+        "vp": rng.uniform(0.01, 1.0, count),
+        "i": rng.uniform(0.1, 2.0, count)
+    }
+
+
+def bench_pseudosection(count):
+    """装置系数、视电阻率、中值深度和中点的计算耗时"""
+    print(f"\n拟断面计算，{count} 个四极:")
+    data = timeit("生成数据", make_survey, count)
+    x, y = timeit("电极坐标", electrode_coordinates, data, spacing=2.0)
+    k = timeit("装置系数", geometric_factor, x)
+    timeit("视电阻率", apparent_resistivity, data["vp"], data["i"], k)
+    timeit("中值深度", median_depth, x)
+    timeit("中点", midpoint, x)
+    timeit("拟断面（按相对偏移分组）", pseudosection, data, spacing=2.0, voltage_key="vp", current_key="i")
+
+
+def bench_reciprocal(count):
+    """互易误差哈希连接的耗时，一半测量点为另一半的互易测量"""
+    print(f"\n互易误差，{count} 个四极:")
+    data = make_survey(count // 2)
+    data = {
+        "a": np.concatenate([data["a"], data["m"]]),
+        "b": np.concatenate([data["b"], data["n"]]),
+        "m": np.concatenate([data["m"], data["a"]]),
+        "n": np.concatenate([data["n"], data["b"]]),
+        "v": np.random.default_rng(1).uniform(10, 100, count // 2 * 2)
+    }
+    timeit("互易配对和误差", reciprocal_error, data)
+
+
+def bench_timelapse(count, epochs=3):
+    """时移分析的耗时，基准期索引只建立一次"""
+    print(f"\n时移变化，{count} 个四极，{epochs} 期:")
+    data = make_survey(count)
+    baseline = dict(data, v=data["vp"])
+    timelapse = timeit("建立基准期索引", TimeLapse, baseline)
+    rng = np.random.default_rng(2)
+    for epoch in range(epochs):
+        current = dict(data, v=data["vp"] * rng.uniform(0.9, 1.1, count))
+        timeit(f"第{epoch + 1}期百分比变化", timelapse.change, current)
+
+
+def measure(label, func, *args, **kwargs):
+    """执行函数并打印耗时和内存峰值"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label}: {elapsed:.3f} s, 内存峰值 {peak / 2 ** 20:.0f} MB")
+    return result
+
+
+def make_mesh(cells, ratio=20, seed=0):
+    """生成渐变加密的三角网格：地表和测线中部单元最小，向外按几何级数增大到ratio倍"""
+    rng = np.random.default_rng(seed)
+    ny = max(int(np.sqrt(cells / 4)), 2)
+    nx = 2 * ny
+    growth_x = ratio ** (1 / (nx // 2))
+    steps_x = growth_x ** np.abs(np.arange(nx - 1) - (nx - 1) / 2)
+    x_axis = np.concatenate([[0.0], np.cumsum(steps_x)])
+    y_axis = -np.concatenate([[0.0], np.cumsum(ratio ** (np.arange(ny - 1) / (ny - 1)))])
+
+    gx, gy = np.meshgrid(x_axis, y_axis)
+    # 内部节点随机扰动，使网格不再是结构网格
+    jitter = 0.2 * np.minimum(np.gradient(gx, axis=1), -np.gradient(gy, axis=0))
+    gx[1:-1, 1:-1] += (jitter * rng.uniform(-1, 1, gx.shape))[1:-1, 1:-1]
+    gy[1:-1, 1:-1] += (jitter * rng.uniform(-1, 1, gy.shape))[1:-1, 1:-1]
+
+    node = np.arange(nx * ny).reshape(ny, nx)
+    a, b = node[:-1, :-1].ravel(), node[:-1, 1:].ravel()
+    c, d = node[1:, 1:].ravel(), node[1:, :-1].ravel()
+    triangles = np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+    x, y = gx.ravel(), gy.ravel()
+    cx, cy = x[triangles].mean(axis=1), y[triangles].mean(axis=1)
+    values = 100 * np.exp(np.sin(cx / x_axis[-1] * 6) + np.cos(cy / y_axis[-1] * 4))
+    return {"x": x, "y": y, "cells": triangles, "v": values}
+
+
+def regrid_cells(mesh, spacing):
+    """重采样为规则网格：每个网格节点取所在三角形的值，按外包框大小分批向量化计算"""
+    x, y, cells, values = mesh["x"], mesh["y"], mesh["cells"], mesh["v"]
+    x_axis = np.arange(x.min(), x.max() + spacing, spacing)
+    y_axis = np.arange(y.min(), y.max() + spacing, spacing)
+    z = np.full((len(y_axis), len(x_axis)), np.nan)
+
+    tx, ty = x[cells], y[cells]
+    i0 = np.ceil((tx.min(axis=1) - x_axis[0]) / spacing).astype(np.int64)
+    i1 = np.floor((tx.max(axis=1) - x_axis[0]) / spacing).astype(np.int64)
+    j0 = np.ceil((ty.min(axis=1) - y_axis[0]) / spacing).astype(np.int64)
+    j1 = np.floor((ty.max(axis=1) - y_axis[0]) / spacing).astype(np.int64)
+    width = np.maximum(i1 - i0 + 1, 0)
+    height = np.maximum(j1 - j0 + 1, 0)
+    # 宽、高分别按2的幂分桶，同一桶内补齐到相同大小
+    bucket = np.ceil(np.log2(np.maximum(width, 1))).astype(np.int64) * 64 + np.ceil(np.log2(np.maximum(height, 1))).astype(np.int64)
+
+    for size in np.unique(bucket):
+        selected = np.flatnonzero(bucket == size)
+        w, h = width[selected].max(), height[selected].max()
+        for chunk in np.array_split(selected, max(len(selected) * w * h // 2_000_000, 1)):
+            di, dj = np.meshgrid(np.arange(w), np.arange(h))
+            gi = i0[chunk, None] + di.ravel()
+            gj = j0[chunk, None] + dj.ravel()
+            px = x_axis[0] + gi * spacing
+            py = y_axis[0] + gj * spacing
+            (ax, bx, cx), (ay, by, cy) = tx[chunk].T[:, :, None], ty[chunk].T[:, :, None]
+            d1 = (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+            d2 = (cx - bx) * (py - by) - (cy - by) * (px - bx)
+            d3 = (ax - cx) * (py - cy) - (ay - cy) * (px - cx)
+            inside = ((d1 >= 0) & (d2 >= 0) & (d3 >= 0)) | ((d1 <= 0) & (d2 <= 0) & (d3 <= 0))
+            inside &= (gi <= i1[chunk, None]) & (gj <= j1[chunk, None])
+            owner = np.broadcast_to(chunk[:, None], inside.shape)
+            z[gj[inside], gi[inside]] = values[owner[inside]]
+    return x_axis, y_axis, z
+
+
+def bench_mesh(cells):
+    """非结构网格直接绘制与重采样为规则网格后绘制的对比
+
+    重采样网格间距取最小单元尺寸，否则加密区域的细节会丢失
+    """
+    print(f"\n非结构网格，{cells} 个三角形单元:")
+    mesh = make_mesh(cells)
+    edges = np.hypot(np.diff(mesh["x"][mesh["cells"][:, :2]], axis=1), np.diff(mesh["y"][mesh["cells"][:, :2]], axis=1))
+    spacing = float(edges.min())
+
+    # 预先加载plotly的轨迹类型，首次导入的耗时不计入对比
+    go.Figure([go.Scatter(), go.Contour()])
+
+    chart = PlotlyMeshChart()
+    measure("按颜色分箱直接绘制", chart.init, {"data": mesh, "style": {"showscale": True, "hover": False}})
+    payload = measure("直接绘制序列化", pio.to_json, chart.fig)
+    print(f"  直接绘制数据量: {len(payload) / 2 ** 20:.0f} MB")
+    del payload, chart
+
+    x_axis, y_axis, z = measure("重采样为规则网格", regrid_cells, mesh, spacing)
+    print(f"  规则网格: {len(y_axis)} x {len(x_axis)}")
+    contour = PlotlyContourChart()
+    measure("规则网格绘制", contour.init, {"data": {"x": x_axis, "y": y_axis, "z": z}})
+    payload = measure("规则网格序列化", pio.to_json, contour.fig)
+    print(f"  规则网格数据量: {len(payload) / 2 ** 20:.0f} MB")
+
+
+def bench_reader(rows, columns=1000):
+    """流式读取模型文件的吞吐量"""
+    print(f"\n模型文件读取，{rows} 行:")
+    rng = np.random.default_rng(3)
+    x = np.tile(np.arange(columns) * 1.5, rows // columns)
+    y = np.repeat(-np.arange(rows // columns) * 0.5, columns)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "model.dat")
+        np.savetxt(filename, np.column_stack([x, y, rng.uniform(1, 1000, len(x))]),
+                   fmt="%.3f %.3f %.4f", header="X Z Resistivity")
+        size = os.path.getsize(filename) / 2 ** 20
+        start = time.perf_counter()
+        data = read_model_dat(filename)
+        elapsed = time.perf_counter() - start
+        print(f"  {size:.0f} MB, {elapsed:.3f} s, {size / elapsed:.0f} MB/s, 网格 {data['z'].shape}")
+
+
+def bench_instrument(rows, processes=None):
+    """分块导入仪器测量文件的耗时"""
+    print(f"\n仪器数据导入，{rows} 行:")
+    data = make_survey(rows)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "survey.csv")
+        table = np.column_stack([data["a"], data["b"], data["m"], data["n"], data["i"], data["vp"]])
+        np.savetxt(filename, table, fmt="%d,%d,%d,%d,%.6f,%.6f", header="C1,C2,P1,P2,I(mA),V(mV)", comments="")
+        size = os.path.getsize(filename) / 2 ** 20
+        start = time.perf_counter()
+        result = read_instrument(filename, processes=processes)
+        elapsed = time.perf_counter() - start
+        print(f"  {size:.0f} MB, {elapsed:.3f} s, {size / elapsed:.0f} MB/s, {len(result['v'])} 个测量点")
+
+
+def bench_color_range(count):
+    """内存映射数组上的一次遍历分位数草图，以及由草图生成的均衡颜色映射"""
+    print(f"\n自动颜色范围，{count} 个值:")
+    rng = np.random.default_rng(4)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "values.npy")
+        values = np.lib.format.open_memmap(filename, "w+", np.float64, (count,))
+        for start in range(0, count, 10_000_000):
+            values[start:start + 10_000_000] = rng.lognormal(3, 1.5, len(values[start:start + 10_000_000]))
+        values.flush()
+        del values
+        values = np.load(filename, mmap_mode="r")
+        sketch = timeit("分位数草图", sketch_values, values)
+        print(f"  p2-p98: {robust_range(sketch)}")
+        colormap = timeit("均衡颜色停止点", ColorMap.equalized, sketch, "Viridis", 32)
+        timeit("映射为RGBA", colormap.map, values[:10_000_000])
+        del values
+
+
+def baseline_scatter_figure(data):
+    """按修改前的PlotlyScatterChart.init构建散点图，作为构建耗时的对比基线
+
+    与基线代码相同：输入为JSON读入的列表，不透明度、线颜色、线宽逐点生成列表，customdata由逐点的字典生成
+    """
+    n = len(data["x"])
+    extended = [{"a": data["a"][i], "b": data["b"][i]} for i in range(n)]
+    opacities = [0 if v == 1 else 1 for v in data["visible"]]
+    trace = go.Scatter(
+        x=data["x"],
+        y=data["y"],
+        mode="markers",
+        marker=dict(
+            size=7,
+            color=data["v"],
+            symbol="square",
+            opacity=opacities,
+            line=dict(color=["white"] * n, width=[1] * n),
+            showscale=False
+        ),
+        customdata=[[p.get("a"), p.get("b")] for p in extended]
+    )
+    return go.Figure(data=[trace])
+
+
+def baseline_contour_figure(grid):
+    """按修改前的PlotlyContourChart.init构建等值线图，输入为JSON读入的嵌套列表"""
+    return go.Figure(data=[go.Contour(x=grid["x"], y=grid["y"], z=grid["z"], hoverongaps=False)])
+
+
+def bench_build(counts=(10_000, 1_000_000, 10_000_000), baseline_limit=1_000_000):
+    """图表构建耗时，对比三种路径：
+
+    - 基线：修改前的init代码路径（列表输入，逐点的样式列表）
+    - 当前 go.Figure：当前init的默认路径（NumPy输入，标量样式，仍由plotly逐元素校验）
+    - 当前 快速模式：当前init的fast路径（字典描述，只校验结构）
+
+    基线路径为每个点生成Python对象，超过baseline_limit个点时内存不足，跳过
+    """
+    go.Figure([go.Scatter(), go.Contour()])
+    for count in counts:
+        print(f"\n图表构建，{count} 个点:")
+        survey = make_survey(count)
+        rng = np.random.default_rng(5)
+        data = {
+            "x": midpoint(np.stack([survey[key] for key in ("a", "b", "m", "n")])),
+            "y": rng.uniform(0, 50, count),
+            "v": rng.lognormal(3, 1, count),
+            "visible": (rng.random(count) < 0.01).astype(int),
+            "a": survey["a"],
+            "b": survey["b"]
+        }
+        side = int(np.sqrt(count))
+        grid = {"x": np.arange(side) * 1.0, "y": np.arange(side) * 0.5, "z": rng.lognormal(3, 1, (side, side))}
+
+        if count <= baseline_limit:
+            # 基线的输入是JSON读入的列表，转换不计入耗时
+            timeit("散点图 基线", baseline_scatter_figure, {key: value.tolist() for key, value in data.items()})
+        else:
+            print("  散点图 基线: 跳过（逐点的Python对象超出内存）")
+        for label, fast in (("散点图 当前 go.Figure", False), ("散点图 当前 快速模式", True)):
+            timeit(label, PlotlyScatterChart().init, {"data": data, "fast": fast})
+
+        if count <= baseline_limit:
+            timeit("等值线图 基线", baseline_contour_figure, {key: value.tolist() for key, value in grid.items()})
+        else:
+            print("  等值线图 基线: 跳过（逐点的Python对象超出内存）")
+        for label, fast in (("等值线图 当前 go.Figure", False), ("等值线图 当前 快速模式", True)):
+            timeit(label, PlotlyContourChart().init, {"data": grid, "fast": fast})
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    bench_pseudosection(size)
+    bench_reciprocal(size)
+    bench_timelapse(size)
+    bench_mesh(1_000_000)
+    bench_reader(size)
+    bench_instrument(size)
+    bench_color_range(10 * size)
+    bench_build()
@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FrozenDict(dict):
+    """只读字典
+
+    仍是dict的子类，可以直接传给plotly；复制（copy、deepcopy、pickle）得到普通的可修改字典
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("缓存中的数据是只读的，请先复制: dict(data)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def copy(self):
+        return dict(self)
+
+
+class FrozenList(list):
+    """只读列表
+
+    仍是list的子类，isinstance(value, list) 的检查和plotly都可以直接使用；复制得到普通的可修改列表
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("缓存中的数据是只读的，请先复制: list(data)")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def copy(self):
+        return list(self)
+
+
+_SCALAR_TYPES = {int, float, bool, str, type(None)}
+
+
+def freeze(value):
+    """把加载结果转换为只读对象，返回 (只读对象, 估计的字节数)
+
+    列表转换为FrozenList，字典转换为FrozenDict，NumPy数组设为不可写，
+    返回类型与json.load的结果兼容，共享的缓存条目不会被调用方修改
+    """
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.setflags(write=False)
+        return value, value.nbytes
+    if isinstance(value, dict):
+        size = sys.getsizeof(value)
+        frozen = {}
+        for key, item in value.items():
+            frozen[key], item_size = freeze(item)
+            size += item_size + sys.getsizeof(key)
+        return FrozenDict(frozen), size
+    if isinstance(value, (list, tuple)):
+        if set(map(type, value)) <= _SCALAR_TYPES:
+            # 只含数值、字符串的列表（如大的数据列）不逐项递归，元素大小按前64个估计
+            sample = value[:64]
+            item_size = sum(map(sys.getsizeof, sample)) / len(sample) if sample else 0
+            return FrozenList(value), sys.getsizeof(value) + int(item_size * len(value))
+        items = [freeze(item) for item in value]
+        return FrozenList(item for item, _ in items), sys.getsizeof(value) + sum(size for _, size in items)
+    return value, sys.getsizeof(value)
+
+
+def _file_key(path, projection):
+    """缓存键：(绝对路径, 修改时间, 文件大小, 投影)"""
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size, projection
+
+
+class LoaderCache:
+    """
+    进程级的文件加载缓存
+    以 (绝对路径, 修改时间, 文件大小, 投影) 为键，文件被修改后自动失效；按内存预算做LRU淘汰
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, retries=2):
+        """
+        初始化缓存
+
+        参数:
+            max_bytes: 缓存条目的总字节数上限（估计值）
+            retries: 读取期间文件被修改时的重新读取次数
+        """
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # 键 -> (只读结果, 字节数)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def load(self, path, loader, projection=None):
+        """读取文件，命中缓存时直接返回共享的只读结果
+
+        Args:
+            path: 文件路径
+            loader: 加载函数，调用方式为 loader(path, projection)
+            projection: 投影参数（如只取某个键），必须可哈希，不同投影分别缓存
+
+        Returns:
+            只读的加载结果，加载函数抛出的异常原样抛出
+        """
+        path = os.path.abspath(path)
+        key = _file_key(path, projection)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # 加载在锁外进行，不阻塞其他文件的读取；读取期间文件被修改时重新读取，
+        # 否则旧内容会以新的修改时间缓存，或新内容以旧的修改时间缓存
+        for _ in range(self.retries + 1):
+            value, size = freeze(loader(path, projection))
+            loaded = _file_key(path, projection)
+            if loaded == key:
+                break
+            key = loaded
+        else:
+            return value  # 文件一直在被修改，本次结果不缓存
+
+        with self._lock:
+            # 同一文件的旧版本已经失效
+            for old in [old for old in self._entries if old[0] == path and old[1:3] != key[1:3]]:
+                self.current_bytes -= self._entries.pop(old)[1]
+                self.invalidations += 1
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def clear(self):
+        """清空缓存，统计计数保留"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+# 进程内共享的缓存实例
+loader_cache = LoaderCache()
+
+
+def _read_json(path, key=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if key is None else data.get(key, [])
+
+
+def load_json(path, key=None):
+    """通过共享缓存读取JSON文件
+
+    Args:
+        path: 文件路径
+        key: 只取顶层的某个键，为None时返回整个文件
+
+    Returns:
+        只读的JSON内容：字典为FrozenDict，列表为FrozenList
+    """
+    return loader_cache.load(path, _read_json, key)
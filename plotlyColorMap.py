@@ -0,0 +1,323 @@
+import re
+import numpy as np
+from plotly.colors import get_colorscale
+
+_RGBA_PATTERN = re.compile(r"rgba?\(([^)]*)\)")
+
+
+def parse_color(color):
+    """解析颜色为 (r, g, b, a)，r、g、b为0-255，a为0-1
+
+    支持 #rgb、#rrggbb、#rrggbbaa、rgb()、rgba() 和数值元组；
+    rgba()的透明度大于1时按0-255处理，例如 'rgba(126,84,255,255)'
+    """
+    if not isinstance(color, str):
+        values = [float(c) for c in color]
+        return tuple(values[:3]) + (values[3] if len(values) > 3 else 1.0,)
+
+    text = color.strip().lower()
+    if text.startswith("#"):
+        digits = text[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(c * 2 for c in digits)
+        if len(digits) in (6, 8):
+            channels = [int(digits[k:k + 2], 16) for k in range(0, len(digits), 2)]
+            alpha = channels[3] / 255 if len(channels) == 4 else 1.0
+            return float(channels[0]), float(channels[1]), float(channels[2]), alpha
+    match = _RGBA_PATTERN.fullmatch(text)
+    if match:
+        parts = [float(part) for part in match.group(1).split(",")]
+        if len(parts) in (3, 4):
+            alpha = parts[3] if len(parts) == 4 else 1.0
+            return parts[0], parts[1], parts[2], alpha / 255 if alpha > 1 else alpha
+    raise ValueError(f"无法解析的颜色: {color}")
+
+
+def css_color(rgba):
+    """把 (r, g, b, a) 转换为 'rgba(r,g,b,a)' 字符串，r、g、b、a均为0-255"""
+    r, g, b, a = (int(round(float(c))) for c in rgba)
+    return f"rgba({r},{g},{b},{a / 255:.3g})"
+
+
+class ColorMap:
+    """
+    编译后的颜色映射
+    颜色停止点只解析一次；同一个对象同时生成plotly的colorscale和自定义颜色条，二者的颜色和值域一致
+    """
+
+    # 定位所在区间的分桶数，值域被均匀分为这么多个桶，每个桶预先记录所在的区间
+    BUCKETS = 1 << 14
+
+    def __init__(self, stops, discrete=False):
+        """
+        初始化颜色映射
+
+        参数:
+            stops: 值空间中的颜色停止点 [[值, 颜色], ...]，颜色格式见parse_color
+            discrete: 是否为分段颜色，True时两个停止点之间使用前一个停止点的颜色，
+                与CustomColorBar的颜色段一致；False时线性插值
+        """
+        stops = sorted(stops, key=lambda stop: stop[0])
+        if len(stops) < 2:
+            raise ValueError("颜色映射至少需要两个颜色停止点")
+        self.values = np.array([float(value) for value, _ in stops])
+        rgba = np.array([parse_color(color) for _, color in stops])
+        rgba[:, 3] *= 255
+        self.rgba = rgba
+        self.discrete = discrete
+        self._compile()
+
+    @classmethod
+    def from_colorscale(cls, colorscale, vmin=0.0, vmax=1.0, discrete=False):
+        """从plotly的colorscale创建颜色映射
+
+        Args:
+            colorscale: [[位置(0-1), 颜色], ...] 或plotly内置配色名称，如 "Viridis"
+            vmin: 位置0对应的值
+            vmax: 位置1对应的值
+            discrete: 是否为分段颜色
+
+        Returns:
+            ColorMap: 颜色映射
+        """
+        if isinstance(colorscale, str):
+            colorscale = get_colorscale(colorscale)
+        return cls([[vmin + float(pos) * (vmax - vmin), color] for pos, color in colorscale], discrete)
+
+    @classmethod
+    def equalized(cls, sketch, colorscale="Viridis", count=16, low=0.0, high=100.0):
+        """直方图均衡的颜色映射：停止点取在数据的等间隔分位数上，每段颜色覆盖相同数量的数据
+
+        Args:
+            sketch: 数据的分位数草图（plotlySketch.QuantileSketch）
+            colorscale: [[位置(0-1), 颜色], ...] 或plotly内置配色名称
+            count: 颜色段数量
+            low: 第一个停止点的百分位数
+            high: 最后一个停止点的百分位数
+
+        Returns:
+            ColorMap: 颜色映射，数据不足两个不同的值时返回None
+        """
+        positions = np.linspace(0.0, 1.0, count + 1)
+        values = sketch.quantiles(low / 100 + positions * (high - low) / 100)
+        values, first = np.unique(values, return_index=True)
+        if len(values) < 2 or not np.isfinite(values).all():
+            return None
+        colors = cls.from_colorscale(colorscale).css(positions[first])
+        return cls([[value, color] for value, color in zip(values.tolist(), colors)])
+
+    def log10(self):
+        """值取log10后的颜色映射，用于对数模式的轨迹，非正值的停止点被丢弃"""
+        positive = self.values > 0
+        if np.count_nonzero(positive) < 2:
+            raise ValueError("对数颜色映射至少需要两个正值的颜色停止点")
+        rgba = self.rgba[positive].copy()
+        rgba[:, 3] /= 255
+        return ColorMap(list(zip(np.log10(self.values[positive]).tolist(), rgba.tolist())), self.discrete)
+
+    def _compile(self):
+        """预先计算分桶的区间索引和每个区间每个通道的线性系数"""
+        values = self.values
+        count = len(values)
+        self.vmin = float(values[0])
+        self.vmax = float(values[-1])
+        span = self.vmax - self.vmin
+        self._scale = self.BUCKETS / span if span > 0 else 0.0
+
+        # 每个桶左端点所在的区间；桶内包含停止点时由_locate逐步修正
+        starts = self.vmin + np.arange(self.BUCKETS) / (self._scale or 1.0)
+        self._bucket = np.clip(np.searchsorted(values, starts, side="right") - 1, 0, count - 2)
+        ends = np.clip(np.searchsorted(values, starts + 1 / (self._scale or 1.0), side="left") - 1, 0, count - 2)
+        self._corrections = int((ends - self._bucket).max())
+        self._upper = values[1:].copy()
+
+        # color = base + slope * (value - 区间起点)，base中加0.5，转换为uint8时截断即四舍五入；
+        # 相对区间起点计算，float32的精度足够，按行取四个通道比逐通道快得多
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.diff(self.rgba, axis=0) / np.diff(values)[:, None]
+        slope[~np.isfinite(slope)] = 0.0
+        self._slopes = slope.astype(np.float32)
+        self._bases = (self.rgba[:-1] + 0.5).astype(np.float32)
+        self._discrete_rgba = np.clip(np.rint(self.rgba), 0, 255).astype(np.uint8)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _locate(self, x):
+        """值所在的区间索引，x已截断到值域内"""
+        cell = ((x - self.vmin) * self._scale).astype(np.intp)
+        np.minimum(cell, self.BUCKETS - 1, out=cell)
+        index = self._bucket[cell]
+        last = len(self.values) - 2
+        for _ in range(self._corrections):
+            index += (x >= self._upper[index]) & (index < last)
+        return index
+
+    def map(self, values, discrete=None, chunk_size=1 << 15):
+        """把值批量映射为RGBA颜色
+
+        区间用分桶表定位（等价于np.searchsorted，但不需要逐个二分查找），按块计算以保持在缓存内
+
+        Args:
+            values: 任意形状的数值数组，超出值域的值取端点颜色，NaN为全透明
+            discrete: 是否为分段颜色，为None时使用创建时的设置
+            chunk_size: 每块的元素数
+
+        Returns:
+            np.ndarray: 形状为 values.shape + (4,) 的uint8数组
+        """
+        discrete = self.discrete if discrete is None else discrete
+        values = np.asarray(values, dtype=float)
+        flat = values.ravel()
+        out = np.empty((flat.size, 4), dtype=np.uint8)
+        for start in range(0, flat.size, chunk_size):
+            x = np.clip(flat[start:start + chunk_size], self.vmin, self.vmax)
+            nan = np.isnan(x)
+            has_nan = nan.any()
+            if has_nan:
+                x[nan] = self.vmin
+            index = self._locate(x)
+            block = out[start:start + chunk_size]
+            if discrete:
+                # 最后一个停止点只作为刻度，等于最大值时仍使用最后一段的颜色
+                block.view(np.uint32)[:, 0] = self._discrete_rgba.view(np.uint32)[index, 0]
+            else:
+                offset = (x - self.values[index]).astype(np.float32)
+                color = np.take(self._slopes, index, axis=0)
+                color *= offset[:, None]
+                color += np.take(self._bases, index, axis=0)
+                block[:] = color
+            if has_nan:
+                block[nan] = 0
+        return out.reshape(values.shape + (4,))
+
+    def css(self, values, discrete=None):
+        """把值映射为 'rgba(...)' 字符串列表"""
+        return [css_color(rgba) for rgba in self.map(values, discrete).reshape(-1, 4)]
+
+    def colorscale(self, discrete=None):
+        """生成plotly的colorscale，位置归一化到0-1，配合 cmin=vmin、cmax=vmax 使用
+
+        分段颜色在每个停止点处重复位置，得到阶跃的colorscale
+        """
+        discrete = self.discrete if discrete is None else discrete
+        span = (self.vmax - self.vmin) or 1.0
+        positions = ((self.values - self.vmin) / span).tolist()
+        positions[-1] = 1.0
+        colors = [css_color(rgba) for rgba in self.rgba]
+        if not discrete:
+            return [[pos, color] for pos, color in zip(positions, colors)]
+        scale = []
+        for k in range(len(positions) - 1):
+            scale.append([positions[k], colors[k]])
+            scale.append([positions[k + 1], colors[k]])
+        return scale
+
+    def color_stops(self):
+        """值空间中的颜色停止点 [[值, 'rgba(...)'], ...]"""
+        return [[float(value), css_color(rgba)] for value, rgba in zip(self.values, self.rgba)]
+
+    def segments(self, count=64, log=False):
+        """颜色条的颜色段 [(起始值, 结束值, 颜色), ...]
+
+        分段颜色每两个停止点之间一段；线性插值时把值域均匀分为count段，每段取中点的颜色。
+        log为True时在log10空间插值和分段（与对数模式下轨迹的颜色一致），起止值仍为实际值
+        """
+        if log and not self.discrete:
+            return [(10 ** start, 10 ** end, color) for start, end, color in self.log10().segments(count)]
+        if self.discrete:
+            colors = [css_color(rgba) for rgba in self.rgba]
+            return [(float(self.values[k]), float(self.values[k + 1]), colors[k]) for k in range(len(self) - 1)]
+        edges = np.linspace(self.vmin, self.vmax, count + 1)
+        colors = self.css((edges[:-1] + edges[1:]) / 2, discrete=False)
+        return [(float(edges[k]), float(edges[k + 1]), colors[k]) for k in range(count)]
+
+
+class LogScale:
+    """
+    以10为底的对数刻度，用于跨越多个数量级的数据（如电阻率）
+    变换结果按源数组缓存，同一份数据只计算一次；非正值变换为NaN
+    """
+
+    def __init__(self, levels_per_decade=3):
+        """
+        初始化对数刻度
+
+        参数:
+            levels_per_decade: 每个数量级的等值线数量
+        """
+        self.levels_per_decade = levels_per_decade
+        self._source = None
+        self._result = None
+
+    def transform(self, values):
+        """返回只读的log10(values)，values与上次是同一个数组时直接返回缓存结果"""
+        if values is not None and values is self._source:
+            return self._result
+        result = np.array(values, dtype=float)  # 唯一的一次复制，之后原地计算
+        result[~(result > 0)] = np.nan
+        np.log10(result, out=result)
+        result.setflags(write=False)
+        self._source, self._result = values, result
+        return result
+
+    def rebind(self, source, result):
+        """把缓存改为指向图表中保存的数组
+
+        plotly赋值时会复制数组，改为引用图表中的副本后，变换前后的数组各只保留一份
+        """
+        self._source, self._result = source, result
+
+    def clear(self):
+        """清空缓存"""
+        self._source = self._result = None
+
+    @staticmethod
+    def to_log(value):
+        """把实际值转换为log10值，None和非正值返回None"""
+        if value is None or not value > 0:
+            return None
+        return float(np.log10(value))
+
+    @staticmethod
+    def from_log(value):
+        """把log10值转换为实际值，None返回None"""
+        return None if value is None else float(10 ** value)
+
+    def levels(self, low, high):
+        """log10空间中等间隔的等值线，返回plotly contours的 {start, end, size}
+
+        Args:
+            low: 最小值的log10
+            high: 最大值的log10
+        """
+        size = 1.0 / self.levels_per_decade
+        start = np.ceil(low / size - 1e-9) * size
+        end = np.floor(high / size + 1e-9) * size
+        return {"start": float(start), "end": float(max(end, start)), "size": size}
+
+    @staticmethod
+    def ticks(low, high):
+        """颜色条刻度，位置为log10值，标签为实际值
+
+        跨越超过3个数量级时只取10的整数次幂，否则取1、2、5倍，不足一个数量级时取1-9倍
+
+        Args:
+            low: 最小值的log10
+            high: 最大值的log10
+
+        Returns:
+            tuple: (刻度位置列表, 刻度标签列表)
+        """
+        span = high - low
+        if span > 3:
+            mantissas = np.array([1.0])
+        elif span >= 1:
+            mantissas = np.array([1.0, 2.0, 5.0])
+        else:
+            mantissas = np.arange(1.0, 10.0)
+        decades = np.arange(np.floor(low), np.ceil(high) + 1)
+        values = (mantissas[None, :] * 10.0 ** decades[:, None]).ravel()
+        positions = np.log10(values)
+        keep = (positions >= low - 1e-9) & (positions <= high + 1e-9)
+        return positions[keep].tolist(), [f"{value:g}" for value in values[keep]]
@@ -1,9 +1,22 @@
 import json
+import numpy as np
 import plotly.graph_objects as go
 import plotly.io as pio
 import os
 from datetime import datetime
 from typing import List, Union
+from plotlyExport import build_animation, export_frames, export_tiles
+from plotlyRegion import threshold_regions, DEFAULT_REGION_STYLE, ZonalStatistics, format_statistics, \
+    convex_hull, envelope_hull, polygon_mask, polygon_vertices
+from plotlyGrid import AxisIndex, bilinear_sample, nearest_sample, densify_polylines, geometry_key, GridPyramid
+from plotlyIsoline import extract_isolines, contour_levels, save_geojson, save_dxf, isoline_path
+from plotlyReader import as_contour_data
+from plotlyFastFigure import build_figure, requires_figure
+from plotlySketch import sketch_values, robust_range
+from plotlyColorMap import ColorMap, LogScale
+
+COLORBAR_NAME = "custom_colorbar"  # 自定义颜色条图形和文本的name，用于识别和移除
+
 
 class CustomColorBar:
     """
@@ -13,7 +26,7 @@ class CustomColorBar:
     
     def __init__(
         self,
-        color_stops: List[List[Union[int, float, str]]],
+        color_stops: Union[List[List[Union[int, float, str]]], ColorMap],
         x_position: float = 1.05,
         y_position: List[float] = [0.1, 0.9],
         width: float = 0.04,
@@ -27,13 +40,15 @@ class CustomColorBar:
         title_font_size: int = 16,
         title_font_color: str = "black",
         auto_position: bool = True,  # 控制是否自动计算位置
-        use_paper_coords: bool = True  # 使用纸面坐标系统
+        use_paper_coords: bool = True,  # 使用纸面坐标系统
+        log_scale: bool = False  # 颜色在log10空间插值
     ):
         """
         初始化自定义颜色条
         
         参数:
-            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]
+            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]，
+                也可以是ColorMap，此时颜色段与使用同一ColorMap的轨迹颜色一致
             x_position: 颜色条的x位置 (相对于绘图区域，1.0是右边界)
             y_position: 颜色条的y范围 [底部, 顶部] (相对于绘图区域)
             width: 颜色条的宽度
@@ -48,8 +63,20 @@ class CustomColorBar:
             title_font_color: 标题的颜色
             auto_position: 是否自动计算颜色条位置
             use_paper_coords: 是否使用纸面坐标系统
+            log_scale: color_stops为ColorMap时，是否在log10空间插值颜色，与对数模式的轨迹一致
         """
-        self.color_stops = sorted(color_stops, key=lambda x: x[0])
+        if isinstance(color_stops, ColorMap):
+            self.colormap = color_stops
+            self.color_stops = color_stops.color_stops()
+            self.segments = color_stops.segments(log=log_scale)
+        else:
+            self.colormap = None
+            self.color_stops = sorted(color_stops, key=lambda x: x[0])
+            # 每两个停止点之间一段，使用前一个停止点的颜色
+            self.segments = [
+                (self.color_stops[i][0], self.color_stops[i + 1][0], self.color_stops[i][1])
+                for i in range(len(self.color_stops) - 1)
+            ]
         self.x_position = x_position
         self.y_position = y_position
         self.width = width
@@ -168,24 +195,34 @@ class CustomColorBar:
             self.tick_text_offset = 0.03
             self.title_offset = 0.07
         
+        # 先移除已有的自定义颜色条，重复添加或替换颜色条时不会叠加
+        self.remove_from_figure(fig)
+        shape_count, annotation_count = len(fig.layout.shapes), len(fig.layout.annotations)
+        
         # 根据坐标系统选择不同的添加方式
         if self.use_paper_coords:
             self._add_to_figure_paper_coords(fig)
         else:
             self._add_to_figure_data_coords(fig)
+        
+        # 标记颜色条的图形和文本，便于移除
+        for item in fig.layout.shapes[shape_count:] + fig.layout.annotations[annotation_count:]:
+            item.name = COLORBAR_NAME
             
         return fig
+    
+    @staticmethod
+    def remove_from_figure(fig: go.Figure) -> go.Figure:
+        """移除图表上由add_to_figure添加的颜色条图形和文本"""
+        if any(item.name == COLORBAR_NAME for item in fig.layout.shapes + fig.layout.annotations):
+            fig.layout.shapes = [s for s in fig.layout.shapes if s.name != COLORBAR_NAME]
+            fig.layout.annotations = [a for a in fig.layout.annotations if a.name != COLORBAR_NAME]
+        return fig
         
     def _add_to_figure_paper_coords(self, fig: go.Figure) -> None:
         """使用纸面坐标系统添加颜色条"""
         # 添加颜色条的矩形段
-        for i in range(len(self.color_stops) - 1):
-            current_stop = self.color_stops[i]
-            next_stop = self.color_stops[i + 1]
-            
-            current_value, current_color = current_stop
-            next_value, next_color = next_stop
-            
+        for current_value, next_value, current_color in self.segments:
             # 计算相对位置 (0-1范围)
             y0_norm = (current_value - self.min_value) / self.value_range
             y1_norm = (next_value - self.min_value) / self.value_range
@@ -270,13 +307,7 @@ class CustomColorBar:
     def _add_to_figure_data_coords(self, fig: go.Figure) -> None:
         """使用数据坐标系统添加颜色条"""
         # 添加颜色条的矩形段
-        for i in range(len(self.color_stops) - 1):
-            current_stop = self.color_stops[i]
-            next_stop = self.color_stops[i + 1]
-            
-            current_value, current_color = current_stop
-            next_value, next_color = next_stop
-            
+        for current_value, next_value, current_color in self.segments:
             # 计算当前段的y坐标范围
             y0 = self._value_to_y_position(current_value)
             y1 = self._value_to_y_position(next_value)
@@ -342,6 +373,16 @@ class CustomColorBar:
             font=dict(size=self.title_font_size, color=self.title_font_color)
         )
 
+def _same_data(current, cached):
+    """判断轨迹数据是否与缓存时相同
+    
+    数组数据按对象判断；列表数据每次访问都会返回新的元组，按内容判断
+    """
+    if current is cached:
+        return True
+    return isinstance(current, tuple) and isinstance(cached, tuple) and current == cached
+
+
 class PlotlyContourChart:
     """Python版的等值线图类，模仿plotlyContour.js的功能"""
     
@@ -361,15 +402,36 @@ class PlotlyContourChart:
             "scrollZoom": True
         }
         self.custom_colorbar = None  # 存储自定义颜色条
+        self._isoline_cache = {}  # 等值线缓存 {等值线值元组: 折线}
+        self._isoline_source = None  # 缓存对应的z数据
+        self.region_shapes = []  # 自动检测的区域多边形
+        self.region_labels = None  # 区域标记数组
+        self.shapes = {}  # 已添加的形状 {id: shapeData}
+        self._zonal = None  # 分区统计引擎，按网格几何缓存
+        self._zonal_key = None
+        self._axis_index = None  # 网格轴索引，按网格几何缓存
+        self._axis_key = None
+        self._unblanked = None  # 白化前的 (x, y, z)
+        self._pyramids = {}  # 多分辨率金字塔 {(缩减方式, 倍数): (原始z, GridPyramid)}
+        self._full_grid = None  # 显示缩减视图时保存的原始 (x, y, z)
+        self.log_scale = False  # 是否使用对数颜色刻度
+        self._log = LogScale()  # 对数变换，按网格缓存
+        self._linear_contours = None  # 切换为对数刻度前的等值线 (start, end, size)
+        self._sketch = None  # 网格值的分位数草图 (对应的z, QuantileSketch)
+        self._frames = None  # set_frames的参数 (帧, 名称, 标题, 时长)
         
     def init(self, options=None):
         """初始化等值线图
         
         Args:
             options: 配置选项
-                - data: 数据对象 {x: [], y: [], z: [[]], zmin, zmax}
-                - style: 样式配置，包含colorscale, showlines, lineColor, lineStyle, showLabels, labelColor等
+                - data: 数据对象 {x: [], y: [], z: [[]], zmin, zmax}，
+                    也可以是长格式（每行一个网格点，x、y、z列）的DataFrame或Parquet文件路径
+                - style: 样式配置，包含colorscale, showlines, lineColor, lineStyle, showLabels, labelColor等，
+                    logScale为True时使用对数颜色刻度，levelsPerDecade为每个数量级的等值线数量
                 - layout: 布局配置
+                - fast: 为True时self.fig为FigureSpec（字典描述，数组不复制、不逐元素校验），
+                    只用于显示和导出；需要修改图表时先用 self.fig = self.fig.to_figure() 转换，否则这些方法抛出TypeError
                 
         Returns:
             fig: 返回创建的plotly图表对象
@@ -377,7 +439,9 @@ class PlotlyContourChart:
         if options is None:
             options = {}
             
-        data = options.get("data", {})
+        data = as_contour_data(options.get("data", {}))
+        if data is None:
+            return None
         style = options.get("style", {})
         layout = options.get("layout", {})
         
@@ -387,7 +451,7 @@ class PlotlyContourChart:
             return None
             
         # 创建等值线图
-        contour_trace = go.Contour(
+        contour_trace = dict(
             x=data.get("x", []),
             y=data.get("y", []),
             z=data.get("z", []),
@@ -439,19 +503,36 @@ class PlotlyContourChart:
             del layout_copy["yAxisTitle"]
         self.layout.update(layout_copy)
         
-        # 创建图表
-        self.fig = go.Figure(data=[contour_trace], layout=self.layout)
+        # 创建图表，快速模式下只组装字典描述，跳过plotly对每个数组元素的校验
+        fast = options.get("fast", False)
+        if fast:
+            self.fig = build_figure([dict(contour_trace, type="contour")], self.layout)
+        else:
+            contour_trace = go.Contour(**contour_trace)
+            self.fig = go.Figure(data=[contour_trace], layout=self.layout)
         
         # 保存数据引用
         self.data = [contour_trace]
         
+        # 新数据需要重新构建金字塔
+        self._pyramids = {}
+        self._full_grid = None
+        self.log_scale = False
+        self._log.clear()
+        if style.get("logScale", False):
+            if fast:
+                print("快速模式不支持对数颜色刻度，请先用 fig.to_figure() 转换为go.Figure")
+            else:
+                self.set_log_scale(True, style.get("levelsPerDecade"))
+        
         return self.fig
     
+    @requires_figure
     def set_color_range(self, range_values):
         """设置颜色范围
         
         Args:
-            range_values: [min, max] 格式的列表
+            range_values: [min, max] 格式的列表，对数模式下也使用实际值
         """
         if not isinstance(range_values, list) or len(range_values) != 2:
             print("颜色范围格式不正确")
@@ -461,13 +542,76 @@ class PlotlyContourChart:
             print("图表未初始化")
             return
             
+        if self.log_scale:
+            self.fig.update_traces(zmin=LogScale.to_log(range_values[0]), zmax=LogScale.to_log(range_values[1]))
+            self._update_log_axes(contours=False)
+            return
         self.fig.update_traces(zmin=range_values[0], zmax=range_values[1])
     
+    @requires_figure
+    def value_sketch(self, precision=7):
+        """原始分辨率网格值的分位数草图，只遍历一次网格，按网格缓存"""
+        z = self._source_grid()[2]
+        cached = self._sketch
+        if cached is None or not _same_data(z, cached[0]) or cached[1].precision != precision:
+            self._sketch = cached = (z, sketch_values(z, precision))
+        return cached[1]
+    
+    @requires_figure
+    def auto_color_range(self, low=2.0, high=98.0):
+        """按数据的百分位数设置颜色范围，去掉两端的极值
+        
+        Args:
+            low: 下限百分位数
+            high: 上限百分位数
+            
+        Returns:
+            list: 设置的 [最小值, 最大值]，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化")
+            return None
+        
+        value_range = robust_range(self.value_sketch(), low, high)
+        if value_range is None:
+            print("没有有效数据，无法计算颜色范围")
+            return None
+        self.set_color_range(value_range)
+        return value_range
+    
+    @requires_figure
+    def equalize_colors(self, colorscale=None, count=16, low=0.0, high=100.0, colorbar=True, **kwargs):
+        """直方图均衡的颜色刻度：颜色停止点取在数据的等间隔分位数上，同时用于轨迹和自定义颜色条
+        
+        Args:
+            colorscale: 配色，为None时使用当前的colorscale
+            count: 颜色段数量
+            low: 第一个停止点的百分位数
+            high: 最后一个停止点的百分位数
+            colorbar: 是否同时添加自定义颜色条
+            **kwargs: 其他传递给CustomColorBar的参数
+            
+        Returns:
+            ColorMap: 均衡后的颜色映射，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化")
+            return None
+        
+        colorscale = colorscale or self.fig.data[0].colorscale or "Viridis"
+        colormap = ColorMap.equalized(self.value_sketch(), colorscale, count, low, high)
+        if colormap is None:
+            print("有效数据不足，无法均衡颜色")
+            return None
+        self.apply_colormap(colormap, colorbar, **kwargs)
+        return colormap
+    
+    @requires_figure
     def set_contour_interval(self, interval):
         """设置等值线间隔
         
         Args:
-            interval: 间隔值
+            interval: 间隔值，对数模式下为log10空间的间隔（数量级）
         """
         if not isinstance(interval, (int, float)):
             print("间隔值必须是数字")
@@ -479,6 +623,7 @@ class PlotlyContourChart:
             
         self.fig.update_traces(contours_size=interval)
     
+    @requires_figure
     def update_color_scale(self, color_scale, contour_config=None, label_config=None):
         """更新颜色刻度和配置
         
@@ -511,11 +656,610 @@ class PlotlyContourChart:
                 
         self.fig.update_traces(**update_dict)
     
+    @requires_figure
+    def get_isolines(self, levels=None):
+        """在Python端提取等值线，结果按z数据和等值线值缓存
+        
+        Args:
+            levels: 等值线值列表，为None时使用set_contour_interval设置的间隔
+            
+        Returns:
+            dict: {等值线值: [(xs, ys), ...]}，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("等值线图未初始化")
+            return None
+        
+        trace = self.fig.data[0]
+        source = trace.z
+        if not _same_data(source, self._isoline_source):
+            self._isoline_cache = {}
+            self._isoline_source = source
+        
+        # 对数模式下在显示的log10网格上提取，与图中的等值线一致，结果的键仍为实际值
+        requested = {}
+        if levels is not None and self.log_scale:
+            requested = {LogScale.to_log(level): float(level) for level in levels if level > 0}
+            levels = list(requested)
+        contours = trace.contours
+        levels = tuple(contour_levels(
+            source,
+            size=contours.size,
+            start=contours.start,
+            end=contours.end,
+            levels=levels
+        ).tolist())
+        if levels not in self._isoline_cache:
+            self._isoline_cache[levels] = extract_isolines(trace.x, trace.y, source, levels=levels)
+        if self.log_scale:
+            return {
+                requested.get(level) or LogScale.from_log(level): lines
+                for level, lines in self._isoline_cache[levels].items()
+            }
+        return self._isoline_cache[levels]
+    
+    @requires_figure
+    def export_isolines(self, filename, levels=None, crs=None):
+        """导出等值线为GeoJSON或DXF，根据文件扩展名选择格式
+        
+        Args:
+            filename: 保存的文件名，扩展名为.geojson/.json或.dxf
+            levels: 等值线值列表
+            crs: GeoJSON的坐标参考系名称
+            
+        Returns:
+            bool: 是否保存成功
+        """
+        isolines = self.get_isolines(levels)
+        if isolines is None:
+            return False
+        
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".dxf":
+            return save_dxf(isolines, filename)
+        if extension in (".geojson", ".json"):
+            return save_geojson(isolines, filename, crs)
+        print(f"不支持的等值线导出格式: {extension}")
+        return False
+    
+    @requires_figure
+    def add_isolines(self, levels=None, color=None, width=1, hide_native=True):
+        """添加预先提取的等值线轨迹，用于大网格的快速静态输出
+        
+        所有等值线合并为一个以None分隔的线轨迹，浏览器和Kaleido不再需要追踪等值线
+        
+        Args:
+            levels: 等值线值列表
+            color: 线颜色，默认使用等值线图的线颜色
+            width: 线宽
+            hide_native: 是否隐藏plotly自身绘制的等值线
+            
+        Returns:
+            int: 等值线轨迹的索引，失败返回None
+        """
+        isolines = self.get_isolines(levels)
+        if isolines is None:
+            return None
+        
+        xs, ys = isoline_path([line for lines in isolines.values() for line in lines])
+        isoline_trace = go.Scatter(
+            x=xs,
+            y=ys,
+            mode="lines",
+            line=dict(color=color or self.fig.data[0].line.color or "#000", width=width),
+            hoverinfo="skip",
+            showlegend=False,
+            name="isolines"
+        )
+        contours = self.fig.data[0].contours
+        pinned = None
+        if hide_native and not contours.size:
+            # 未设置间隔时plotly自动选取的填充分级与提取的等值线不一致，固定为提取的等值线值
+            shown = sorted(LogScale.to_log(level) if self.log_scale else level for level in isolines)
+            steps = np.diff(shown)
+            if len(shown) > 1 and np.allclose(steps, steps[0]):
+                pinned = dict(start=shown[0], end=shown[-1], size=float(steps[0]))
+        with self.fig.batch_update():
+            if hide_native:
+                contours.showlines = False
+            if pinned:
+                self.fig.data[0].autocontour = False
+                contours.update(pinned)
+            self.fig.add_trace(isoline_trace)
+        
+        print(f"已添加 {len(isolines)} 个等值线值的预追踪等值线")
+        return len(self.fig.data) - 1
+    
+    @requires_figure
+    def add_threshold_regions(self, threshold=None, level_range=None, below=False, min_cells=10,
+                              connectivity=4, style=None, name="区域"):
+        """检测阈值区域，生成多边形形状并作为一个图层添加到图表
+        
+        Args:
+            threshold: 阈值，默认检测不低于阈值的区域
+            level_range: [最小值, 最大值]，指定后检测位于范围内的区域
+            below: 为True时检测不高于阈值的区域
+            min_cells: 区域的最少网格数
+            connectivity: 连通方式，4或8
+            style: 多边形样式，格式同initShape的多边形样式
+            name: 区域名称前缀
+            
+        Returns:
+            list: 与initShape兼容的多边形形状列表，另含cells、area、mean、max，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法检测区域")
+            return None
+        
+        x, y, z = self._source_grid()
+        try:
+            shapes, labels = threshold_regions(
+                x, y, z,
+                threshold=threshold,
+                level_range=level_range,
+                below=below,
+                min_cells=min_cells,
+                connectivity=connectivity,
+                style=style,
+                name=name
+            )
+        except ValueError as e:
+            print(f"检测区域时出错: {e}")
+            return None
+        
+        self.region_shapes = shapes
+        self.region_labels = labels
+        if not shapes:
+            print("没有检测到符合条件的区域")
+            return shapes
+        
+        # 所有多边形合并为一个以NaN分隔的轨迹，每个多边形单独填充
+        style = style or DEFAULT_REGION_STYLE
+        line_style = style.get("lineStyle", {})
+        fill_style = style.get("fillStyle", {})
+        xs, ys, hover = [], [], []
+        for shape in shapes:
+            xs.extend([p["x"] for p in shape["points"]] + [np.nan])
+            ys.extend([p["y"] for p in shape["points"]] + [np.nan])
+            hover.extend([f"{shape['name']}<br>{shape['note']}"] * (len(shape["points"]) + 1))
+        
+        region_trace = go.Scatter(
+            x=np.array(xs),
+            y=np.array(ys),
+            mode="lines",
+            line=dict(
+                color=line_style.get("color", "#000000"),
+                width=line_style.get("width", 1),
+                dash=self._map_line_type(line_style.get("type", "solid"))
+            ),
+            fill="toself",
+            fillcolor=fill_style.get("bgcolor", "#000000"),
+            opacity=fill_style.get("opacity", 1),
+            hoverinfo="text",
+            hovertext=hover,
+            showlegend=False,
+            name=name
+        )
+        self.fig.add_trace(region_trace)
+        
+        print(f"已添加 {len(shapes)} 个区域多边形")
+        return shapes
+    
+    def _zonal_engine(self):
+        """返回原始分辨率网格几何对应的分区统计引擎，几何改变时重新创建"""
+        x, y, _ = self._source_grid()
+        key = geometry_key(x, y)
+        if key != self._zonal_key:
+            self._zonal = ZonalStatistics(x, y)
+            self._zonal_key = key
+        return self._zonal
+    
+    def _grid_index(self):
+        """返回原始分辨率网格的x、y轴索引，几何改变时重新计算"""
+        x, y, _ = self._source_grid()
+        key = geometry_key(x, y)
+        if key != self._axis_key:
+            self._axis_index = (AxisIndex(x), AxisIndex(y))
+            self._axis_key = key
+        return self._axis_index
+    
+    @requires_figure
+    def query(self, xs, ys, method="bilinear"):
+        """批量查询任意位置的z值，显示缩减视图时仍查询原始分辨率的网格
+        
+        与hoverongaps=False一致，落在空值网格上的查询返回NaN：最近节点为NaN，
+        或双线性插值的四个角点中有NaN
+        
+        Args:
+            xs: 查询点x坐标
+            ys: 查询点y坐标
+            method: "nearest" 最近节点，"bilinear" 双线性插值
+            
+        Returns:
+            dict: {z: 查询值, inside: 是否在网格范围内, valid: 是否得到有效值}，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法查询")
+            return None
+        if method not in ("nearest", "bilinear"):
+            print(f"不支持的查询方式: {method}")
+            return None
+        
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if xs.shape != ys.shape:
+            print("x和y的数量不一致")
+            return None
+        
+        x_index, y_index = self._grid_index()
+        sample = nearest_sample if method == "nearest" else bilinear_sample
+        values, inside = sample(self._source_grid()[2], x_index, y_index, xs, ys)
+        return {"z": values, "inside": inside, "valid": np.isfinite(values)}
+    
+    @requires_figure
+    def blank(self, points=None, shape_id=None, hull="convex", trim=True, margin=None):
+        """白化数据范围以外的网格：设为NaN，并裁掉整行整列为空的部分
+        始终在原始分辨率的网格上白化，显示缩减视图时改为显示白化后的原始网格
+        
+        Args:
+            points: 原始数据点，(xs, ys) 或包含x、y的列式数据（如plotlyData.json）
+            shape_id: 用作白化边界的多边形形状id，优先于points
+            hull: 由points计算边界的方式，"convex" 凸包，"concave" 按深度分带的包络
+                （适用于拟断面两侧的三角形无数据区）
+            trim: 是否裁掉整行整列为空的网格，减小序列化的z
+            margin: 边界容差，默认取网格范围的1e-9，使恰好落在边界上的网格保留
+            
+        Returns:
+            int: 白化的网格数量，失败或会白化全部网格时返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法白化")
+            return None
+        
+        if shape_id is not None:
+            shape = self.shapes.get(shape_id)
+            if shape is None or shape.get("type") != "polygon":
+                print(f"未找到多边形形状: {shape_id}")
+                return None
+            boundary = shape.get("points", [])
+        elif points is not None:
+            xs, ys = (points.get("x"), points.get("y")) if isinstance(points, dict) else points
+            if hull == "convex":
+                boundary = convex_hull(xs, ys)
+            elif hull == "concave":
+                boundary = envelope_hull(xs, ys)
+            else:
+                print(f"不支持的边界类型: {hull}")
+                return None
+        else:
+            print("必须指定points或shape_id")
+            return None
+        
+        source = self._source_grid()
+        x = np.asarray(source[0], dtype=float)
+        y = np.asarray(source[1], dtype=float)
+        z = np.array(source[2], dtype=float)
+        
+        if margin is None:
+            margin = 1e-9 * max(np.ptp(x), np.ptp(y), 1.0)
+        inside = polygon_mask(x, y, boundary, tolerance=margin)
+        if not np.any(inside & np.isfinite(z)):
+            # 通常是边界与网格的坐标不一致（如点坐标单位不同），整个网格白化后无法显示
+            print("白化边界内没有有效网格，未修改网格")
+            return None
+        if self._unblanked is None:
+            self._unblanked = source
+        blanked = int(np.count_nonzero(~inside & np.isfinite(z)))
+        z[~inside] = np.nan
+        
+        if trim:
+            finite = np.isfinite(z)
+            rows = np.flatnonzero(finite.any(axis=1))
+            columns = np.flatnonzero(finite.any(axis=0))
+            if rows.size and columns.size:
+                row_slice = slice(rows[0], rows[-1] + 1)
+                column_slice = slice(columns[0], columns[-1] + 1)
+                x, y, z = x[column_slice], y[row_slice], z[row_slice, column_slice]
+        
+        # 白化在原始分辨率的网格上进行，结果替换缩减视图（保持当前坐标轴范围）
+        self._full_grid = None
+        self._update_grid(x, y, z)
+        print(f"已白化 {blanked} 个网格，保留网格 {z.shape[0]} x {z.shape[1]}")
+        return blanked
+    
+    @requires_figure
+    def clear_blanking(self):
+        """恢复白化前的网格"""
+        if not self.fig or self._unblanked is None:
+            return
+        x, y, z = self._unblanked
+        self._full_grid = None
+        self._update_grid(x, y, z)
+        self._unblanked = None
+    
+    def _grid_values(self):
+        """当前网格的原始z值，对数模式下轨迹的z为log10值，原始值保存在customdata中"""
+        trace = self.fig.data[0]
+        return trace.customdata if self.log_scale else trace.z
+    
+    def _display_z(self, z):
+        """原始z值对应的显示值，对数模式下为log10值"""
+        return self._log.transform(z) if self.log_scale else z
+    
+    def _update_grid(self, x, y, z):
+        """替换等值线轨迹的网格，z为原始值"""
+        trace = self.fig.data[0]
+        if not self.log_scale:
+            trace.update(x=x, y=y, z=z)
+            return
+        trace.update(x=x, y=y, z=self._log.transform(z), customdata=z)
+        self._log.rebind(trace.customdata, trace.z)
+    
+    def _source_grid(self):
+        """返回原始分辨率的 (x, y, z)，显示缩减视图时从保存的原始网格中取"""
+        if self._full_grid is not None:
+            return self._full_grid
+        trace = self.fig.data[0]
+        return trace.x, trace.y, self._grid_values()
+    
+    @requires_figure
+    def build_pyramid(self, how="mean", factor=2):
+        """构建（或返回缓存的）多分辨率金字塔，每份数据只构建一次
+        
+        Args:
+            how: 块缩减方式，"mean"、"min" 或 "max"，忽略NaN
+            factor: 每层的缩减倍数
+            
+        Returns:
+            GridPyramid: 金字塔，第0层为原始网格，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法构建金字塔")
+            return None
+        
+        x, y, z = self._source_grid()
+        cached = self._pyramids.get((how, factor))
+        if cached is None or not _same_data(z, cached[0]):
+            cached = (z, GridPyramid(x, y, z, factor=factor, how=how))
+            self._pyramids[(how, factor)] = cached
+        return cached[1]
+    
+    def _set_grid(self, x, y, z):
+        """替换等值线轨迹的网格数据，首次替换时保存原始网格"""
+        if self._full_grid is None:
+            trace = self.fig.data[0]
+            self._full_grid = (trace.x, trace.y, self._grid_values())
+        self._update_grid(x, y, z)
+    
+    @requires_figure
+    def show_window(self, x_range=None, y_range=None, max_cells=250000, how="mean"):
+        """显示指定范围，在网格数不超过max_cells的前提下使用最精细的金字塔层
+        
+        Args:
+            x_range: [最小值, 最大值]，为None时为整个x范围
+            y_range: [最小值, 最大值]，为None时为整个y范围
+            max_cells: 显示的网格数上限
+            how: 块缩减方式
+            
+        Returns:
+            int: 使用的金字塔层，0为原始分辨率，失败返回None
+        """
+        pyramid = self.build_pyramid(how)
+        if pyramid is None:
+            return None
+        
+        level = pyramid.level_for_cells(max_cells, x_range, y_range)
+        with self.fig.batch_update():
+            self._set_grid(*pyramid.window(level, x_range, y_range))
+            if x_range is not None:
+                self.fig.update_layout(xaxis_range=list(x_range), xaxis_autorange=False)
+            if y_range is not None:
+                self.fig.update_layout(yaxis_range=list(y_range), yaxis_autorange=False)
+        return level
+    
+    @requires_figure
+    def reset_view(self):
+        """恢复原始分辨率的完整网格"""
+        if not self.fig or self._full_grid is None:
+            return
+        x, y, z = self._full_grid
+        self._full_grid = None
+        with self.fig.batch_update():
+            self._update_grid(x, y, z)
+            self.fig.update_layout(xaxis_range=None, xaxis_autorange=True, yaxis_range=None, yaxis_autorange=True)
+        # 轨迹赋值会复制数组，金字塔缓存改为对应恢复后的数组
+        restored = self._grid_values()
+        self._pyramids = {
+            key: (restored, pyramid) if source is z else (source, pyramid)
+            for key, (source, pyramid) in self._pyramids.items()
+        }
+    
+    @requires_figure
+    def level_for_size(self, size_budget, how="mean"):
+        """选择z数据序列化后不超过size_budget字节的最精细金字塔层
+        
+        Args:
+            size_budget: z数据序列化后的字节数上限
+            how: 块缩减方式
+            
+        Returns:
+            int: 金字塔层，失败返回None
+        """
+        pyramid = self.build_pyramid(how)
+        if pyramid is None:
+            return None
+        
+        # 用原始网格的一部分估算每个网格序列化后的字节数
+        z = pyramid.levels[0][2].ravel()
+        sample = z[::max(len(z) // 1000, 1)][:1000]
+        bytes_per_cell = len(json.dumps([None if np.isnan(v) else v for v in sample.tolist()])) / max(len(sample), 1)
+        return pyramid.level_for_cells(size_budget / bytes_per_cell)
+    
+    def _polyline_points(self, target):
+        """把形状id或顶点列表转换为 (xs, ys)"""
+        if isinstance(target, str):
+            shape = self.shapes.get(target)
+            if shape is None or shape.get("type") not in ("polyline", "polygon"):
+                print(f"未找到折线或多边形形状: {target}")
+                return None
+            points = shape.get("points", [])
+            if shape.get("type") == "polygon" and points:
+                points = list(points) + [points[0]]
+        else:
+            points = target
+        return polygon_vertices(points)
+    
+    @requires_figure
+    def sample_along(self, targets, spacing, show_profile=False):
+        """沿折线加密采样z值，得到剖面
+        
+        Args:
+            targets: 形状id、顶点列表 [{x, y}, ...]、(xs, ys)，或由它们组成的列表（一次处理多条折线）
+            spacing: 采样间距，与坐标轴单位相同
+            show_profile: 是否在图表下方添加联动的剖面子图
+            
+        Returns:
+            dict 或 list: 每条折线为 {distance, x, y, z, inside}，网格外的点z为NaN；
+                传入多条折线时返回列表，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法采样")
+            return None
+        
+        single = isinstance(targets, (str, tuple)) or (
+            isinstance(targets, list) and len(targets) > 0 and isinstance(targets[0], dict)
+        )
+        items = [targets] if single else list(targets)
+        polylines = [self._polyline_points(item) for item in items]
+        if any(line is None for line in polylines):
+            return None
+        
+        try:
+            xs, ys, distance, offsets = densify_polylines(polylines, spacing)
+        except ValueError as e:
+            print(f"采样时出错: {e}")
+            return None
+        
+        x_index, y_index = self._grid_index()
+        values, inside = bilinear_sample(self._source_grid()[2], x_index, y_index, xs, ys)
+        
+        results = []
+        for k in range(len(polylines)):
+            part = slice(offsets[k], offsets[k + 1])
+            results.append({
+                "distance": distance[part],
+                "x": xs[part],
+                "y": ys[part],
+                "z": values[part],
+                "inside": inside[part]
+            })
+        
+        if show_profile:
+            names = [item if isinstance(item, str) else f"剖面{k + 1}" for k, item in enumerate(items)]
+            self._add_profile_traces(results, names)
+        return results[0] if single else results
+    
+    def _add_profile_traces(self, results, names):
+        """在图表下方的子图中添加剖面曲线"""
+        with self.fig.batch_update():
+            if "yaxis2" not in self.fig.layout:
+                # 主图占上部，剖面子图占下部
+                self.fig.update_layout(
+                    yaxis=dict(domain=[0.35, 1]),
+                    xaxis2=dict(domain=[0, 1], anchor="y2", title="距离"),
+                    yaxis2=dict(domain=[0, 0.25], anchor="x2", title="值")
+                )
+            for result, name in zip(results, names):
+                shape = self.shapes.get(name)
+                label = shape.get("name", name) if shape else name
+                self.fig.add_trace(go.Scatter(
+                    x=result["distance"],
+                    y=result["z"],
+                    mode="lines",
+                    xaxis="x2",
+                    yaxis="y2",
+                    showlegend=False,
+                    hovertemplate="距离: %{x:.4g}<br>值: %{y:.4g}<extra></extra>",
+                    name=label
+                ))
+    
+    def _polygon_trace(self, shape_id):
+        """查找形状对应的多边形轨迹"""
+        for trace in self.fig.data:
+            if trace.customdata is not None and len(trace.customdata) == 1 and trace.customdata[0] == shape_id \
+                    and trace.fill == "toself":
+                return trace
+        return None
+    
+    @requires_figure
+    def zonal_statistics(self, shape_ids=None, threshold=None, show_hover=True):
+        """统计多边形形状内z的最小值、最大值、平均值、面积和高于阈值的体积
+        
+        Args:
+            shape_ids: 形状id列表，默认为通过initShape添加的全部多边形
+            threshold: 计算体积的阈值，为None时不计算体积
+            show_hover: 是否把统计结果写入多边形的悬停文本
+            
+        Returns:
+            dict: {形状id: {cells, min, max, mean, area, volume}}，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法统计")
+            return None
+        
+        engine = self._zonal_engine()
+        if shape_ids is None:
+            shape_ids = [i for i, shape in self.shapes.items() if shape.get("type") == "polygon"]
+        for shape_id in shape_ids:
+            shape = self.shapes.get(shape_id)
+            if shape is None or shape.get("type") != "polygon":
+                print(f"未找到多边形形状: {shape_id}")
+                continue
+            # 顶点未改变的多边形直接使用缓存的栅格
+            engine.set_shape(shape_id, shape.get("points", []))
+        
+        results = engine.compute(self._source_grid()[2], threshold=threshold, shape_ids=shape_ids)
+        if show_hover:
+            with self.fig.batch_update():
+                for shape_id, stats in results.items():
+                    trace = self._polygon_trace(shape_id)
+                    if trace is not None:
+                        trace.hovertext = f"{self.shapes[shape_id].get('name', '')}<br>{format_statistics(stats)}"
+        return results
+    
+    @requires_figure
+    def update_shape_points(self, shape_id, points, threshold=None):
+        """修改多边形的顶点，并只重新统计该多边形
+        
+        Args:
+            shape_id: 形状id
+            points: 新的顶点 [{x, y}, ...]
+            threshold: 计算体积的阈值
+            
+        Returns:
+            dict: 该多边形的统计结果，失败返回None
+        """
+        shape = self.shapes.get(shape_id)
+        if shape is None or shape.get("type") != "polygon":
+            print(f"未找到多边形形状: {shape_id}")
+            return None
+        
+        shape["points"] = points
+        trace = self._polygon_trace(shape_id)
+        if trace is not None:
+            x_coords = [p.get("x") for p in points] + [points[0].get("x")]
+            y_coords = [p.get("y") for p in points] + [points[0].get("y")]
+            trace.update(x=x_coords, y=y_coords)
+        
+        results = self.zonal_statistics([shape_id], threshold=threshold)
+        return results.get(shape_id) if results else None
+    
+    @requires_figure
     def get_value_range(self):
         """获取当前等值线图的值域范围
         
         Returns:
-            dict: 值域范围对象，包含 zmin 和 zmax
+            dict: 值域范围对象，包含 zmin 和 zmax，对数模式下为实际值
         """
         if not self.fig or not self.fig.data or not self.fig.data[0]:
             print("等值线图未初始化")
@@ -523,11 +1267,84 @@ class PlotlyContourChart:
             
         trace = self.fig.data[0]
         
+        if self.log_scale:
+            return {"zmin": LogScale.from_log(trace.zmin), "zmax": LogScale.from_log(trace.zmax)}
         return {
             "zmin": trace.zmin if hasattr(trace, "zmin") else None,
             "zmax": trace.zmax if hasattr(trace, "zmax") else None
         }
     
+    @requires_figure
+    def set_log_scale(self, enabled=True, levels_per_decade=None):
+        """切换对数颜色刻度，适用于跨越多个数量级的数据（如电阻率）
+        
+        对数模式下轨迹显示log10(z)，等值线在log10空间等间隔，颜色条刻度的标签为实际值，
+        悬停显示原始值；其余方法（颜色范围、采样、分区统计等）仍使用实际值。
+        非正值显示为空白，plotly原生的等值线标签显示的是log10值
+        
+        Args:
+            enabled: 是否使用对数刻度
+            levels_per_decade: 每个数量级的等值线数量，为None时保持当前设置
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化")
+            return False
+        
+        if levels_per_decade:
+            self._log.levels_per_decade = levels_per_decade
+        trace = self.fig.data[0]
+        if enabled and not self.log_scale:
+            contours = trace.contours
+            self._linear_contours = (contours.start, contours.end, contours.size)
+            zmin, zmax = LogScale.to_log(trace.zmin), LogScale.to_log(trace.zmax)
+            self.log_scale = True
+            self._update_grid(trace.x, trace.y, trace.z)
+            trace.update(
+                zmin=zmin,
+                zmax=zmax,
+                hovertemplate="x: %{x}<br>y: %{y}<br>z: %{customdata:.4g}<extra></extra>"
+            )
+        elif not enabled and self.log_scale:
+            zmin, zmax = LogScale.from_log(trace.zmin), LogScale.from_log(trace.zmax)
+            start, end, size = self._linear_contours or (None, None, None)
+            self.log_scale = False
+            trace.update(
+                z=trace.customdata,
+                customdata=None,
+                zmin=zmin,
+                zmax=zmax,
+                hovertemplate=None,
+                contours_start=start,
+                contours_end=end,
+                contours_size=size,
+                colorbar_tickvals=None,
+                colorbar_ticktext=None
+            )
+            self._log.clear()
+        if self.log_scale:
+            self._update_log_axes()
+        if self._frames is not None and self.fig.frames:
+            self.set_frames(*self._frames)
+        return True
+    
+    def _update_log_axes(self, contours=True):
+        """按当前颜色范围（未设置时为数据范围）生成对数等值线和颜色条刻度"""
+        trace = self.fig.data[0]
+        low, high = trace.zmin, trace.zmax
+        if low is None or high is None:
+            if np.isnan(trace.z).all():
+                return
+            low = float(np.nanmin(trace.z)) if low is None else low
+            high = float(np.nanmax(trace.z)) if high is None else high
+        if contours:
+            levels = self._log.levels(low, high)
+            trace.update(contours_start=levels["start"], contours_end=levels["end"], contours_size=levels["size"])
+        tickvals, ticktext = LogScale.ticks(low, high)
+        trace.update(colorbar_tickvals=tickvals, colorbar_ticktext=ticktext)
+    
     def _map_symbol(self, symbol):
         """将JSON中的symbol映射到Plotly支持的marker symbol
         
@@ -597,6 +1414,7 @@ class PlotlyContourChart:
         # 如果模式在映射字典中，返回映射值，否则返回None（纯颜色填充）
         return pattern_map.get(pattern, None)
     
+    @requires_figure
     def initShape(self, shapeData):
         """初始化形状，添加点、线、多边形或文本到图表
         
@@ -828,6 +1646,7 @@ class PlotlyContourChart:
             print(f"不支持的形状类型: {shape_type}")
             return None
         
+        self.shapes[shape_id] = dict(shapeData)  # 复制一份，修改顶点时不影响调用方（或缓存中只读）的数据
         return shape_id
         
     def show(self):
@@ -836,17 +1655,44 @@ class PlotlyContourChart:
             print("图表未初始化，无法显示")
             return
         
-        # 添加自定义颜色条（如果存在）
-        if self.custom_colorbar:
-            self.custom_colorbar.add_to_figure(self.fig)
-            
         self.fig.show(config=self.config)
     
+    @requires_figure
+    def apply_colormap(self, colormap, colorbar=True, **kwargs):
+        """用同一个ColorMap设置等值线图的颜色刻度和自定义颜色条，二者的颜色和值域一致
+
+        Args:
+            colormap: ColorMap对象
+            colorbar: 是否同时添加自定义颜色条
+            **kwargs: 其他传递给CustomColorBar的参数
+
+        Returns:
+            CustomColorBar: 创建的颜色条对象，不添加颜色条时返回None
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+
+        # 对数模式下轨迹的z为log10值，停止点也换到log10空间
+        trace_colormap = colormap.log10() if self.log_scale else colormap
+        self.fig.data[0].update(
+            colorscale=trace_colormap.colorscale(),
+            zmin=trace_colormap.vmin,
+            zmax=trace_colormap.vmax
+        )
+        if self.log_scale:
+            self._update_log_axes(contours=False)
+        if colorbar:
+            kwargs.setdefault("log_scale", self.log_scale)
+            return self.addCustomColorBar(colormap, **kwargs)
+        return None
+
+    @requires_figure
     def addCustomColorBar(self, color_stops, **kwargs):
         """添加自定义颜色条
         
         Args:
-            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]
+            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]，或ColorMap
             **kwargs: 其他传递给CustomColorBar的参数
             
         Returns:
@@ -867,7 +1713,7 @@ class PlotlyContourChart:
         return self.custom_colorbar
         
     def save_figure(self, filename, format="png"):
-        """保存图表为图片
+        """保存图表为图片，始终使用原始分辨率的网格
         
         Args:
             filename: 保存的文件名
@@ -877,17 +1723,31 @@ class PlotlyContourChart:
             print("图表未初始化，无法保存")
             return False
         
-        # 添加自定义颜色条（如果存在）
-        if self.custom_colorbar:
-            self.custom_colorbar.add_to_figure(self.fig)
-            
+        figure = self.fig
+        if self._full_grid is not None:
+            # 当前显示的是缩减视图，导出时换回原始网格（保持当前坐标轴范围），不修改图表本身
+            figure = self._figure_with_grid(*self._full_grid)
+        return self._write_image(filename, format, figure)
+    
+    def _figure_with_grid(self, x, y, z):
+        """返回替换了等值线网格的图表字典，用于导出，自定义颜色条已在图表中，不再重复添加"""
+        spec = self.fig.to_dict()
+        spec["data"][0].update(x=x, y=y, z=self._display_z(z))
+        if self.log_scale:
+            spec["data"][0]["customdata"] = z
+        return spec
+    
+    def _write_image(self, filename, format, figure):
+        """写入图片文件"""
         try:
-            self.fig.write_image(
+            pio.write_image(
+                figure,
                 filename,
                 format=format,
                 engine="kaleido",
                 width=1800,
-                height=600
+                height=600,
+                validate=False
             )
             print(f"成功保存图表到 {filename}")
             return True
@@ -896,26 +1756,37 @@ class PlotlyContourChart:
             try:
                 # 尝试保存为HTML作为备份
                 html_file = filename.replace(f".{format}", ".html")
-                self.fig.write_html(html_file)
+                pio.write_html(figure, html_file, validate=False)
                 print(f"已保存为HTML格式: {html_file}")
             except Exception as html_err:
                 print(f"保存HTML时也出错: {html_err}")
             return False
     
-    def save_as_html(self, filename):
+    def save_as_html(self, filename, size_budget=None, how="mean"):
         """保存图表为HTML
         
         Args:
             filename: 保存的文件名
+            size_budget: z数据序列化后的字节数上限，指定后使用满足上限的最精细金字塔层
+            how: 金字塔的块缩减方式
         """
         if not self.fig:
             print("图表未初始化，无法保存")
             return False
         
-        # 添加自定义颜色条（如果存在）
-        if self.custom_colorbar:
-            self.custom_colorbar.add_to_figure(self.fig)
-            
+        if size_budget is not None:
+            level = self.level_for_size(size_budget, how)
+            if level:
+                x, y, z = self.build_pyramid(how).level(level)
+                print(f"HTML使用第 {level} 层金字塔，网格 {z.shape[0]} x {z.shape[1]}")
+                try:
+                    pio.write_html(self._figure_with_grid(x, y, z), filename, validate=False)
+                    print(f"成功保存图表到 {filename}")
+                    return True
+                except Exception as e:
+                    print(f"保存HTML时出错: {e}")
+                    return False
+        
         try:
             self.fig.write_html(filename)
             print(f"成功保存图表到 {filename}")
@@ -923,3 +1794,90 @@ class PlotlyContourChart:
         except Exception as e:
             print(f"保存HTML时出错: {e}")
             return False
+
+    @requires_figure
+    def set_frames(self, frames, names=None, titles=None, duration=500):
+        """设置多期数据的动画帧
+        
+        Args:
+            frames: 每一期的z网格，与初始化时的x、y轴对应
+            names: 每一帧的名称（显示在滑块上），默认使用帧序号
+            titles: 每一帧的标题，为None时不修改标题
+            duration: 每一帧的播放时长 (毫秒)
+            
+        Returns:
+            fig: 添加了动画帧的图表对象
+        """
+        if not self.fig:
+            print("图表未初始化，无法设置动画帧")
+            return None
+        
+        # 保存原始帧数据，切换对数刻度时重新生成
+        self._frames = (frames, names, titles, duration)
+        if self.log_scale:
+            # 帧的z与轨迹一样使用log10值，原始值放在customdata中用于悬停
+            log = LogScale()
+            deltas = [{"z": log.transform(values), "customdata": values} for values in frames]
+        else:
+            deltas = [{"z": values} for values in frames]
+        return build_animation(
+            self.fig,
+            deltas,
+            trace_index=0,
+            names=names,
+            titles=titles,
+            duration=duration,
+            redraw=True
+        )
+    
+    @requires_figure
+    def export_tiles(self, output_dir, zooms=4, tile_size=256, aspect=1.0, processes=None, how="mean"):
+        """导出XYZ瓦片金字塔，每一级使用网格间距与像素大小相当的金字塔层
+        
+        Args:
+            output_dir: 输出目录，瓦片保存为 {z}/{x}/{y}.png，并写入manifest.json
+            zooms: 级别数量，或级别列表
+            tile_size: 瓦片边长 (像素)
+            aspect: 纵向放大倍数
+            processes: 进程数量，默认为CPU核心数
+            how: 金字塔的块缩减方式
+            
+        Returns:
+            dict: 瓦片清单，失败返回None
+        """
+        if not self.fig or not self.fig.data:
+            print("图表未初始化，无法导出瓦片")
+            return None
+        
+        pyramid = self.build_pyramid(how)
+        x, y, z = pyramid.levels[0]
+        spacing = float(np.median(np.abs(np.diff(x)))) if len(x) > 1 else 0.0
+        
+        def data_for_zoom(zoom, resolution):
+            """选择网格间距不小于像素大小一半的最粗一层"""
+            level = int(max(np.floor(np.log2(resolution / spacing)), 0)) if spacing else 0
+            level_x, level_y, level_z = pyramid.level(level)
+            return {"x": level_x, "y": level_y, "z": self._display_z(level_z)}
+        
+        figure = self.fig if self._full_grid is None else self._figure_with_grid(x, y, z)
+        return export_tiles(figure, output_dir, zooms=zooms, tile_size=tile_size, aspect=aspect,
+                            processes=processes, data_for_zoom=data_for_zoom)
+    
+    @requires_figure
+    def export_frames(self, output_dir, prefix="frame", format="png", processes=None):
+        """并行导出每一帧为图片，用于合成视频
+        
+        Args:
+            output_dir: 输出目录
+            prefix: 文件名前缀
+            format: 图片格式，默认为png
+            processes: 进程数量，默认为CPU核心数
+            
+        Returns:
+            list: 成功导出的文件路径
+        """
+        if not self.fig:
+            print("图表未初始化，无法导出")
+            return []
+        
+        return export_frames(self.fig, output_dir, prefix=prefix, format=format, width=1800, height=600, processes=processes)
@@ -0,0 +1,439 @@
+import os
+import json
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+def build_animation(fig, frames, trace_index=0, names=None, titles=None, duration=500, redraw=True):
+    """把多期数据写入图表的动画帧，并添加滑块和播放按钮
+
+    每一帧只携带发生变化的数组，布局、头节点、形状和颜色条只在基础图表中保存一份
+
+    Args:
+        fig: Plotly图形对象
+        frames: 每一帧的增量数据列表，例如 {"marker": {"color": [...]}} 或 {"z": [[...]]}
+        trace_index: 增量数据所作用的轨迹索引
+        names: 每一帧的名称，默认使用帧序号
+        titles: 每一帧的标题，为None时不修改标题
+        duration: 每一帧的播放时长 (毫秒)
+        redraw: 切换帧时是否完全重绘，等值线图需要重绘
+
+    Returns:
+        fig: 添加了动画帧的图形对象
+    """
+    names = [str(name) for name in (names if names is not None else range(1, len(frames) + 1))]
+    if len(names) != len(frames):
+        print("帧名称数量与帧数量不一致")
+        return fig
+
+    # 帧数据需要声明轨迹类型，否则按散点图校验
+    trace_type = fig.data[trace_index].type
+    animation_frames = []
+    for i, (name, delta) in enumerate(zip(names, frames)):
+        frame = dict(data=[dict(delta, type=trace_type)], traces=[trace_index], name=name)
+        if titles is not None:
+            frame["layout"] = {"title": {"text": titles[i]}}
+        animation_frames.append(go.Frame(frame))
+
+    animate_args = {
+        "mode": "immediate",
+        "frame": {"duration": duration, "redraw": redraw},
+        "transition": {"duration": 0}
+    }
+    steps = [
+        {"label": name, "method": "animate", "args": [[name], animate_args]}
+        for name in names
+    ]
+
+    with fig.batch_update():
+        fig.frames = animation_frames
+        fig.layout.sliders = [{
+            "active": 0,
+            "currentvalue": {"prefix": "期次: "},
+            "pad": {"t": 50},
+            "steps": steps
+        }]
+        fig.layout.updatemenus = [{
+            "type": "buttons",
+            "showactive": False,
+            "x": 0,
+            "y": 0,
+            "xanchor": "right",
+            "yanchor": "top",
+            "pad": {"t": 50, "r": 10},
+            "buttons": [
+                {"label": "播放", "method": "animate", "args": [None, dict(animate_args, fromcurrent=True)]},
+                {"label": "暂停", "method": "animate", "args": [[None], dict(animate_args, frame={"duration": 0, "redraw": False})]}
+            ]
+        }]
+    return fig
+
+
+def _merge(base, delta):
+    """把增量字典合并到基础字典的副本上，只复制被修改的嵌套层级"""
+    merged = dict(base)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def apply_frame(spec, frame):
+    """将一帧的增量数据应用到基础图表字典上
+
+    Args:
+        spec: 不含frames的图表字典 {data, layout}
+        frame: 帧字典 {data, traces, layout}
+
+    Returns:
+        dict: 该帧对应的完整图表字典，未修改的部分与spec共享
+    """
+    data = list(spec["data"])
+    traces = frame.get("traces") or range(len(frame.get("data", [])))
+    for trace_index, delta in zip(traces, frame.get("data", [])):
+        data[trace_index] = _merge(data[trace_index], delta)
+    layout = spec.get("layout", {})
+    if frame.get("layout"):
+        layout = _merge(layout, frame["layout"])
+    return {"data": data, "layout": layout}
+
+
+# 工作进程中的基础图表字典，由进程初始化函数设置，每个进程只传输一次
+_BASE_SPEC = None
+
+
+def _init_worker(spec):
+    """进程池初始化：保存基础图表字典"""
+    global _BASE_SPEC
+    _BASE_SPEC = spec
+
+
+def _render_frame(task):
+    """在工作进程中渲染一帧并写入文件"""
+    frame, filename, format, width, height = task
+    try:
+        image = pio.to_image(
+            apply_frame(_BASE_SPEC, frame),
+            format=format,
+            engine="kaleido",
+            width=width,
+            height=height,
+            validate=False
+        )
+        with open(filename, "wb") as f:
+            f.write(image)
+        return filename
+    except Exception as e:
+        print(f"导出帧 {filename} 时出错: {e}")
+        return None
+
+
+def export_frames(fig, output_dir, prefix="frame", format="png", width=800, height=600, processes=None):
+    """并行导出动画的每一帧为图片，用于合成视频
+
+    基础图表只序列化一次并发送给每个工作进程，每个任务只携带该帧的增量数据
+
+    Args:
+        fig: 带有动画帧的Plotly图形对象
+        output_dir: 输出目录
+        prefix: 文件名前缀，文件名为 {prefix}_{序号}.{format}
+        format: 图片格式，默认为png
+        width: 图片宽度
+        height: 图片高度
+        processes: 进程数量，默认为CPU核心数
+
+    Returns:
+        list: 成功导出的文件路径，按帧顺序排列
+    """
+    if not fig.frames:
+        print("图表没有动画帧，无法导出")
+        return []
+    if importlib.util.find_spec("kaleido") is None:
+        print("导出图片需要安装kaleido")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    spec = fig.to_plotly_json()
+    frames = [frame.to_plotly_json() for frame in fig.frames]
+    # 导出的静态图片不需要滑块和播放按钮
+    layout = dict(spec["layout"])
+    layout.pop("sliders", None)
+    layout.pop("updatemenus", None)
+    base = {"data": spec["data"], "layout": layout}
+
+    digits = len(str(len(frames)))
+    tasks = [
+        (frame, os.path.join(output_dir, f"{prefix}_{i:0{digits}d}.{format}"), format, width, height)
+        for i, frame in enumerate(frames, start=1)
+    ]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _init_worker(base)
+        results = [_render_frame(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(base,)) as executor:
+            results = list(executor.map(_render_frame, tasks))
+
+    exported = [filename for filename in results if filename]
+    print(f"成功导出 {len(exported)}/{len(tasks)} 帧到 {output_dir}")
+    return exported
+
+
+def _cell_half_widths(nodes):
+    """网格节点到单元边界的距离：取两侧相邻节点间距一半中的较大值，端点取相邻间距的一半"""
+    gaps = np.abs(np.diff(nodes)) / 2
+    if gaps.size == 0:
+        return np.zeros(len(nodes))
+    return np.maximum(np.concatenate(([gaps[0]], gaps)), np.concatenate((gaps, [gaps[-1]])))
+
+
+def _on_main_axes(trace):
+    """轨迹是否绘制在主坐标轴 (x, y) 上，瓦片不包含其他坐标轴（如剖面图的xaxis2/yaxis2）"""
+    return (trace.get("xaxis") or "x") == "x" and (trace.get("yaxis") or "y") == "y"
+
+
+def _data_points(spec):
+    """收集图表中所有数据点的坐标和范围，用于判断瓦片是否为空
+
+    网格轨迹（等值线、热力图）的每个有限值网格按单元计算，节点两侧各延伸半个网格间距；
+    散点按标记半径（像素）延伸，换算为数据长度与瓦片级别有关，由TileScheme.occupied计算
+
+    Returns:
+        tuple: (x, y, x方向半宽, y方向半高, 标记半径像素数)，均为等长数组
+    """
+    parts = []
+    for trace in spec["data"]:
+        x = trace.get("x")
+        y = trace.get("y")
+        if x is None or y is None or not _on_main_axes(trace):
+            continue
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if trace.get("type") in ("contour", "heatmap") and trace.get("z") is not None:
+            z = np.asarray(trace["z"], dtype=float)
+            rows, columns = np.nonzero(np.isfinite(z))
+            half_x = _cell_half_widths(x)[columns]
+            half_y = _cell_half_widths(y)[rows]
+            x, y = x[columns], y[rows]
+            radius = np.zeros(len(x))
+        elif x.shape != y.shape:
+            continue
+        else:
+            half_x = half_y = np.zeros(len(x))
+            mode = trace.get("mode") or "markers"
+            marker = trace.get("marker") or {}
+            size = marker.get("size", 6) if "markers" in mode else 0
+            radius = np.broadcast_to(np.asarray(size if size is not None else 6, dtype=float) / 2, x.shape)
+        finite = np.isfinite(x) & np.isfinite(y)
+        parts.append([a[finite] for a in (x, y, half_x, half_y, np.nan_to_num(radius))])
+    if not parts:
+        return tuple(np.zeros(0) for _ in range(5))
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+class TileScheme:
+    """
+    固定的瓦片方案
+    第0级用一块瓦片容纳整个数据范围，每增加一级分辨率加倍；
+    瓦片按XYZ约定编号，列号从左向右、行号从图上方向下
+    """
+
+    def __init__(self, x_range, y_range, tile_size=256, aspect=1.0, y_reversed=False):
+        """
+        初始化瓦片方案
+
+        参数:
+            x_range: 数据的x范围 [最小值, 最大值]
+            y_range: 数据的y范围 [最小值, 最大值]
+            tile_size: 瓦片边长 (像素)
+            aspect: 纵向放大倍数，y方向每像素的数据长度为x方向的1/aspect
+            y_reversed: y轴是否反转（图的上方为y最小值）
+        """
+        self.x_min, self.x_max = float(min(x_range)), float(max(x_range))
+        self.y_min, self.y_max = float(min(y_range)), float(max(y_range))
+        self.tile_size = tile_size
+        self.aspect = aspect
+        self.y_reversed = y_reversed
+        width = self.x_max - self.x_min
+        height = (self.y_max - self.y_min) * aspect
+        # 第0级x方向每像素的数据长度
+        self.resolution0 = (max(width, height) or 1.0) / tile_size
+
+    def tile_extent(self, zoom):
+        """返回该级别单块瓦片的数据宽度和高度"""
+        width = self.resolution0 / 2 ** zoom * self.tile_size
+        return width, width / self.aspect
+
+    def tile_count(self, zoom):
+        """返回该级别的瓦片列数和行数"""
+        width, height = self.tile_extent(zoom)
+        columns = max(int(np.ceil((self.x_max - self.x_min) / width - 1e-9)), 1)
+        rows = max(int(np.ceil((self.y_max - self.y_min) / height - 1e-9)), 1)
+        return columns, rows
+
+    def tile_ranges(self, zoom, column, row):
+        """返回瓦片的坐标轴范围 (x_range, y_range)，y_range按图上方到下方排列"""
+        width, height = self.tile_extent(zoom)
+        x_range = [self.x_min + column * width, self.x_min + (column + 1) * width]
+        if self.y_reversed:
+            return x_range, [self.y_min + (row + 1) * height, self.y_min + row * height]
+        return x_range, [self.y_max - (row + 1) * height, self.y_max - row * height]
+
+    def occupied(self, zoom, xs, ys, half_x=0.0, half_y=0.0, radius=0.0):
+        """返回与数据范围相交的瓦片 (列号, 行号) 数组
+
+        Args:
+            zoom: 级别
+            xs, ys: 数据点或网格节点的坐标
+            half_x, half_y: 每个点在x、y方向的半宽（数据长度），如网格单元的半个间距
+            radius: 每个点的标记半径（像素），按该级别的分辨率换算为数据长度
+        """
+        width, height = self.tile_extent(zoom)
+        columns, rows = self.tile_count(zoom)
+        pad_x = half_x + np.asarray(radius) * (width / self.tile_size)
+        pad_y = half_y + np.asarray(radius) * (height / self.tile_size)
+        offset = (ys - self.y_min) if self.y_reversed else (self.y_max - ys)
+
+        def span(low, high, step, count):
+            first = np.clip(np.floor(low / step), 0, count - 1).astype(np.int64)
+            last = np.clip(np.floor(high / step), 0, count - 1).astype(np.int64)
+            return first, last
+
+        first_column, last_column = span(xs - self.x_min - pad_x, xs - self.x_min + pad_x, width, columns)
+        first_row, last_row = span(offset - pad_y, offset + pad_y, height, rows)
+
+        # 大多数点只落在一块瓦片中，跨越多块瓦片的点逐块展开
+        single = (first_column == last_column) & (first_row == last_row)
+        keys = [first_row[single] * columns + first_column[single]]
+        multi = np.flatnonzero(~single)
+        if multi.size:
+            spans = last_column[multi] - first_column[multi] + 1
+            counts = spans * (last_row[multi] - first_row[multi] + 1)
+            item = np.repeat(np.arange(multi.size), counts)
+            k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            column = first_column[multi][item] + k % spans[item]
+            row = first_row[multi][item] + k // spans[item]
+            keys.append(row * columns + column)
+        keys = np.unique(np.concatenate(keys))
+        return np.stack([keys % columns, keys // columns], axis=1)
+
+    def to_dict(self):
+        """瓦片方案的清单描述"""
+        return {
+            "x_range": [self.x_min, self.x_max],
+            "y_range": [self.y_min, self.y_max],
+            "tile_size": self.tile_size,
+            "aspect": self.aspect,
+            "y_reversed": self.y_reversed,
+            "resolution0": self.resolution0
+        }
+
+
+def _tile_base(spec, tile_size):
+    """去掉标题、图例、坐标轴、滑块和纸面坐标的装饰，得到瓦片共用的基础图表字典"""
+    layout = dict(spec.get("layout", {}))
+    for key in ("title", "sliders", "updatemenus", "xaxis2", "yaxis2"):
+        layout.pop(key, None)
+    layout["shapes"] = [s for s in layout.get("shapes", []) if s.get("xref") != "paper" and s.get("yref") != "paper"]
+    layout["annotations"] = [a for a in layout.get("annotations", []) if a.get("xref") != "paper" and a.get("yref") != "paper"]
+    layout.update(
+        width=tile_size,
+        height=tile_size,
+        margin={"t": 0, "l": 0, "r": 0, "b": 0, "pad": 0},
+        showlegend=False,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    layout["xaxis"] = dict(layout.get("xaxis", {}), visible=False, autorange=False)
+    layout["yaxis"] = dict(layout.get("yaxis", {}), visible=False, autorange=False)
+    data = [dict(trace, showscale=False) if "showscale" in trace else trace for trace in spec["data"]]
+    # 其他坐标轴已去掉，其上的轨迹隐藏（保留位置，data_for_zoom按序号替换轨迹）
+    data = [trace if _on_main_axes(trace) else dict(trace, visible=False) for trace in data]
+    return {"data": data, "layout": layout}
+
+
+def export_tiles(fig, output_dir, zooms=4, tile_size=256, aspect=1.0, processes=None, data_for_zoom=None):
+    """导出XYZ瓦片金字塔及清单，用于本地浏览器分页查看长测线
+
+    每一级只启动一次进程池，基础图表字典通过进程初始化函数发送一次，
+    每个瓦片任务只携带坐标轴范围；不含数据点的瓦片不渲染
+
+    Args:
+        fig: Plotly图形对象或图表字典
+        output_dir: 输出目录，瓦片保存为 {z}/{x}/{y}.png
+        zooms: 级别数量，或级别列表
+        tile_size: 瓦片边长 (像素)
+        aspect: 纵向放大倍数
+        processes: 进程数量，默认为CPU核心数
+        data_for_zoom: 可选的回调 (级别, 每像素数据长度) -> 第0个轨迹的数据替换字典，
+            例如按级别选择等值线金字塔的某一层
+
+    Returns:
+        dict: 清单，失败返回None
+    """
+    if importlib.util.find_spec("kaleido") is None:
+        print("导出图片需要安装kaleido")
+        return None
+
+    spec = fig if isinstance(fig, dict) else fig.to_plotly_json()
+    xs, ys, half_x, half_y, radius = _data_points(spec)
+    if xs.size == 0:
+        print("图表没有数据，无法导出瓦片")
+        return None
+
+    yaxis = spec.get("layout", {}).get("yaxis", {})
+    scheme = TileScheme(
+        [xs.min(), xs.max()], [ys.min(), ys.max()],
+        tile_size=tile_size,
+        aspect=aspect,
+        y_reversed=yaxis.get("autorange") == "reversed"
+    )
+    base = _tile_base(spec, tile_size)
+    zooms = list(range(zooms)) if isinstance(zooms, int) else list(zooms)
+
+    manifest = dict(scheme.to_dict(), template="{z}/{x}/{y}.png", zooms={})
+    processes = processes or os.cpu_count() or 1
+    for zoom in zooms:
+        zoom_base = base
+        if data_for_zoom is not None:
+            delta = data_for_zoom(zoom, scheme.resolution0 / 2 ** zoom)
+            if delta:
+                zoom_base = apply_frame(base, {"data": [delta], "traces": [0]})
+
+        tiles = scheme.occupied(zoom, xs, ys, half_x, half_y, radius)
+        tasks = []
+        for column, row in tiles.tolist():
+            x_range, y_range = scheme.tile_ranges(zoom, column, row)
+            filename = os.path.join(output_dir, str(zoom), str(column), f"{row}.png")
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            frame = {"layout": {"xaxis": {"range": x_range}, "yaxis": {"range": y_range}}}
+            tasks.append((frame, filename, "png", tile_size, tile_size))
+
+        if processes == 1 or len(tasks) == 1:
+            _init_worker(zoom_base)
+            results = [_render_frame(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(zoom_base,)) as executor:
+                results = list(executor.map(_render_frame, tasks, chunksize=max(len(tasks) // (processes * 4), 1)))
+
+        columns, rows = scheme.tile_count(zoom)
+        manifest["zooms"][str(zoom)] = {
+            "columns": columns,
+            "rows": rows,
+            "tiles": [[column, row] for (column, row), result in zip(tiles.tolist(), results) if result]
+        }
+        print(f"第 {zoom} 级: 导出 {sum(1 for r in results if r)}/{columns * rows} 块瓦片（跳过空瓦片）")
+
+    try:
+        with open(os.path.join(output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存瓦片清单时出错: {e}")
+    return manifest
@@ -0,0 +1,217 @@
+import functools
+import os
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.validator_cache import ValidatorCache
+from plotly.validators import DataValidator
+
+# 校验级别："structure" 只校验属性名和数组长度（默认），"full" 使用plotly逐元素完整校验（调试、测试时使用），
+# "none" 不校验；可以用环境变量 PLOTLY_FAST_VALIDATION 设置
+VALIDATION = os.environ.get("PLOTLY_FAST_VALIDATION", "structure")
+
+_TRACE_CLASSES = DataValidator().class_strs_map  # 轨迹类型 -> go中的类名
+_STRUCTURE_SUPPORTED = None  # plotly的校验器查询是否可用，第一次校验时探测
+
+
+def _validator(parent, key):
+    """属性的校验器，不存在的属性返回None
+
+    通过plotly公开的ValidatorCache查询，parent为校验器所在的路径，如 "scatter.marker"、"layout.xaxis"；
+    layout中带编号的子图（如xaxis2）使用不带编号的校验器
+    """
+    try:
+        return ValidatorCache.get_validator(parent, key)
+    except (AttributeError, ImportError):
+        return None
+
+
+def _child_path(parent, validator):
+    """复合属性的子属性所在的路径，如 scatter + marker -> scatter.marker，layout + annotations -> layout.annotation"""
+    data_class = getattr(validator, "data_class_str", None)
+    return None if data_class is None else f"{parent}.{data_class.lower()}"
+
+
+def _is_array(validator):
+    """是否为逐点数组属性（数据数组，或可以取数组的样式属性如marker.color）"""
+    return getattr(validator, "array_ok", False) or any(
+        cls.__name__ == "DataArrayValidator" for cls in type(validator).__mro__
+    )
+
+
+def structure_supported():
+    """探测当前plotly版本的校验器查询是否与预期一致
+
+    结构校验依赖ValidatorCache的查询结果，plotly升级后行为变化时返回False，
+    build_figure改用go.Figure完整校验，不会静默地跳过校验
+
+    Returns:
+        bool: 是否可以使用结构校验
+    """
+    global _STRUCTURE_SUPPORTED
+    if _STRUCTURE_SUPPORTED is None:
+        try:
+            _STRUCTURE_SUPPORTED = bool(
+                _child_path("scatter", _validator("scatter", "marker")) == "scatter.marker"
+                and _child_path("layout", _validator("layout", "xaxis2")) == "layout.xaxis"
+                and _child_path("layout", _validator("layout", "annotations")) == "layout.annotation"
+                and _is_array(_validator("scatter", "x"))
+                and _is_array(_validator("scatter.marker", "color"))
+                and not _is_array(_validator("scatter", "mode"))
+                and _validator("scatter", "no_such_property") is None
+                and _TRACE_CLASSES.get("contour") == "Contour"
+            )
+        except Exception:
+            _STRUCTURE_SUPPORTED = False
+    return _STRUCTURE_SUPPORTED
+
+
+def _check_properties(parent, spec, path):
+    """校验属性名，逐层检查字典和字典列表，相同结构的列表元素只检查一次"""
+    for key, value in spec.items():
+        validator = _validator(parent, key)
+        if validator is None:
+            raise ValueError(f"{path} 中不存在属性: {key}")
+        child = _child_path(parent, validator)
+        if child is None:
+            continue
+        if isinstance(value, dict):
+            _check_properties(child, value, f"{path}.{key}")
+        elif isinstance(value, (list, tuple)):
+            checked = set()
+            for item in value:
+                if isinstance(item, dict) and frozenset(item) not in checked:
+                    _check_properties(child, item, f"{path}.{key}[]")
+                    checked.add(frozenset(item))
+
+
+def _point_arrays(parent, spec, path):
+    """逐点数组属性 [(路径, 长度), ...]，包括marker、marker.line等子属性中的数组"""
+    arrays = []
+    for key, value in spec.items():
+        if isinstance(value, dict):
+            child = _child_path(parent, _validator(parent, key))
+            if child is not None:
+                arrays.extend(_point_arrays(child, value, f"{path}.{key}"))
+        elif isinstance(value, (np.ndarray, list, tuple)):
+            if _is_array(_validator(parent, key)):
+                arrays.append((f"{path}.{key}", len(value)))
+    return arrays
+
+
+def _check_trace(trace, index):
+    """校验一条轨迹的类型、属性名和数组长度"""
+    trace_type = trace.get("type", "scatter")
+    if trace_type not in _TRACE_CLASSES:
+        raise ValueError(f"data[{index}] 的轨迹类型不存在: {trace_type}")
+    path = f"data[{index}]"
+    _check_properties(trace_type, {key: value for key, value in trace.items() if key != "type"}, path)
+
+    z = trace.get("z")
+    if z is not None and np.ndim(z[0] if len(z) else z) == 1:
+        # 网格轨迹：x对应列，y对应行
+        rows, columns = len(z), len(z[0]) if len(z) else 0
+        for key, expected in (("x", columns), ("y", rows)):
+            value = trace.get(key)
+            if value is not None and np.ndim(value) == 1 and len(value) != expected:
+                raise ValueError(f"{path}.{key} 的长度 {len(value)} 与z的形状 ({rows}, {columns}) 不一致")
+        return
+
+    arrays = _point_arrays(trace_type, trace, path)
+    lengths = {length for _, length in arrays}
+    if len(lengths) > 1:
+        detail = ", ".join(f"{name}={length}" for name, length in arrays)
+        raise ValueError(f"{path} 中逐点数组的长度不一致: {detail}")
+
+
+def check_structure(spec):
+    """整体校验图表结构：轨迹类型、各级属性名、逐点数组的长度，不逐个检查数组元素
+
+    Args:
+        spec: {"data": [轨迹字典, ...], "layout": {...}}
+
+    Raises:
+        ValueError: 结构不正确
+    """
+    for index, trace in enumerate(spec.get("data", [])):
+        _check_trace(trace, index)
+    _check_properties("layout", spec.get("layout", {}), "layout")
+
+
+class FigureSpec(dict):
+    """
+    plotly图表的字典描述 {"data": [...], "layout": {...}}
+    数组保持为传入的NumPy数组，不复制、不逐元素校验；可以直接显示和导出，
+    需要用plotly的方法修改图表时用to_figure()转换为go.Figure
+    """
+
+    @property
+    def data(self):
+        return self["data"]
+
+    @property
+    def layout(self):
+        return self["layout"]
+
+    def show(self, config=None, **kwargs):
+        """显示图表"""
+        pio.show(self, config=config, validate=False, **kwargs)
+
+    def to_json(self, **kwargs):
+        """序列化为JSON字符串"""
+        return pio.to_json(self, validate=False, **kwargs)
+
+    def write_html(self, filename, **kwargs):
+        """保存为HTML"""
+        pio.write_html(self, filename, validate=False, **kwargs)
+
+    def write_image(self, filename, **kwargs):
+        """保存为图片，需要kaleido"""
+        pio.write_image(self, filename, validate=False, **kwargs)
+
+    def to_figure(self):
+        """转换为go.Figure，会对所有数组做完整校验并复制"""
+        return go.Figure(self)
+
+
+def requires_figure(method):
+    """图表方法的装饰器：快速模式下self.fig为FigureSpec，不能用plotly的方法修改和查询
+
+    Raises:
+        TypeError: self.fig为FigureSpec，需要先用 self.fig = self.fig.to_figure() 转换
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if isinstance(self.fig, FigureSpec):
+            raise TypeError(f"快速模式下图表为FigureSpec，{method.__name__} 需要go.Figure，"
+                            "请先用 self.fig = self.fig.to_figure() 转换")
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def build_figure(data, layout=None, validation=None):
+    """由轨迹字典和布局字典组装图表，不创建plotly的图形对象
+
+    Args:
+        data: 轨迹字典列表，每个字典的type为轨迹类型（默认scatter），数组可以是NumPy数组
+        layout: 布局字典
+        validation: 校验级别，"structure"、"full" 或 "none"，为None时使用VALIDATION
+
+    Returns:
+        FigureSpec: 图表描述
+
+    Raises:
+        ValueError: 校验失败
+    """
+    validation = VALIDATION if validation is None else validation
+    spec = FigureSpec(data=list(data), layout=dict(layout or {}))
+    if validation == "full":
+        go.Figure(spec)  # 逐元素校验，出错时抛出ValueError
+    elif validation == "structure":
+        if structure_supported():
+            check_structure(spec)
+        else:
+            go.Figure(spec)  # 当前plotly版本不支持结构校验，改为完整校验
+    elif validation != "none":
+        raise ValueError(f"不支持的校验级别: {validation}")
+    return spec
@@ -0,0 +1,313 @@
+import numpy as np
+
+
+class AxisIndex:
+    """
+    网格轴的预计算索引
+    等间距轴用算术方式O(1)定位网格，非等间距轴使用searchsorted，降序轴在内部翻转为升序
+    """
+
+    def __init__(self, axis, rtol=1e-6):
+        """
+        初始化轴索引
+
+        参数:
+            axis: 轴坐标
+            rtol: 判断等间距的相对容差，json中保存的坐标存在舍入误差
+        """
+        axis = np.asarray(axis, dtype=float)
+        self.size = len(axis)
+        self.reversed = self.size > 1 and axis[0] > axis[-1]
+        self.axis = axis[::-1] if self.reversed else axis
+        self.start = float(self.axis[0]) if self.size else 0.0
+        self.end = float(self.axis[-1]) if self.size else 0.0
+        self.step = None
+        if self.size > 1:
+            steps = np.diff(self.axis)
+            step = (self.end - self.start) / (self.size - 1)
+            if step > 0 and np.all(np.abs(steps - step) <= rtol * step):
+                self.step = step
+
+    @property
+    def uniform(self):
+        """是否为等间距轴"""
+        return self.step is not None
+
+    def locate(self, values):
+        """定位坐标所在的网格区间
+
+        Args:
+            values: 坐标数组
+
+        Returns:
+            tuple: (左侧节点索引, 区间内的相对位置t∈[0,1], 是否在轴范围内)，
+                索引对应原始轴的顺序，降序轴的t同样从左侧节点量起
+        """
+        values = np.asarray(values, dtype=float)
+        inside = (values >= self.start) & (values <= self.end)
+        if self.size < 2:
+            return np.zeros(values.shape, dtype=np.int64), np.zeros(values.shape), inside & (self.size == 1)
+
+        if self.uniform:
+            position = (values - self.start) / self.step
+            index = np.clip(np.floor(np.nan_to_num(position)), 0, self.size - 2).astype(np.int64)
+            t = position - index
+        else:
+            index = np.clip(np.searchsorted(self.axis, values, side="right") - 1, 0, self.size - 2)
+            left = self.axis[index]
+            t = (values - left) / (self.axis[index + 1] - left)
+        t = np.clip(t, 0.0, 1.0)
+
+        if self.reversed:
+            # 翻转回原始顺序：升序中的区间 [i, i+1] 对应原始轴的 [n-2-i, n-1-i]
+            index = self.size - 2 - index
+            t = 1.0 - t
+        return index, t, inside
+
+    def nearest(self, values):
+        """返回最近节点的索引和是否在轴范围内"""
+        index, t, inside = self.locate(values)
+        return np.where(t >= 0.5, index + 1, index), inside
+
+
+def bilinear_sample(z, x_index, y_index, xs, ys):
+    """在网格上批量双线性插值
+
+    Args:
+        z: 二维网格数据，形状为 (len(y), len(x))
+        x_index: x轴的AxisIndex
+        y_index: y轴的AxisIndex
+        xs: 采样点x坐标
+        ys: 采样点y坐标
+
+    Returns:
+        tuple: (插值结果, 是否在网格内)，网格外或四个角点中有NaN时结果为NaN
+    """
+    z = np.asarray(z, dtype=float)
+    i, tx, inside_x = x_index.locate(xs)
+    j, ty, inside_y = y_index.locate(ys)
+    inside = inside_x & inside_y
+
+    if z.shape[1] < 2 or z.shape[0] < 2:
+        values = z[np.minimum(j, z.shape[0] - 1), np.minimum(i, z.shape[1] - 1)]
+    else:
+        z00 = z[j, i]
+        z01 = z[j, i + 1]
+        z10 = z[j + 1, i]
+        z11 = z[j + 1, i + 1]
+        values = (z00 * (1 - tx) + z01 * tx) * (1 - ty) + (z10 * (1 - tx) + z11 * tx) * ty
+    return np.where(inside, values, np.nan), inside
+
+
+def nearest_sample(z, x_index, y_index, xs, ys):
+    """在网格上批量取最近节点的值
+
+    Args:
+        z: 二维网格数据，形状为 (len(y), len(x))
+        x_index: x轴的AxisIndex
+        y_index: y轴的AxisIndex
+        xs: 查询点x坐标
+        ys: 查询点y坐标
+
+    Returns:
+        tuple: (最近节点的值, 是否在网格内)，网格外为NaN
+    """
+    z = np.asarray(z, dtype=float)
+    i, inside_x = x_index.nearest(xs)
+    j, inside_y = y_index.nearest(ys)
+    inside = inside_x & inside_y
+    values = z[np.minimum(j, z.shape[0] - 1), np.minimum(i, z.shape[1] - 1)]
+    return np.where(inside, values, np.nan), inside
+
+
+def densify_polylines(polylines, spacing):
+    """按给定间距加密多条折线，所有折线一次性计算
+
+    Args:
+        polylines: [(xs, ys), ...]
+        spacing: 采样间距
+
+    Returns:
+        tuple: (x, y, 沿线距离, 每条折线的起始偏移)，偏移数组长度为折线数+1
+    """
+    if spacing <= 0:
+        raise ValueError("采样间距必须大于0")
+
+    lengths = np.array([len(xs) for xs, _ in polylines], dtype=np.int64)
+    px = np.concatenate([np.asarray(xs, dtype=float) for xs, _ in polylines]) if len(polylines) else np.zeros(0)
+    py = np.concatenate([np.asarray(ys, dtype=float) for _, ys in polylines]) if len(polylines) else np.zeros(0)
+    line_of_vertex = np.repeat(np.arange(len(polylines)), lengths)
+
+    # 线段：相邻两个顶点属于同一条折线
+    same = line_of_vertex[1:] == line_of_vertex[:-1]
+    seg = np.flatnonzero(same)
+    sx0, sy0 = px[seg], py[seg]
+    dx, dy = px[seg + 1] - sx0, py[seg + 1] - sy0
+    seg_length = np.hypot(dx, dy)
+    seg_line = line_of_vertex[seg]
+
+    # 每条线段内的采样数，线段终点由下一条线段的起点或折线终点补上
+    counts = np.maximum(np.ceil(seg_length / spacing).astype(np.int64), 1)
+    total = counts.sum()
+    k = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = k / np.repeat(counts, counts)
+    owner = np.repeat(np.arange(len(seg)), counts)
+
+    # 沿线累计距离：每条折线从0开始
+    seg_start = np.concatenate([[0.0], np.cumsum(seg_length)])[:-1]
+    first_seg = np.full(len(polylines), -1, dtype=np.int64)
+    if len(seg):
+        first_seg[seg_line[::-1]] = np.arange(len(seg))[::-1]
+    line_offset = np.where(first_seg >= 0, seg_start[np.maximum(first_seg, 0)], 0.0)
+    seg_distance = seg_start - line_offset[seg_line]
+
+    x = sx0[owner] + t * dx[owner]
+    y = sy0[owner] + t * dy[owner]
+    distance = seg_distance[owner] + t * seg_length[owner]
+    line = seg_line[owner]
+
+    # 追加每条折线的终点（包括只有一个顶点的折线）
+    ends = np.cumsum(lengths) - 1
+    valid = lengths > 0
+    end_line = np.arange(len(polylines))[valid]
+    end_distance = np.zeros(len(polylines))
+    np.add.at(end_distance, seg_line, seg_length)
+    x = np.concatenate([x, px[ends[valid]]])
+    y = np.concatenate([y, py[ends[valid]]])
+    distance = np.concatenate([distance, end_distance[valid]])
+    line = np.concatenate([line, end_line])
+
+    order = np.argsort(line, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(line, minlength=len(polylines)))])
+    return x[order], y[order], distance[order], offsets
+
+
+def geometry_key(x, y):
+    """网格几何的缓存键，轴坐标相同的网格共享缓存"""
+    return hash((np.asarray(x, dtype=float).tobytes(), np.asarray(y, dtype=float).tobytes()))
+
+
+def block_reduce(z, factor, how="mean"):
+    """按块缩减二维网格，忽略NaN；整块为NaN时结果为NaN
+
+    Args:
+        z: 二维网格数据
+        factor: 块大小，(行, 列) 或单个整数
+        how: "mean"、"min" 或 "max"
+
+    Returns:
+        np.ndarray: 缩减后的网格，行列数向上取整
+    """
+    fy, fx = (factor, factor) if np.isscalar(factor) else factor
+    z = np.asarray(z, dtype=float)
+    ny, nx = z.shape
+    my, mx = -(-ny // fy), -(-nx // fx)
+    if (my * fy, mx * fx) != (ny, nx):
+        padded = np.full((my * fy, mx * fx), np.nan)
+        padded[:ny, :nx] = z
+        z = padded
+    blocks = z.reshape(my, fy, mx, fx)
+
+    finite = np.isfinite(blocks)
+    count = finite.sum(axis=(1, 3))
+    if how == "mean":
+        total = np.where(finite, blocks, 0.0).sum(axis=(1, 3))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan)
+    if how == "min":
+        result = np.where(finite, blocks, np.inf).min(axis=(1, 3))
+    elif how == "max":
+        result = np.where(finite, blocks, -np.inf).max(axis=(1, 3))
+    else:
+        raise ValueError(f"不支持的缩减方式: {how}")
+    return np.where(count > 0, result, np.nan)
+
+
+def _reduce_axis(axis, factor):
+    """按块取轴坐标的平均值"""
+    axis = np.asarray(axis, dtype=float)
+    count = -(-len(axis) // factor)
+    padded = np.full(count * factor, np.nan)
+    padded[:len(axis)] = axis
+    blocks = padded.reshape(count, factor)
+    valid = np.isfinite(blocks)
+    return np.where(valid, blocks, 0.0).sum(axis=1) / valid.sum(axis=1)
+
+
+class GridPyramid:
+    """
+    网格数据的多分辨率金字塔
+    第0层为原始网格，之后每层由上一层按factor分块缩减，总计算量约为原始网格的4/3
+    """
+
+    def __init__(self, x, y, z, factor=2, how="mean", min_size=2):
+        """
+        构建金字塔
+
+        参数:
+            x: x轴坐标
+            y: y轴坐标
+            z: 二维网格数据
+            factor: 每层的缩减倍数
+            how: 缩减方式，"mean"、"min" 或 "max"
+            min_size: 最粗一层的最小行列数
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        z = np.asarray(z, dtype=float)
+        self.factor = factor
+        self.how = how
+        self.levels = [(x, y, z)]
+        while min(z.shape) >= factor * min_size:
+            x = _reduce_axis(x, factor)
+            y = _reduce_axis(y, factor)
+            z = block_reduce(z, factor, how)
+            self.levels.append((x, y, z))
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level(self, index):
+        """返回第index层的 (x, y, z)"""
+        return self.levels[min(max(index, 0), len(self.levels) - 1)]
+
+    def level_for_cells(self, max_cells, x_range=None, y_range=None):
+        """选择在给定范围内网格数不超过max_cells的最精细层
+
+        Args:
+            max_cells: 网格数上限
+            x_range: [最小值, 最大值]，为None时为整个x范围
+            y_range: [最小值, 最大值]，为None时为整个y范围
+
+        Returns:
+            int: 层索引，没有满足条件的层时返回最粗一层
+        """
+        for index in range(len(self.levels)):
+            x, y, _ = self.levels[index]
+            columns = _window(x, x_range)
+            rows = _window(y, y_range)
+            if (columns.stop - columns.start) * (rows.stop - rows.start) <= max_cells:
+                return index
+        return len(self.levels) - 1
+
+    def window(self, index, x_range=None, y_range=None):
+        """返回第index层在给定范围内的 (x, y, z)，两侧各多保留一个网格避免边缘出现空白"""
+        x, y, z = self.level(index)
+        columns = _window(x, x_range, pad=1)
+        rows = _window(y, y_range, pad=1)
+        return x[columns], y[rows], z[rows, columns]
+
+
+def _window(axis, value_range, pad=0):
+    """返回轴坐标落在范围内的切片"""
+    if value_range is None:
+        return slice(0, len(axis))
+    low, high = min(value_range), max(value_range)
+    inside = np.flatnonzero((axis >= low) & (axis <= high))
+    if inside.size == 0:
+        # 范围落在两个网格之间时取最近的两个网格
+        center = np.searchsorted(np.sort(axis), (low + high) / 2)
+        inside = np.array([max(center - 1, 0), min(center, len(axis) - 1)])
+        if axis[0] > axis[-1]:
+            inside = len(axis) - 1 - inside[::-1]
+    return slice(max(inside.min() - pad, 0), min(inside.max() + 1 + pad, len(axis)))
@@ -0,0 +1,290 @@
+import json
+import numpy as np
+
+# 单元角点编号: v0=(j,i), v1=(j,i+1), v2=(j+1,i+1), v3=(j+1,i)
+# 单元边编号: e0=v0-v1 (下), e1=v1-v2 (右), e2=v2-v3 (上), e3=v3-v0 (左)
+# 情形编号为角点是否不低于等值线值的位掩码，16、17为鞍点中心不低于等值线值时的5和10
+_SEGMENTS = np.full((18, 2, 2), -1, dtype=np.int8)
+for _case, _pairs in {
+    1: [(3, 0)], 2: [(0, 1)], 3: [(3, 1)], 4: [(1, 2)],
+    5: [(3, 0), (1, 2)], 6: [(0, 2)], 7: [(3, 2)], 8: [(2, 3)],
+    9: [(0, 2)], 10: [(0, 1), (2, 3)], 11: [(1, 2)], 12: [(1, 3)],
+    13: [(0, 1)], 14: [(3, 0)],
+    16: [(0, 1), (2, 3)], 17: [(3, 0), (1, 2)],
+}.items():
+    for _k, _pair in enumerate(_pairs):
+        _SEGMENTS[_case, _k] = _pair
+
+
+def contour_levels(z, size=None, start=None, end=None, levels=None, count=15):
+    """计算等值线值列表
+
+    Args:
+        z: 二维网格数据
+        size: 等值线间隔，对应set_contour_interval设置的contours_size
+        start: 第一条等值线的值，默认取不小于最小值的第一个间隔倍数
+        end: 最后一条等值线的值，默认取不大于最大值的最后一个间隔倍数
+        levels: 明确指定的等值线值列表，优先级最高
+        count: 未指定间隔时自动生成的等值线数量
+
+    Returns:
+        np.ndarray: 升序排列的等值线值
+    """
+    if levels is not None:
+        return np.unique(np.asarray(levels, dtype=float))
+
+    z = np.asarray(z, dtype=float)
+    finite = z[np.isfinite(z)]
+    if finite.size == 0:
+        return np.array([])
+    z_min, z_max = float(finite.min()), float(finite.max())
+    if z_min == z_max:
+        return np.array([z_min])
+
+    if not size:
+        # 与plotly的ncontours类似，在值域内部均匀取值
+        return np.linspace(z_min, z_max, count + 2)[1:-1]
+
+    start = np.ceil(z_min / size) * size if start is None else start
+    end = np.floor(z_max / size) * size if end is None else end
+    return np.arange(start, end + size * 0.5, size)
+
+
+def _edge_points(x, y, z, level, edges, nx, n_horizontal):
+    """计算边上等值点的坐标，edges为全局边编号"""
+    horizontal = edges < n_horizontal
+    local = np.where(horizontal, edges, edges - n_horizontal)
+    width = np.where(horizontal, nx - 1, nx)
+    j = local // width
+    i = local % width
+    # 水平边连接 (j,i)-(j,i+1)，垂直边连接 (j,i)-(j+1,i)
+    j1 = np.where(horizontal, j, j + 1)
+    i1 = np.where(horizontal, i + 1, i)
+    za = z[j, i]
+    zb = z[j1, i1]
+    t = (level - za) / (zb - za)
+    px = x[i] + t * (x[i1] - x[i])
+    py = y[j] + t * (y[j1] - y[j])
+    return px, py
+
+
+def _trace_level(x, y, z, level, valid_cells):
+    """提取单个等值线值的所有折线"""
+    ny, nx = z.shape
+    above = (z >= level).view(np.uint8)
+    case = above[:-1, :-1] | (above[:-1, 1:] << 1) | (above[1:, 1:] << 2) | (above[1:, :-1] << 3)
+    active = (case != 0) & (case != 15)
+    if valid_cells is not None:
+        active &= valid_cells
+    cj, ci = np.nonzero(active)
+    if cj.size == 0:
+        return []
+    case = case[cj, ci].astype(np.int64)
+
+    # 鞍点用单元中心的平均值消除歧义
+    saddle = (case == 5) | (case == 10)
+    if saddle.any():
+        sj, si = cj[saddle], ci[saddle]
+        center = (z[sj, si] + z[sj, si + 1] + z[sj + 1, si + 1] + z[sj + 1, si]) / 4
+        case[saddle] = np.where(center >= level, np.where(case[saddle] == 5, 16, 17), case[saddle])
+
+    # 单元局部边到全局边编号的映射
+    n_horizontal = ny * (nx - 1)
+    cell_edges = np.stack([
+        cj * (nx - 1) + ci,                      # e0 水平边 (j, i)
+        n_horizontal + cj * nx + ci + 1,         # e1 垂直边 (j, i+1)
+        (cj + 1) * (nx - 1) + ci,                # e2 水平边 (j+1, i)
+        n_horizontal + cj * nx + ci,             # e3 垂直边 (j, i)
+    ], axis=1)
+
+    pairs = _SEGMENTS[case]                      # (cells, 2, 2)
+    rows = np.repeat(np.arange(len(case)), 2)
+    pairs = pairs.reshape(-1, 2)
+    keep = pairs[:, 0] >= 0
+    rows, pairs = rows[keep], pairs[keep].astype(np.int64)
+    start = cell_edges[rows, pairs[:, 0]]
+    end = cell_edges[rows, pairs[:, 1]]
+    return _stitch(start, end, *_edge_points(x, y, z, level, np.concatenate([start, end]), nx, n_horizontal))
+
+
+def _stitch(start, end, px, py):
+    """把共享边的线段连接为折线
+
+    每条网格边最多被两个相邻单元的线段共享，排序后相邻的相同边即为连接点
+    """
+    count = len(start)
+    edges = np.concatenate([start, end])
+    order = np.argsort(edges, kind="stable")
+    same = edges[order[1:]] == edges[order[:-1]]
+    partner = np.full(2 * count, -1, dtype=np.int64)
+    partner[order[:-1][same]] = order[1:][same]
+    partner[order[1:][same]] = order[:-1][same]
+
+    partner = partner.tolist()
+    px = px.tolist()
+    py = py.tolist()
+    visited = [False] * count
+    lines = []
+
+    def walk(segment, entry):
+        """从segment的entry端点出发沿线段链行走"""
+        xs = [px[entry]]
+        ys = [py[entry]]
+        while True:
+            visited[segment] = True
+            exit_point = segment + count if entry < count else segment
+            xs.append(px[exit_point])
+            ys.append(py[exit_point])
+            entry = partner[exit_point]
+            if entry < 0:
+                break
+            segment = entry % count
+            if visited[segment]:
+                break
+        return xs, ys
+
+    # 先从开放端点出发（边界或空值处断开的折线），再处理闭合环
+    for k in range(2 * count):
+        segment = k % count
+        if partner[k] < 0 and not visited[segment]:
+            lines.append(walk(segment, k))
+    for segment in range(count):
+        if not visited[segment]:
+            lines.append(walk(segment, segment))
+    return lines
+
+
+def extract_isolines(x, y, z, levels=None, size=None):
+    """使用marching squares提取等值线
+
+    Args:
+        x: x轴坐标，长度为z的列数，为None时使用列号
+        y: y轴坐标，长度为z的行数，为None时使用行号
+        z: 二维网格数据，NaN所在的单元不生成等值线
+        levels: 等值线值列表
+        size: 等值线间隔，未指定levels时使用
+
+    Returns:
+        dict: {等值线值: [(xs, ys), ...]}，每条折线为坐标列表，闭合折线首尾相同
+    """
+    z = np.asarray(z, dtype=float)
+    ny, nx = z.shape
+    x = np.arange(nx, dtype=float) if x is None else np.asarray(x, dtype=float)
+    y = np.arange(ny, dtype=float) if y is None else np.asarray(y, dtype=float)
+    if len(x) != nx or len(y) != ny:
+        raise ValueError("x、y的长度必须与z的列数、行数一致")
+    if nx < 2 or ny < 2:
+        return {}
+
+    valid_cells = None
+    nan = ~np.isfinite(z)
+    if nan.any():
+        valid_cells = ~(nan[:-1, :-1] | nan[:-1, 1:] | nan[1:, 1:] | nan[1:, :-1])
+        # NaN不参与比较，置为任意有限值即可
+        z = np.where(nan, 0.0, z)
+
+    levels = contour_levels(z if valid_cells is None else np.where(nan, np.nan, z), size=size, levels=levels)
+    return {float(level): _trace_level(x, y, z, level, valid_cells) for level in levels}
+
+
+def isolines_to_geojson(isolines, crs=None):
+    """将等值线转换为GeoJSON FeatureCollection
+
+    Args:
+        isolines: extract_isolines的返回值
+        crs: 可选的坐标参考系名称，例如 "EPSG:4326"
+
+    Returns:
+        dict: 每个等值线值一个MultiLineString要素，属性中包含level
+    """
+    features = []
+    for level, lines in isolines.items():
+        if not lines:
+            continue
+        features.append({
+            "type": "Feature",
+            "properties": {"level": level},
+            "geometry": {
+                "type": "MultiLineString",
+                "coordinates": [[[px, py] for px, py in zip(xs, ys)] for xs, ys in lines]
+            }
+        })
+    collection = {"type": "FeatureCollection", "features": features}
+    if crs:
+        collection["crs"] = {"type": "name", "properties": {"name": crs}}
+    return collection
+
+
+def save_geojson(isolines, filename, crs=None):
+    """保存等值线为GeoJSON文件
+
+    Args:
+        isolines: extract_isolines的返回值
+        filename: 保存的文件名
+        crs: 可选的坐标参考系名称
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(isolines_to_geojson(isolines, crs), f, ensure_ascii=False)
+        print(f"成功保存等值线到 {filename}")
+        return True
+    except Exception as e:
+        print(f"保存GeoJSON时出错: {e}")
+        return False
+
+
+def save_dxf(isolines, filename, layer="ISOLINE"):
+    """保存等值线为DXF (R12) 文件
+
+    每条折线写为一个POLYLINE实体，高程（组码30）为等值线值，闭合折线设置闭合标志
+
+    Args:
+        isolines: extract_isolines的返回值
+        filename: 保存的文件名
+        layer: 图层名称
+
+    Returns:
+        bool: 是否保存成功
+    """
+    parts = ["0\nSECTION\n2\nENTITIES\n"]
+    for level, lines in isolines.items():
+        for xs, ys in lines:
+            closed = len(xs) > 2 and xs[0] == xs[-1] and ys[0] == ys[-1]
+            if closed:
+                xs, ys = xs[:-1], ys[:-1]
+            parts.append(f"0\nPOLYLINE\n8\n{layer}\n66\n1\n10\n0.0\n20\n0.0\n30\n{level!r}\n70\n{1 if closed else 0}\n")
+            parts.append("".join(
+                f"0\nVERTEX\n8\n{layer}\n10\n{px!r}\n20\n{py!r}\n30\n{level!r}\n" for px, py in zip(xs, ys)
+            ))
+            parts.append(f"0\nSEQEND\n8\n{layer}\n")
+    parts.append("0\nENDSEC\n0\nEOF\n")
+    try:
+        with open(filename, 'w', encoding='ascii') as f:
+            f.write("".join(parts))
+        print(f"成功保存等值线到 {filename}")
+        return True
+    except Exception as e:
+        print(f"保存DXF时出错: {e}")
+        return False
+
+
+def isoline_path(lines):
+    """把多条折线合并为一条以NaN分隔的坐标序列，便于用单个轨迹绘制
+
+    使用NumPy数组而不是含None的列表，plotly校验数组时无需逐个检查元素
+
+    Args:
+        lines: [(xs, ys), ...]
+
+    Returns:
+        tuple: (xs, ys) 两个一维数组
+    """
+    if not lines:
+        return np.array([]), np.array([])
+    separator = [np.nan]
+    xs = np.concatenate([part for line_x, _ in lines for part in (line_x, separator)])
+    ys = np.concatenate([part for _, line_y in lines for part in (line_y, separator)])
+    return xs, ys
@@ -0,0 +1,315 @@
+import numpy as np
+from typing import List, Optional, Sequence
+
+# 候选标签位置及其相对于标记点的偏移方向 (dx, dy)，屏幕坐标系中y向下为正
+LABEL_POSITIONS = {
+    "top center": (0, -1),
+    "top left": (-1, -1),
+    "top right": (1, -1),
+    "bottom center": (0, 1),
+    "bottom left": (-1, 1),
+    "bottom right": (1, 1),
+    "middle left": (-1, 0),
+    "middle right": (1, 0),
+}
+
+# 默认尝试顺序，与注释掉的交错方案保持一致
+DEFAULT_POSITIONS = ['top center', 'top right', 'top left', 'bottom center', 'bottom left', 'bottom right']
+
+
+def default_label_priority(labels: Sequence) -> np.ndarray:
+    """计算默认的标签优先级
+
+    首尾两个标签优先级最高，其余按编号的"整齐程度"排序：
+    10的倍数 > 5的倍数 > 偶数 > 其他，同级别时按原始顺序
+
+    Args:
+        labels: 标签值列表，通常是头节点的num
+
+    Returns:
+        np.ndarray: 每个标签的优先级，数值越大越优先
+    """
+    n = len(labels)
+    priority = np.zeros(n, dtype=float)
+    if n == 0:
+        return priority
+
+    nums = np.array([_to_number(label) for label in labels], dtype=float)
+    valid = ~np.isnan(nums)
+    ints = np.where(valid, nums, 0).astype(np.int64)
+    is_int = valid & (nums == ints)
+
+    priority[is_int & (ints % 2 == 0)] = 1
+    priority[is_int & (ints % 5 == 0)] = 2
+    priority[is_int & (ints % 10 == 0)] = 3
+    priority[[0, -1]] = 4
+    return priority
+
+
+def _to_number(value):
+    """尝试把标签转换为数字，失败返回NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class LabelPlacer:
+    """
+    基于屏幕空间网格的标签避让布局
+    根据图表尺寸和坐标轴范围估算每个标签的像素包围盒，按优先级贪心放置，
+    与已放置标签冲突时依次尝试其他候选位置，全部冲突则隐藏该标签
+    """
+
+    def __init__(
+        self,
+        width: int = 800,
+        height: int = 600,
+        x_range: Optional[List[float]] = None,
+        y_range: Optional[List[float]] = None,
+        margin: Optional[dict] = None,
+        y_reversed: bool = False,
+        font_size: int = 12,
+        char_width: float = 0.6,
+        line_height: float = 1.2,
+        padding: float = 2,
+        marker_size: float = 0,
+        positions: Optional[List[str]] = None,
+        avoid_markers: bool = True,
+        x_extent: Optional[List[float]] = None,
+        y_extent: Optional[List[float]] = None
+    ):
+        """
+        初始化标签布局器
+
+        参数:
+            width: 图表宽度 (像素)
+            height: 图表高度 (像素)
+            x_range: x轴范围 [最小值, 最大值]，为None时根据数据计算
+            y_range: y轴范围 [最小值, 最大值]，为None时根据数据计算
+            margin: 边距 {t, l, r, b}
+            y_reversed: y轴是否反转
+            font_size: 标签字体大小
+            char_width: 单个字符宽度与字体大小之比
+            line_height: 行高与字体大小之比
+            padding: 标签包围盒的额外留白 (像素)
+            marker_size: 标记大小，标签会偏移半个标记大小
+            positions: 候选位置列表，按尝试顺序排列，没有有效位置时使用默认顺序
+            avoid_markers: 标签是否需要避开其他标记点
+            x_extent: 图中其他数据的x范围 [最小值, 最大值]，自动计算x轴范围时与标记点一起计算
+            y_extent: 图中其他数据的y范围 [最小值, 最大值]
+        """
+        margin = margin or {}
+        self.width = width
+        self.height = height
+        self.x_range = x_range
+        self.y_range = y_range
+        self.margin = {key: margin.get(key, 50) for key in ("t", "l", "r", "b")}
+        self.y_reversed = y_reversed
+        self.font_size = font_size
+        self.char_width = char_width
+        self.line_height = line_height
+        self.padding = padding
+        self.marker_size = marker_size
+        self.positions = [p for p in (positions or ()) if p in LABEL_POSITIONS] or list(DEFAULT_POSITIONS)
+        self.avoid_markers = avoid_markers
+        self.x_extent = x_extent
+        self.y_extent = y_extent
+
+    @classmethod
+    def from_figure(cls, fig, **kwargs):
+        """根据图表布局创建标签布局器
+
+        坐标轴没有设置范围时，按图中所有轨迹的数据范围估算plotly的自动范围
+
+        Args:
+            fig: Plotly图形对象
+            **kwargs: 其他传递给LabelPlacer的参数，优先级高于图表布局
+
+        Returns:
+            LabelPlacer: 标签布局器
+        """
+        layout = fig.layout
+        margin = layout.margin
+        x_extent, y_extent = _figure_extent(fig)
+        options = dict(
+            width=layout.width or 800,
+            height=layout.height or 600,
+            x_range=list(layout.xaxis.range) if layout.xaxis.range else None,
+            y_range=list(layout.yaxis.range) if layout.yaxis.range else None,
+            margin={
+                key: getattr(margin, key) for key in ("t", "l", "r", "b")
+                if getattr(margin, key) is not None
+            },
+            y_reversed=layout.yaxis.autorange == "reversed",
+            x_extent=x_extent,
+            y_extent=y_extent
+        )
+        options.update(kwargs)
+        return cls(**options)
+
+    def _to_pixels(self, xs: np.ndarray, ys: np.ndarray):
+        """将数据坐标转换为绘图区内的像素坐标"""
+        plot_width = max(self.width - self.margin["l"] - self.margin["r"], 1)
+        plot_height = max(self.height - self.margin["t"] - self.margin["b"], 1)
+
+        x_min, x_max = self.x_range or _auto_range(np.concatenate([xs, self.x_extent or []]))
+        y_min, y_max = self.y_range or _auto_range(np.concatenate([ys, self.y_extent or []]))
+
+        px = (xs - x_min) / ((x_max - x_min) or 1) * plot_width
+        fy = (ys - y_min) / ((y_max - y_min) or 1)
+        py = fy * plot_height if self.y_reversed else (1 - fy) * plot_height
+        return px, py
+
+    def place(self, xs, ys, texts, priorities=None, max_labels: Optional[int] = None):
+        """计算标签布局
+
+        Args:
+            xs: 标记点x坐标
+            ys: 标记点y坐标
+            texts: 标签文本
+            priorities: 标签优先级，数值越大越先放置，默认使用default_label_priority
+            max_labels: 最多放置的标签数量
+
+        Returns:
+            tuple: (显示的文本列表, 文本位置列表)，未放置的标签文本为空字符串
+        """
+        n = len(texts)
+        if n == 0:
+            return [], []
+
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        labels = ["" if t is None else str(t) for t in texts]
+        if priorities is None:
+            priorities = default_label_priority(texts)
+        priorities = np.asarray(priorities, dtype=float)
+
+        px, py = self._to_pixels(xs, ys)
+
+        # 批量计算所有候选位置的包围盒 (n, k)
+        half_w = np.array([len(t) for t in labels]) * self.font_size * self.char_width / 2 + self.padding
+        half_h = self.font_size * self.line_height / 2 + self.padding
+        offset = self.marker_size / 2
+        dirs = np.array([LABEL_POSITIONS[p] for p in self.positions], dtype=float)
+        cx = px[:, None] + dirs[None, :, 0] * (half_w[:, None] + offset)
+        cy = py[:, None] + dirs[None, :, 1] * (half_h + offset)
+        # 转为Python列表，避免循环内逐个访问NumPy标量的开销
+        x0 = (cx - half_w[:, None]).tolist()
+        x1 = (cx + half_w[:, None]).tolist()
+        y0 = (cy - half_h).tolist()
+        y1 = (cy + half_h).tolist()
+
+        # 网格单元取标签高度，每个包围盒只覆盖少量单元
+        cell = max(half_h * 2, 1.0)
+        label_grid = _SpatialGrid(cell)
+        marker_grid = None
+
+        if self.avoid_markers and offset > 0:
+            marker_grid = _SpatialGrid(cell)
+            for i, (mx, my) in enumerate(zip(px.tolist(), py.tolist())):
+                marker_grid.insert((mx - offset, my - offset, mx + offset, my + offset), i)
+
+        # 按优先级降序放置，同优先级保持原始顺序
+        order = np.argsort(-priorities, kind="stable")
+        text_values = [""] * n
+        text_positions = [self.positions[0]] * n
+        placed = 0
+        for i in order.tolist():
+            if max_labels is not None and placed >= max_labels:
+                break
+            if not labels[i]:
+                continue
+            for k, position in enumerate(self.positions):
+                box = (x0[i][k], y0[i][k], x1[i][k], y1[i][k])
+                # 已放置的标签较稀疏，先检查标签再检查密集的标记点
+                if label_grid.collides(box):
+                    continue
+                if marker_grid is not None and marker_grid.collides(box, i):
+                    continue
+                label_grid.insert(box)
+                text_values[i] = labels[i]
+                text_positions[i] = position
+                placed += 1
+                break
+
+        return text_values, text_positions
+
+
+class _SpatialGrid:
+    """均匀网格空间索引，用于快速查询包围盒是否重叠"""
+
+    def __init__(self, cell: float):
+        self.cell = cell
+        self.cells = {}
+        self.boxes = []
+
+    def _keys(self, box):
+        """返回包围盒覆盖的网格单元"""
+        cell = self.cell
+        for gx in range(int(box[0] // cell), int(box[2] // cell) + 1):
+            for gy in range(int(box[1] // cell), int(box[3] // cell) + 1):
+                yield gx, gy
+
+    def insert(self, box, owner=-1):
+        """加入包围盒，owner为所属标记点的索引"""
+        self.boxes.append((box, owner))
+        index = len(self.boxes) - 1
+        for key in self._keys(box):
+            self.cells.setdefault(key, []).append(index)
+
+    def collides(self, box, owner=None):
+        """检查包围盒是否与已有包围盒重叠（忽略属于owner的包围盒）"""
+        for key in self._keys(box):
+            for index in self.cells.get(key, ()):
+                other, other_owner = self.boxes[index]
+                if other_owner == owner:
+                    continue
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    return True
+        return False
+
+
+def _figure_extent(fig):
+    """图中所有轨迹的数据范围 ([x最小值, x最大值], [y最小值, y最大值])，没有数值数据的方向为None"""
+    extents = []
+    for axis in ("x", "y"):
+        lows, highs = [], []
+        for trace in fig.data:
+            try:
+                values = np.asarray(getattr(trace, axis, None), dtype=float).ravel()
+            except (TypeError, ValueError):
+                continue
+            values = values[np.isfinite(values)]
+            if values.size:
+                lows.append(values.min())
+                highs.append(values.max())
+        extents.append([float(min(lows)), float(max(highs))] if lows else None)
+    return tuple(extents)
+
+
+def _auto_range(values: np.ndarray):
+    """模仿plotly的自动范围，在数据范围两侧各留出5%"""
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 0.0, 1.0
+    v_min, v_max = float(finite.min()), float(finite.max())
+    pad = (v_max - v_min) * 0.05 or 0.5
+    return v_min - pad, v_max + pad
+
+
+def place_labels(xs, ys, texts, priorities=None, max_labels=None, **kwargs):
+    """使用LabelPlacer计算标签布局的便捷函数
+
+    Args:
+        xs: 标记点x坐标
+        ys: 标记点y坐标
+        texts: 标签文本
+        priorities: 标签优先级
+        max_labels: 最多放置的标签数量
+        **kwargs: 传递给LabelPlacer的参数
+
+    Returns:
+        tuple: (显示的文本列表, 文本位置列表)
+    """
+    return LabelPlacer(**kwargs).place(xs, ys, texts, priorities=priorities, max_labels=max_labels)
@@ -0,0 +1,586 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotlyContour import CustomColorBar
+from plotlyColorMap import ColorMap
+
+try:
+    from scipy.spatial import Delaunay as _ScipyDelaunay
+except ImportError:  # scipy是可选依赖，没有时使用内置的逐点插入算法
+    _ScipyDelaunay = None
+
+# 三角剖分缓存 {点坐标哈希: 三角形}，同一组点只剖分一次
+_TRIANGULATION_CACHE = {}
+_TRIANGULATION_CACHE_SIZE = 8
+
+
+# 浮点快速判断的误差界（Shewchuk），超出误差界时结果的符号可靠，否则用精确整数重新计算
+_ORIENT_ERROR = 3.3306690738754716e-16
+_IN_CIRCLE_ERROR = 1.1102230246251577e-15
+
+
+class _Predicates:
+    """方向和外接圆判断，先用浮点计算，结果接近0时按坐标的精确整数表示重新计算
+
+    每个double都是 整数尾数 * 2^指数，统一到最小的指数后坐标成为精确的整数，
+    判断式的符号与原始坐标下的一致，共圆、共线的点不会因为舍入误差得到相互矛盾的结果
+    """
+
+    def __init__(self, xs, ys):
+        self.X = xs.tolist()
+        self.Y = ys.tolist()
+        mantissa, exponent = np.frexp(np.concatenate([xs, ys]))
+        nonzero = mantissa != 0
+        e_min = exponent[nonzero].min() if nonzero.any() else 0
+        n = len(xs)
+        integer = (mantissa * 2.0 ** 53).astype(np.int64)
+        shift = np.where(nonzero, exponent - e_min, 0)
+        self._mantissa = (integer[:n].tolist(), integer[n:].tolist())
+        self._shift = (shift[:n].tolist(), shift[n:].tolist())
+
+    def _exact(self, i):
+        """第i个点坐标的精确整数表示（相差同一个正的比例因子）"""
+        (mx, my), (sx, sy) = self._mantissa, self._shift
+        return mx[i] << sx[i], my[i] << sy[i]
+
+    def orient(self, a, b, c):
+        """点c相对有向边ab的位置，大于0在左侧（abc逆时针），等于0共线"""
+        X, Y = self.X, self.Y
+        left = (X[a] - X[c]) * (Y[b] - Y[c])
+        right = (Y[a] - Y[c]) * (X[b] - X[c])
+        det = left - right
+        if abs(det) > _ORIENT_ERROR * (abs(left) + abs(right)):
+            return det
+        (ax, ay), (bx, by), (cx, cy) = self._exact(a), self._exact(b), self._exact(c)
+        return (ax - cx) * (by - cy) - (ay - cy) * (bx - cx)
+
+    def in_circle(self, a, b, c, d):
+        """点d相对逆时针三角形abc外接圆的位置，大于0在圆内，等于0共圆"""
+        X, Y = self.X, self.Y
+        adx, ady = X[a] - X[d], Y[a] - Y[d]
+        bdx, bdy = X[b] - X[d], Y[b] - Y[d]
+        cdx, cdy = X[c] - X[d], Y[c] - Y[d]
+        bc, cb = bdx * cdy, cdx * bdy
+        ca, ac = cdx * ady, adx * cdy
+        ab, ba = adx * bdy, bdx * ady
+        alift = adx * adx + ady * ady
+        blift = bdx * bdx + bdy * bdy
+        clift = cdx * cdx + cdy * cdy
+        det = alift * (bc - cb) + blift * (ca - ac) + clift * (ab - ba)
+        permanent = (abs(bc) + abs(cb)) * alift + (abs(ca) + abs(ac)) * blift + (abs(ab) + abs(ba)) * clift
+        if abs(det) > _IN_CIRCLE_ERROR * permanent:
+            return det
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = (self._exact(i) for i in (a, b, c, d))
+        adx, ady, bdx, bdy, cdx, cdy = ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy
+        return (
+            (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+            + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+            + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+        )
+
+    def between(self, a, b, p):
+        """与ab共线的点p是否严格位于a、b之间"""
+        X, Y = self.X, self.Y
+        if X[a] != X[b]:
+            return min(X[a], X[b]) < X[p] < max(X[a], X[b])
+        return min(Y[a], Y[b]) < Y[p] < max(Y[a], Y[b])
+
+
+def _bowyer_watson(xs, ys):
+    """逐点插入（Bowyer-Watson）的Delaunay三角剖分
+
+    点按空间填充顺序插入，从上一个新建的三角形出发行走定位，每次插入的代价近似为常数。
+    凸包外侧用以无穷远点为顶点的虚三角形闭合，不需要有限大小的超级三角形；
+    判断式是精确的，规则网格上的共圆点、落在边上的点也能得到不重叠的剖分
+
+    Args:
+        xs: 点的x坐标，不能有重复的点
+        ys: 点的y坐标
+
+    Returns:
+        np.ndarray: (三角形数, 3) 的顶点索引，逆时针排列；所有点共线时为空
+    """
+    n = len(xs)
+    empty = np.zeros((0, 3), dtype=np.int64)
+    if n < 3:
+        return empty
+    predicates = _Predicates(xs, ys)
+    orient, in_circle, between = predicates.orient, predicates.in_circle, predicates.between
+    INF = n  # 无穷远点
+
+    # 随机分轮插入（BRIO）：每轮点数翻倍，轮内按蛇形网格顺序，相邻两次插入的点在空间上接近；
+    # 前几轮的点已经张成大致的凸包，之后很少在凸包外插入（规则网格上逐行插入时，
+    # 每个新点都能看见整行共线的凸包边，空腔与行长成正比）
+    scale = max(np.ptp(xs), np.ptp(ys)) or 1.0
+    side = max(int(np.sqrt(n / 4)), 1)
+    gx = np.minimum(((xs - xs.min()) / scale * side).astype(np.int64), side)
+    gy = np.minimum(((ys - ys.min()) / scale * side).astype(np.int64), side)
+    snake = np.empty(n, dtype=np.int64)
+    snake[np.lexsort((np.where(gy % 2 == 0, gx, -gx), gy))] = np.arange(n)
+    rounds = np.empty(n, dtype=np.int64)
+    rounds[np.random.default_rng(0).permutation(n)] = np.log2(np.arange(1, n + 1)).astype(np.int64)
+    order = np.lexsort((snake, rounds)).tolist()
+
+    # 初始三角形：前两个点和第一个与它们不共线的点
+    a, b = order[0], order[1]
+    third = next((k for k in range(2, n) if orient(a, b, order[k]) != 0), None)
+    if third is None:
+        return empty
+    c = order.pop(third)
+    order = order[2:]
+    if orient(a, b, c) < 0:
+        a, b = b, a
+
+    # 三角形0为 abc，三角形1-3为凸包三条边外侧的虚三角形 (边终点, 边起点, 无穷远点)
+    v = [a, b, c]
+    vertices = [v] + [[v[(k + 2) % 3], v[(k + 1) % 3], INF] for k in range(3)]
+    neighbors = [[1, 2, 3]] + [[1 + (k - 1) % 3, 1 + (k + 1) % 3, 0] for k in range(3)]
+    alive = [True] * 4
+
+    def conflicts(t, p):
+        """点p是否在三角形t的外接圆内；虚三角形为凸包边外侧的半平面，加上该边内部"""
+        v = vertices[t]
+        if INF in v:
+            i = v.index(INF)
+            a, b = v[(i + 1) % 3], v[(i + 2) % 3]
+            side = orient(a, b, p)
+            return side > 0 or (side == 0 and between(a, b, p))
+        return in_circle(v[0], v[1], v[2], p) > 0
+
+    last = 0
+    for p in order:
+        # 在实三角形中行走定位，越过凸包边时停在该边外侧的虚三角形上；
+        # 起始边轮换，避免在退化的布局中来回绕圈
+        t = last
+        steps = 0
+        while INF not in vertices[t]:
+            v = vertices[t]
+            for j in range(3):
+                k = (j + steps) % 3
+                if orient(v[(k + 1) % 3], v[(k + 2) % 3], p) < 0:
+                    t = neighbors[t][k]
+                    break
+            else:
+                break
+            steps += 1
+
+        # 与该点冲突的三角形组成空腔，空腔相对新点是星形的
+        bad = {t}
+        stack = [t]
+        while stack:
+            s = stack.pop()
+            for nb in neighbors[s]:
+                if nb not in bad and conflicts(nb, p):
+                    bad.add(nb)
+                    stack.append(nb)
+
+        # 空腔边界上的每条边与新点组成新三角形
+        by_first = {}
+        by_second = {}
+        created = []
+        for s in bad:
+            alive[s] = False
+            v = vertices[s]
+            for k in range(3):
+                nb = neighbors[s][k]
+                if nb in bad:
+                    continue
+                a, b = v[(k + 1) % 3], v[(k + 2) % 3]
+                index = len(vertices)
+                vertices.append([p, a, b])
+                neighbors.append([nb, -1, -1])
+                alive.append(True)
+                links = neighbors[nb]
+                links[links.index(s)] = index
+                by_first[a] = index
+                by_second[b] = index
+                created.append(index)
+                if INF not in (a, b):
+                    last = index
+        for index in created:
+            _, a, b = vertices[index]
+            neighbors[index][1] = by_first[b]
+            neighbors[index][2] = by_second[a]
+
+    triangles = np.array([v for v, keep in zip(vertices, alive) if keep], dtype=np.int64).reshape(-1, 3)
+    return triangles[(triangles < n).all(axis=1)]
+
+
+def delaunay(xs, ys):
+    """Delaunay三角剖分，结果按点坐标缓存
+
+    有scipy时使用scipy.spatial.Delaunay，否则使用内置的逐点插入算法；重复的点只保留一个
+
+    Args:
+        xs: 点的x坐标
+        ys: 点的y坐标
+
+    Returns:
+        np.ndarray: (三角形数, 3) 的顶点索引
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    key = hash((xs.tobytes(), ys.tobytes()))
+    if key in _TRIANGULATION_CACHE:
+        return _TRIANGULATION_CACHE[key]
+
+    points = np.column_stack([xs, ys])
+    unique, first, inverse = np.unique(points, axis=0, return_index=True, return_inverse=True)
+    if len(unique) < 3:
+        triangles = np.zeros((0, 3), dtype=np.int64)
+    elif _ScipyDelaunay is not None:
+        triangles = first[_ScipyDelaunay(unique).simplices]
+    else:
+        triangles = first[_bowyer_watson(unique[:, 0], unique[:, 1])]
+
+    if len(_TRIANGULATION_CACHE) >= _TRIANGULATION_CACHE_SIZE:
+        _TRIANGULATION_CACHE.pop(next(iter(_TRIANGULATION_CACHE)))
+    _TRIANGULATION_CACHE[key] = triangles
+    return triangles
+
+
+def cell_polygons(x, y, cells):
+    """把网格单元展开为以NaN分隔的闭合多边形坐标序列
+
+    Args:
+        x: 节点x坐标
+        y: 节点y坐标
+        cells: (单元数, 顶点数) 的节点索引，三角形与四边形混合时用-1补齐
+
+    Returns:
+        tuple: (xs, ys)，每个单元占 顶点数+2 个位置（首点闭合和NaN分隔）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    cells = np.asarray(cells, dtype=np.int64)
+    # 补齐的-1用单元的第一个顶点代替，得到退化的重复顶点
+    cells = np.where(cells < 0, cells[:, :1], cells)
+    ring = np.concatenate([cells, cells[:, :1]], axis=1)
+    xs = np.concatenate([x[ring], np.full((len(cells), 1), np.nan)], axis=1).ravel()
+    ys = np.concatenate([y[ring], np.full((len(cells), 1), np.nan)], axis=1).ravel()
+    return xs, ys
+
+
+class PlotlyMeshChart:
+    """
+    非结构网格（三角形/四边形单元）模型图
+    单元按颜色分箱，每个颜色箱绘制为一个填充多边形轨迹，不需要重采样为规则网格
+    """
+
+    def __init__(self, container=None):
+        """初始化网格图
+
+        Args:
+            container: 容器ID（Python中不使用，仅保持接口一致）
+        """
+        self.container = container
+        self.fig = None
+        self.layout = {}
+        self.config = {
+            "responsive": True,
+            "displayModeBar": False,
+            "scrollZoom": True
+        }
+        self.custom_colorbar = None  # 存储自定义颜色条
+        self.nodes = None  # 节点坐标 (x, y)
+        self.cells = None  # 单元的节点索引
+        self.values = None  # 单元值
+        self.style = {}
+        self.color_range = None
+
+    def init(self, options=None):
+        """初始化网格图
+
+        Args:
+            options: 配置选项
+                - data: 数据对象 {x: [], y: [], cells: [[]], v: [], zmin, zmax}
+                    x、y为节点坐标，cells为单元的节点索引，v为单元值；
+                    不提供cells时v为节点值，对节点做Delaunay三角剖分，单元值取顶点平均值
+                - style: 样式配置，包含colorscale（颜色为rgb或十六进制格式）, bins（颜色分箱数）, lineColor, lineWidth, showscale, hover
+                - layout: 布局配置
+
+        Returns:
+            fig: 返回创建的plotly图表对象
+        """
+        if options is None:
+            options = {}
+
+        data = options.get("data", {})
+        style = options.get("style", {})
+        layout = options.get("layout", {})
+
+        # 检查数据
+        if not all(key in data for key in ["x", "y", "v"]):
+            print("数据格式不正确")
+            return None
+
+        x = np.asarray(data.get("x"), dtype=float)
+        y = np.asarray(data.get("y"), dtype=float)
+        values = np.asarray(data.get("v"), dtype=float)
+        cells = data.get("cells")
+        if cells is None:
+            cells = delaunay(x, y)
+            values = values[cells].mean(axis=1)
+        cells = np.asarray(cells, dtype=np.int64)
+        if len(cells) != len(values):
+            print("单元数量与单元值数量不一致")
+            return None
+
+        self.nodes = (x, y)
+        self.cells = cells
+        self.values = values
+        self.style = style
+        finite = values[np.isfinite(values)]
+        self.color_range = [
+            data.get("zmin", float(finite.min()) if finite.size else 0.0),
+            data.get("zmax", float(finite.max()) if finite.size else 1.0)
+        ]
+
+        # 创建布局
+        self.layout = {
+            "title": layout.get("title", ""),
+            "showlegend": False,
+            "hovermode": "closest",
+            "margin": {"t": 50, "l": 50, "r": 50, "b": 50},
+            "xaxis": {
+                "title": layout.get("xAxisTitle", ""),
+                "showgrid": True,
+                "zeroline": True,
+                "autorange": True
+            },
+            "yaxis": {
+                "title": layout.get("yAxisTitle", ""),
+                "showgrid": True,
+                "zeroline": True,
+                "autorange": True
+            }
+        }
+
+        # 更新自定义布局
+        layout_copy = layout.copy()
+        if "xAxisTitle" in layout_copy:
+            del layout_copy["xAxisTitle"]
+        if "yAxisTitle" in layout_copy:
+            del layout_copy["yAxisTitle"]
+        self.layout.update(layout_copy)
+
+        # 创建图表
+        self.fig = go.Figure(data=self._build_traces(), layout=self.layout)
+
+        return self.fig
+
+    def _build_traces(self):
+        """按颜色分箱生成填充多边形轨迹"""
+        style = self.style
+        bins = style.get("bins", 64)
+        colorscale = style.get("colorscale") or "Viridis"
+        low, high = self.color_range
+
+        finite = np.isfinite(self.values)
+        normalized = (self.values - low) / ((high - low) or 1.0)
+        bin_index = np.clip((normalized * bins).astype(np.int64), 0, bins - 1)
+        bin_index[~finite] = -1
+        colors = ColorMap.from_colorscale(colorscale).css((np.arange(bins) + 0.5) / bins)
+
+        xs, ys = cell_polygons(*self.nodes, self.cells)
+        width = self.cells.shape[1] + 2
+        order = np.argsort(bin_index, kind="stable")
+        counts = np.bincount(bin_index[finite], minlength=bins)
+        start = np.count_nonzero(~finite)
+
+        traces = []
+        for k in range(bins):
+            if counts[k] == 0:
+                continue
+            selected = order[start:start + counts[k]]
+            start += counts[k]
+            positions = (selected[:, None] * width + np.arange(width)).ravel()
+            traces.append(go.Scatter(
+                x=xs[positions],
+                y=ys[positions],
+                mode="lines",
+                fill="toself",
+                fillcolor=colors[k],
+                line=dict(
+                    color=style.get("lineColor", colors[k]),
+                    width=style.get("lineWidth", 0)
+                ),
+                hoverinfo="skip",
+                showlegend=False,
+                name=f"bin_{k}"
+            ))
+
+        # 颜色条和可选的单元悬停信息由一个单元中心的散点轨迹提供
+        x, y = self.nodes
+        valid = np.where(self.cells < 0, self.cells[:, :1], self.cells)
+        show_hover = style.get("hover", len(self.cells) <= 100000)
+        traces.append(go.Scatter(
+            x=x[valid].mean(axis=1) if show_hover else [None],
+            y=y[valid].mean(axis=1) if show_hover else [None],
+            mode="markers",
+            marker=dict(
+                size=1,
+                opacity=0,
+                color=self.values if show_hover else [low],
+                colorscale=colorscale,
+                cmin=low,
+                cmax=high,
+                showscale=style.get("showscale", False)
+            ),
+            hovertemplate="X: %{x}<br>Y: %{y}<br>Value: %{marker.color}<extra></extra>" if show_hover else None,
+            hoverinfo=None if show_hover else "skip",
+            showlegend=False,
+            name="cells"
+        ))
+        return traces
+
+    def _rebuild(self):
+        """重新生成轨迹，保留布局"""
+        with self.fig.batch_update():
+            self.fig.data = []
+            self.fig.add_traces(self._build_traces())
+
+    def set_color_range(self, range_values):
+        """设置颜色范围
+
+        Args:
+            range_values: [min, max] 格式的列表
+        """
+        if not isinstance(range_values, list) or len(range_values) != 2:
+            print("颜色范围格式不正确")
+            return
+
+        if not self.fig:
+            print("图表未初始化")
+            return
+
+        self.color_range = list(range_values)
+        self._rebuild()
+
+    def update_color_scale(self, color_scale):
+        """更新颜色刻度
+
+        Args:
+            color_scale: 新的配色数组，格式为 [[pos, color], ...]，颜色为rgb或十六进制格式
+        """
+        if not isinstance(color_scale, list) or len(color_scale) < 2:
+            print("配色数组格式不正确，至少需要包含两个颜色点")
+            return
+
+        if not self.fig:
+            print("图表未初始化")
+            return
+
+        self.style = dict(self.style, colorscale=color_scale)
+        self._rebuild()
+
+    def apply_colormap(self, colormap, colorbar=True, **kwargs):
+        """用同一个ColorMap设置单元颜色和自定义颜色条，二者的颜色和值域一致
+
+        Args:
+            colormap: ColorMap对象
+            colorbar: 是否同时添加自定义颜色条
+            **kwargs: 其他传递给CustomColorBar的参数
+
+        Returns:
+            CustomColorBar: 创建的颜色条对象，不添加颜色条时返回None
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+
+        self.style = dict(self.style, colorscale=colormap.colorscale())
+        self.color_range = [colormap.vmin, colormap.vmax]
+        self._rebuild()
+        if colorbar:
+            return self.addCustomColorBar(colormap, **kwargs)
+        return None
+
+    def get_value_range(self):
+        """获取当前的值域范围
+
+        Returns:
+            dict: 值域范围对象，包含 zmin 和 zmax
+        """
+        if not self.fig:
+            print("网格图未初始化")
+            return None
+        return {"zmin": self.color_range[0], "zmax": self.color_range[1]}
+
+    def show(self):
+        """显示图表"""
+        if not self.fig:
+            print("图表未初始化，无法显示")
+            return
+
+        self.fig.show(config=self.config)
+
+    def addCustomColorBar(self, color_stops, **kwargs):
+        """添加自定义颜色条
+
+        Args:
+            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]，或ColorMap
+            **kwargs: 其他CustomColorBar参数
+
+        Returns:
+            CustomColorBar: 创建的颜色条对象
+        """
+        if not self.fig:
+            print("图表未初始化，无法添加颜色条")
+            return None
+
+        self.custom_colorbar = CustomColorBar(color_stops, **kwargs)
+        self.custom_colorbar.add_to_figure(self.fig)
+
+        print(f"已添加自定义颜色条，包含 {len(color_stops)} 个颜色停止点")
+
+        return self.custom_colorbar
+
+    def save_figure(self, filename, format="png"):
+        """保存图表为图片
+
+        Args:
+            filename: 保存的文件名
+            format: 图片格式，默认为png
+        """
+        if not self.fig:
+            print("图表未初始化，无法保存")
+            return False
+
+        try:
+            self.fig.write_image(
+                filename,
+                format=format,
+                engine="kaleido",
+                width=1800,
+                height=600
+            )
+            print(f"成功保存图表到 {filename}")
+            return True
+        except Exception as e:
+            print(f"保存图表时出错: {e}")
+            try:
+                # 尝试保存为HTML作为备份
+                html_file = filename.replace(f".{format}", ".html")
+                self.fig.write_html(html_file)
+                print(f"已保存为HTML格式: {html_file}")
+            except Exception as html_err:
+                print(f"保存HTML时也出错: {html_err}")
+            return False
+
+    def save_as_html(self, filename):
+        """保存图表为HTML
+
+        Args:
+            filename: 保存的文件名
+        """
+        if not self.fig:
+            print("图表未初始化，无法保存")
+            return False
+
+        try:
+            self.fig.write_html(filename)
+            print(f"成功保存图表到 {filename}")
+            return True
+        except Exception as e:
+            print(f"保存HTML时出错: {e}")
+            return False
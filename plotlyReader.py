@@ -0,0 +1,540 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from plotlySurvey import ELECTRODE_COLUMNS, pseudosection
+
+# 数值行允许出现的字符，含其他字符的行（表头、块标题、注释）被跳过；
+# 另外允许表示无数据的nan（不区分大小写），检查前先去掉
+_NUMERIC = b"0123456789.eE+- \t\r\n,;"
+_NUMERIC_TABLE = np.zeros(256, dtype=bool)
+_NUMERIC_TABLE[np.frombuffer(_NUMERIC, dtype=np.uint8)] = True
+_SEPARATORS = bytes.maketrans(b"\t\r,;", b"    ")
+CHUNK_SIZE = 16 * 2 ** 20
+
+
+def _line_spans(buf):
+    """返回每一行的起止位置（结束位置包含换行符）"""
+    newlines = np.flatnonzero(buf == 10)
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines + 1, [len(buf)]])
+    return starts, ends
+
+
+def _keep_lines(chunk, keep):
+    """按行掩码拼接保留的行"""
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    starts, ends = _line_spans(buf)
+    # 连续保留的行合并为一个片段，减少拼接次数
+    edge = np.diff(keep.view(np.int8), prepend=0, append=0)
+    first = np.flatnonzero(edge == 1)
+    last = np.flatnonzero(edge == -1) - 1
+    return b"".join(chunk[s:e] for s, e in zip(starts[first].tolist(), ends[last].tolist()))
+
+
+def _without_nan(text):
+    """把nan标记替换为等长的空格，用于检查字符，不改变行的位置"""
+    if b"n" not in text and b"N" not in text:
+        return text
+    return text.lower().replace(b"nan", b"   ")
+
+
+def _numeric_lines(chunk):
+    """去掉含非数值字符的行，整块都是数值时直接返回"""
+    checked = _without_nan(chunk)
+    if not checked.translate(None, _NUMERIC):
+        return chunk
+    buf = np.frombuffer(checked, dtype=np.uint8)
+    starts, _ = _line_spans(buf)
+    bad = np.flatnonzero(~_NUMERIC_TABLE[buf])
+    keep = np.ones(len(starts), dtype=bool)
+    keep[np.searchsorted(starts, bad, side="right") - 1] = False
+    return _keep_lines(chunk, keep)
+
+
+def _tokens_per_line(chunk):
+    """每一行的数值个数"""
+    buf = np.frombuffer(chunk.translate(_SEPARATORS), dtype=np.uint8)
+    starts, _ = _line_spans(buf)
+    token = (buf != 32) & (buf != 10)
+    begin = np.flatnonzero(token & ~np.concatenate([[False], token[:-1]]))
+    return np.bincount(np.searchsorted(starts, begin, side="right") - 1, minlength=len(starts))
+
+
+def _uniform_lines(text, ncols):
+    """快速检查每一行是否都恰好有ncols个数值（text中的分隔符已替换为空格）
+
+    第i组ncols个数值的起点都在第i个换行符之前、第i+1组的起点都在它之后时，每行的数值个数都是ncols；
+    有空行时返回False，由调用方逐行统计
+    """
+    buf = np.frombuffer(text, dtype=np.uint8)
+    if not len(buf):
+        return True
+    token = (buf != 32) & (buf != 10)
+    begin = np.flatnonzero(token[1:] & ~token[:-1]) + 1
+    if token[0]:
+        begin = np.concatenate([[0], begin])
+    newlines = np.flatnonzero(buf == 10)
+    if buf[-1] != 10:
+        newlines = np.append(newlines, len(buf))
+    if len(begin) != ncols * len(newlines):
+        return False
+    return bool((begin[ncols - 1::ncols] < newlines).all() and (begin[ncols::ncols] > newlines[:-1]).all())
+
+
+def _parse(chunk, ncols):
+    """把数值行解析为 (行数, ncols) 的数组，列数不同的行（如块内的行列数说明）被跳过
+
+    总数值个数恰好是ncols的倍数时也可能混有这样的行，所以总是逐行检查数值个数
+    """
+    text = chunk.translate(_SEPARATORS)
+    if not _uniform_lines(text, ncols):
+        counts = _tokens_per_line(chunk)
+        text = _keep_lines(chunk, counts == ncols).translate(_SEPARATORS)
+    values = np.fromstring(text.decode("ascii"), sep=" ")
+    return values.reshape(-1, ncols)
+
+
+def _column_count(filename):
+    """第一个至少包含3个数值的行的数值个数"""
+    with open(filename, "rb") as f:
+        for line in f:
+            if _without_nan(line).translate(None, _NUMERIC):
+                continue
+            count = len(line.translate(_SEPARATORS).split())
+            if count >= 3:
+                return count
+    return 0
+
+
+def _line_count(filename, chunk_size):
+    """统计行数，作为数据行数的上限用于预分配"""
+    count = 1
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return count
+            count += chunk.count(b"\n")
+
+
+def read_columns(filename, columns=(0, 1, 2), out=None, chunk_size=CHUNK_SIZE):
+    """分块流式读取文本数值文件中的指定列
+
+    跳过表头、块标题等含非数值字符的行和数值个数不同的行（如块内的行列数说明），nan表示无数据；
+    每块解析后直接写入预分配的数组，内存中只保留一个块的文本
+
+    Args:
+        filename: 文件名
+        columns: 要读取的列号
+        out: 内存映射文件名，为None时写入内存数组
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        np.ndarray: (len(columns), 行数) 的数组，每一列连续存放
+    """
+    ncols = _column_count(filename)
+    if ncols <= max(columns):
+        raise ValueError(f"数据列数 {ncols} 不足，无法读取第 {max(columns)} 列")
+
+    capacity = _line_count(filename, chunk_size)
+    shape = (len(columns), capacity)
+    if out is None:
+        result = np.empty(shape)
+    else:
+        result = np.memmap(out, dtype=np.float64, mode="w+", shape=shape)
+
+    rows = 0
+    rest = b""
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                # 在最后一个换行符处截断，剩余部分拼到下一块
+                rest += chunk
+                cut = rest.rfind(b"\n") + 1
+                if not cut:
+                    continue
+                text, rest = rest[:cut], rest[cut:]
+            else:
+                text, rest = rest, b""
+                if not text:
+                    break
+            block = _parse(_numeric_lines(text), ncols)
+            result[:, rows:rows + len(block)] = block[:, list(columns)].T
+            rows += len(block)
+            if not chunk:
+                break
+
+    if out is not None:
+        result.flush()
+    return result[:, :rows]
+
+
+def _regular_grid(fast, slow, values):
+    """检查数据是否按行连续存放（fast轴变化最快），是则直接重排为二维数组，不复制数据"""
+    count = len(values)
+    changes = np.flatnonzero(slow[1:] != slow[:-1])
+    period = int(changes[0]) + 1 if changes.size else count
+    if period < 2 or count % period:
+        return None
+    fast_rows = fast.reshape(-1, period)
+    slow_rows = slow.reshape(-1, period)
+    fast_axis = fast_rows[0]
+    slow_axis = slow_rows[:, 0]
+    if not ((fast_rows == fast_axis).all() and (slow_rows == slow_axis[:, None]).all()):
+        return None
+    for axis in (fast_axis, slow_axis):
+        steps = np.diff(axis)
+        if len(axis) > 1 and not ((steps > 0).all() or (steps < 0).all()):
+            return None
+    return fast_axis, slow_axis, values.reshape(-1, period)
+
+
+def detect_grid(x, y, v, nodata=None):
+    """根据坐标识别网格布局，生成等值线图数据
+
+    按x变化最快或y变化最快的规则网格直接重排；其他情况按唯一坐标放置，缺失的位置为NaN
+
+    Args:
+        x: 每个数据点的x坐标
+        y: 每个数据点的y坐标
+        v: 每个数据点的值
+        nodata: 表示无数据的值，替换为NaN
+
+    Returns:
+        dict: {x, y, z, zmin, zmax}，可直接作为PlotlyContourChart.init的data
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    v = np.asarray(v, dtype=float)
+    if nodata is not None:
+        v = np.where(v == nodata, np.nan, v)
+
+    grid = _regular_grid(x, y, v)
+    if grid is not None:
+        x_axis, y_axis, z = grid
+    else:
+        grid = _regular_grid(y, x, v)
+        if grid is not None:
+            y_axis, x_axis, z = grid
+            z = z.T
+        else:
+            x_axis, column = np.unique(x, return_inverse=True)
+            y_axis, row = np.unique(y, return_inverse=True)
+            z = np.full((len(y_axis), len(x_axis)), np.nan)
+            z[row, column] = v
+
+    # nanmin/nanmax逐元素归约，不复制内存映射中的数据
+    has_data = not np.isnan(z).all()
+    return {
+        "x": x_axis,
+        "y": y_axis,
+        "z": z,
+        "zmin": float(np.nanmin(z)) if has_data else None,
+        "zmax": float(np.nanmax(z)) if has_data else None
+    }
+
+
+def read_model_dat(filename, columns=(0, 1, 2), nodata=None, out=None, chunk_size=CHUNK_SIZE):
+    """读取反演模型.dat文件为等值线图数据
+
+    Args:
+        filename: 文件名
+        columns: x、y、值所在的列号
+        nodata: 表示无数据的值
+        out: 内存映射文件名，大文件可以不占用内存
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        dict: {x, y, z, zmin, zmax}，读取失败时返回None
+    """
+    if not os.path.exists(filename):
+        print(f"文件不存在: {filename}")
+        return None
+
+    try:
+        x, y, v = read_columns(filename, columns, out=out, chunk_size=chunk_size)
+    except Exception as e:
+        print(f"读取模型文件时出错: {e}")
+        return None
+
+    if len(v) == 0:
+        print(f"文件中没有数据: {filename}")
+        return None
+    return detect_grid(x, y, v, nodata)
+
+
+# 散点图使用的列，读取Parquet时只读取这些列
+SCATTER_COLUMNS = ("id", "x", "y", "v", "visible", "a", "b", "m", "n", "row", "pseu")
+
+
+def read_parquet(path, columns=None):
+    """读取Parquet文件，只读取需要的列
+
+    Args:
+        path: Parquet文件路径
+        columns: 需要的列，文件中不存在的列被忽略；为None时读取所有列
+
+    Returns:
+        pd.DataFrame: 读取的数据
+    """
+    if columns is not None:
+        try:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(path).names)
+            columns = [column for column in columns if column in available]
+        except ImportError:  # 没有pyarrow时由pandas选择的引擎处理列投影
+            pass
+    return pd.read_parquet(path, columns=columns)
+
+
+def frame_columns(frame, columns=None):
+    """把DataFrame转换为列式数据，数值列直接使用底层的NumPy数组，不转换为列表
+
+    Args:
+        frame: pandas DataFrame
+        columns: 需要的列，为None时使用所有列
+
+    Returns:
+        dict: {列名: NumPy数组}
+    """
+    names = frame.columns if columns is None else [column for column in columns if column in frame.columns]
+    return {str(name): frame[name].to_numpy() for name in names}
+
+
+def _is_parquet_path(data):
+    return isinstance(data, (str, os.PathLike))
+
+
+def as_scatter_data(data):
+    """把散点图的输入转换为列式数据
+
+    Args:
+        data: 列式字典、DataFrame（每列一个属性）或Parquet文件路径
+
+    Returns:
+        dict: 列式数据，读取失败时返回None
+    """
+    if _is_parquet_path(data):
+        try:
+            data = read_parquet(data, SCATTER_COLUMNS)
+        except Exception as e:
+            print(f"读取Parquet文件时出错: {e}")
+            return None
+    if isinstance(data, pd.DataFrame):
+        return frame_columns(data, SCATTER_COLUMNS)
+    return data
+
+
+def as_contour_data(data, x="x", y="y", z="z"):
+    """把等值线图的输入转换为网格数据
+
+    DataFrame和Parquet为长格式（每行一个网格点），用detect_grid向量化转换为二维网格
+
+    Args:
+        data: 网格字典 {x, y, z}、长格式DataFrame或Parquet文件路径
+        x: x坐标列名
+        y: y坐标列名
+        z: 值列名
+
+    Returns:
+        dict: {x, y, z, zmin, zmax}，读取失败时返回None
+    """
+    if _is_parquet_path(data):
+        try:
+            data = read_parquet(data, [x, y, z])
+        except Exception as e:
+            print(f"读取Parquet文件时出错: {e}")
+            return None
+    if isinstance(data, pd.DataFrame):
+        if not all(column in data.columns for column in (x, y, z)):
+            print(f"DataFrame缺少 {x}、{y}、{z} 列")
+            return None
+        return detect_grid(data[x].to_numpy(), data[y].to_numpy(), data[z].to_numpy())
+    return data
+
+
+# 仪器导出文件中常见的列名（小写、去掉空格），键为导入后的列名
+INSTRUMENT_COLUMNS = {
+    "id": ("id", "no", "no.", "index"),
+    "a": ("a", "c1", "ca", "a(electrode)"),
+    "b": ("b", "c2", "cb", "b(electrode)"),
+    "m": ("m", "p1", "pm", "m(electrode)"),
+    "n": ("n", "p2", "pn", "n(electrode)"),
+    "current": ("i", "i(ma)", "current", "current(ma)", "in"),
+    "voltage": ("v", "u", "vp", "v(mv)", "u(mv)", "voltage", "voltage(mv)"),
+    "error": ("err", "error", "dev", "std", "error(%)", "dev(%)"),
+    "rho": ("rho", "rhoa", "app.res", "resistivity", "rho(ohm.m)"),
+}
+
+
+def _instrument_header(filename):
+    """找到列名行，返回 (列名列表, 分隔符, 数据起始字节位置)"""
+    with open(filename, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return None, None, None
+            text = line.decode("utf-8", errors="replace").strip()
+            if not text or text.startswith("#"):
+                continue
+            for sep in (",", ";", "\t"):
+                if sep in text:
+                    break
+            else:
+                sep = r"\s+"
+            names = [name.strip().strip('"') for name in (text.split() if sep == r"\s+" else text.split(sep))]
+            return names, sep, f.tell()
+
+
+def _match_columns(names, columns=None):
+    """把仪器列映射到导入后的列，返回 {导入列名: 仪器列序号}
+
+    columns中指定的映射（列名或列序号）优先，其余按INSTRUMENT_COLUMNS中的常见列名匹配
+    """
+    lowered = [name.lower().replace(" ", "") for name in names]
+    mapping = {}
+    for key, candidates in INSTRUMENT_COLUMNS.items():
+        for candidate in candidates:
+            if candidate in lowered:
+                mapping[key] = lowered.index(candidate)
+                break
+    for key, column in (columns or {}).items():
+        mapping[key] = column if isinstance(column, int) else names.index(column)
+    return mapping
+
+
+def _chunk_ranges(filename, start, chunk_size):
+    """按字节把文件切分为若干块，每块在换行符处结束"""
+    size = os.path.getsize(filename)
+    ranges = []
+    with open(filename, "rb") as f:
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_instrument_chunk(task):
+    """解析文件中的一块，返回 {导入列名: 数组}
+
+    在工作进程中执行，只传递文件名和字节范围，避免在进程间传递文本
+    """
+    filename, start, end, sep, mapping = task
+    with open(filename, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start)
+    keys = list(mapping)
+    options = dict(sep=sep, header=None, usecols=[mapping[key] for key in keys], engine="c",
+                   skip_blank_lines=True, comment="#", on_bad_lines="skip")
+    dtypes = {mapping[key]: (str if key == "id" else np.float64) for key in keys}
+    try:
+        frame = pd.read_csv(io.BytesIO(text), dtype=dtypes, **options)
+    except ValueError:
+        # 块内有重复的列名行等非数值内容，按文本读取后逐列转换
+        frame = pd.read_csv(io.BytesIO(text), dtype=str, **options)
+    result = {}
+    for key in keys:
+        column = frame[mapping[key]]
+        result[key] = column.to_numpy(dtype=object) if key == "id" else pd.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+    # 重复的列名行等无法解析的行没有电极编号
+    valid = np.isfinite(result["a"]) & np.isfinite(result["m"])
+    return {key: values[valid] for key, values in result.items()}
+
+
+def read_instrument(filename, columns=None, spacing=1.0, coordinates=None, processes=None,
+                    chunk_size=CHUNK_SIZE, **kwargs):
+    """分块导入仪器导出的测量数据（每行一个四极），生成散点图的列式数据
+
+    文件按字节范围切块，由多个进程并行解析，结果直接写入按行数预分配的数组；
+    有电压和电流列时按电极位置计算视电阻率，否则使用rho列
+
+    Args:
+        filename: CSV或空白分隔的文本文件，第一行非注释行为列名
+        columns: 列映射 {导入列名: 仪器列名或列序号}，导入列名为id、a、b、m、n、current、voltage、error、rho
+        spacing: 电极间距
+        coordinates: 电极坐标表，格式见electrode_table
+        processes: 进程数量，默认为CPU核心数
+        chunk_size: 每块的字节数
+        **kwargs: 其他传递给pseudosection的参数
+
+    Returns:
+        dict: {id, x, y, v, a, b, m, n, row, pseu, ...}，可直接作为PlotlyScatterChart.init的data；
+            读取失败时返回None
+    """
+    if not os.path.exists(filename):
+        print(f"文件不存在: {filename}")
+        return None
+
+    names, sep, start = _instrument_header(filename)
+    if names is None:
+        print(f"文件中没有列名行: {filename}")
+        return None
+    try:
+        mapping = _match_columns(names, columns)
+    except ValueError as e:
+        print(f"列映射不正确: {e}")
+        return None
+    missing = [key for key in ("a", "m") if key not in mapping]
+    if missing or not ({"voltage", "current"} <= set(mapping) or "rho" in mapping):
+        print(f"缺少必要的列: {missing or ['voltage/current 或 rho']}")
+        return None
+
+    # 行数是数据行数的上限，数值列按上限预分配，最后截取实际行数
+    capacity = _line_count(filename, chunk_size)
+    arrays = {key: np.empty(capacity) for key in mapping if key != "id"}
+    ids = []
+    rows = 0
+
+    tasks = [(filename, s, e, sep, mapping) for s, e in _chunk_ranges(filename, start, chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    executor = None
+    try:
+        if processes == 1 or len(tasks) == 1:
+            results = map(_parse_instrument_chunk, tasks)
+        else:
+            executor = ProcessPoolExecutor(max_workers=processes)
+            results = executor.map(_parse_instrument_chunk, tasks)
+        for block in results:
+            count = len(block["a"])
+            for key, values in arrays.items():
+                values[rows:rows + count] = block[key]
+            if "id" in block:
+                ids.append(block["id"])
+            rows += count
+    except Exception as e:
+        print(f"导入测量数据时出错: {e}")
+        return None
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    data = {key: values[:rows] for key, values in arrays.items()}
+    for key in ELECTRODE_COLUMNS:
+        # 没有无穷远电极的列保存为整数
+        if key in data and np.isfinite(data[key]).all():
+            data[key] = data[key].astype(np.int64)
+    data["row"] = np.arange(1, rows + 1)
+    data["id"] = np.concatenate(ids) if ids else data["row"].copy()
+
+    if {"voltage", "current"} <= set(data):
+        data = pseudosection(data, spacing=spacing, coordinates=coordinates,
+                             voltage_key="voltage", current_key="current", **kwargs)
+    else:
+        data = pseudosection(data, spacing=spacing, coordinates=coordinates, **kwargs)
+        data["v"] = data["rho"]
+    data["pseu"] = data["v"]
+
+    finite = data["v"][np.isfinite(data["v"])]
+    data["zmin"] = float(finite.min()) if finite.size else None
+    data["zmax"] = float(finite.max()) if finite.size else None
+    return data
@@ -0,0 +1,578 @@
+import numpy as np
+
+from plotlyIsoline import extract_isolines
+
+# 自动生成的区域多边形的默认样式，与plotlyContourShape.json中的多边形样式格式一致
+DEFAULT_REGION_STYLE = {
+    "lineStyle": {"color": "#000000", "width": 1, "type": "solid", "opacity": 100},
+    "fillStyle": {"type": "solid", "bgcolor": "rgba(184,46,46,0.3)", "opacity": 1},
+    "marker": {"color": "#000000", "size": 0, "symbol": "solid", "opacity": 0},
+    "text": {"color": "#000000", "size": 12, "fontFamily": "SimSun", "show": False}
+}
+
+
+def _runs(mask):
+    """按行提取掩码中连续为True的游程
+
+    Returns:
+        tuple: (行号, 起始列, 结束列)，结束列不包含在游程内，按行、列排序
+    """
+    ny, nx = mask.shape
+    padded = np.zeros((ny, nx + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    change = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(change == 1)
+    _, ends = np.nonzero(change == -1)
+    return rows, starts, ends
+
+
+def _connected_runs(rows, starts, ends, nx, connectivity):
+    """求相邻行中相互接触的游程对"""
+    # 行步长比列数多2，使相邻两行的游程在全局坐标中不会首尾相接
+    stride = nx + 2
+    global_starts = rows * stride + starts
+    global_ends = rows * stride + ends
+    reach = 1 if connectivity == 8 else 0
+
+    base = (rows - 1) * stride
+    lo = np.searchsorted(global_ends, base + starts - reach, side="right")
+    hi = np.searchsorted(global_starts, base + ends + reach, side="left")
+    counts = np.maximum(hi - lo, 0)
+    counts[rows == 0] = 0
+
+    current = np.repeat(np.arange(len(rows)), counts)
+    # 每个游程的相接游程在上一行中是连续的一段
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    previous = np.repeat(lo, counts) + offsets
+    return current, previous
+
+
+def _union(count, u, v):
+    """在游程图上求连通分量：根节点挂接加指针跳跃，全部为数组运算
+
+    Returns:
+        np.ndarray: 每个游程的根节点编号
+    """
+    parent = np.arange(count)
+    while True:
+        pu = parent[u]
+        pv = parent[v]
+        differ = pu != pv
+        if not differ.any():
+            return parent
+        pu, pv = pu[differ], pv[differ]
+        low = np.minimum(pu, pv)
+        np.minimum.at(parent, pu, low)
+        np.minimum.at(parent, pv, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+
+def label_regions(mask, connectivity=4):
+    """连通区域标记，基于行游程的并查集，不逐像素遍历
+
+    Args:
+        mask: 二维布尔数组
+        connectivity: 连通方式，4或8
+
+    Returns:
+        tuple: (标记数组, 区域数量, 游程信息)，标记数组中0为背景，区域从1开始编号；
+            游程信息为 (行号, 起始列, 结束列, 游程所属区域)
+    """
+    mask = np.asarray(mask, dtype=bool)
+    ny, nx = mask.shape
+    rows, starts, ends = _runs(mask)
+    labels = np.zeros((ny, nx), dtype=np.int32)
+    if len(rows) == 0:
+        return labels, 0, (rows, starts, ends, np.zeros(0, dtype=np.int32))
+
+    current, previous = _connected_runs(rows, starts, ends, nx, connectivity)
+    roots = _union(len(rows), current, previous)
+    _, run_labels = np.unique(roots, return_inverse=True)
+    run_labels = (run_labels + 1).astype(np.int32)
+
+    # 按游程批量写入标记数组
+    lengths = ends - starts
+    flat_starts = rows * nx + starts
+    positions = np.repeat(flat_starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    labels.ravel()[positions] = np.repeat(run_labels, lengths)
+    return labels, int(run_labels.max()), (rows, starts, ends, run_labels)
+
+
+def _cell_sizes(axis):
+    """根据网格轴坐标计算每个网格单元的宽度"""
+    axis = np.asarray(axis, dtype=float)
+    if len(axis) < 2:
+        return np.ones(len(axis))
+    return np.abs(np.gradient(axis))
+
+
+def region_statistics(z, runs, count, x=None, y=None):
+    """按游程计算每个区域的网格数、面积、平均值和最大值
+
+    Args:
+        z: 二维网格数据
+        runs: label_regions返回的游程信息
+        count: 区域数量
+        x: x轴坐标，用于计算面积，为None时每个网格的面积为1
+        y: y轴坐标
+
+    Returns:
+        dict: {cells, area, mean, max}，每项为长度count的数组，下标0对应区域1
+    """
+    z = np.asarray(z, dtype=float)
+    ny, nx = z.shape
+    rows, starts, ends, run_labels = runs
+    index = run_labels - 1
+    flat = z.ravel()
+    flat_starts = rows * nx + starts
+    flat_ends = rows * nx + ends
+
+    # NaN网格（空白、白化）不参与平均值和最大值，单独统计有效网格数，避免NaN传播到后面所有游程
+    finite = np.isfinite(flat)
+    prefix = np.concatenate([[0.0], np.cumsum(np.where(finite, flat, 0.0))])
+    run_sums = prefix[flat_ends] - prefix[flat_starts]
+    finite_prefix = np.concatenate([[0], np.cumsum(finite)])
+    run_finite = finite_prefix[flat_ends] - finite_prefix[flat_starts]
+
+    bounds = np.stack([flat_starts, flat_ends], axis=1).ravel()
+    if bounds[-1] == len(flat):
+        bounds = bounds[:-1]
+    run_max = np.fmax.reduceat(flat, bounds)[::2]
+
+    widths = np.ones(nx) if x is None else _cell_sizes(x)
+    heights = np.ones(ny) if y is None else _cell_sizes(y)
+    width_prefix = np.concatenate([[0.0], np.cumsum(widths)])
+    run_areas = heights[rows] * (width_prefix[ends] - width_prefix[starts])
+
+    cells = np.bincount(index, weights=ends - starts, minlength=count)
+    sums = np.bincount(index, weights=run_sums, minlength=count)
+    valid = np.bincount(index, weights=run_finite, minlength=count)
+    maxima = np.full(count, np.nan)
+    np.fmax.at(maxima, index, run_max)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid > 0, sums / valid, np.nan)
+    return {
+        "cells": cells.astype(np.int64),
+        "area": np.bincount(index, weights=run_areas, minlength=count),
+        "mean": mean,
+        "max": maxima
+    }
+
+
+def region_boundaries(labels, region_ids, x=None, y=None, connectivity=4):
+    """追踪区域的外边界
+
+    在掩码的0.5等值线上运行marching squares，每个闭合环按其起点所在的网格边归属到区域，
+    每个区域取包围面积最大的环作为外边界，内部的洞不输出
+
+    Args:
+        labels: label_regions返回的标记数组
+        region_ids: 需要追踪边界的区域编号
+        x: x轴坐标，为None时使用列号
+        y: y轴坐标，为None时使用行号
+        connectivity: 连通方式，与标记时一致
+
+    Returns:
+        dict: {区域编号: (xs, ys)}，坐标为闭合折线
+    """
+    ny, nx = labels.shape
+    keep = np.zeros(int(labels.max()) + 1, dtype=bool)
+    keep[np.asarray(region_ids, dtype=np.int64)] = True
+    keep[0] = False
+
+    padded = np.zeros((ny + 2, nx + 2), dtype=np.int32)
+    padded[1:-1, 1:-1] = np.where(keep[labels], labels, 0)
+    # 对角相接的鞍点单元中心值为0.5，8连通时把中心算作区域内部，4连通时算作外部
+    level = 0.5 if connectivity == 8 else 0.5 + 1e-9
+    loops = extract_isolines(None, None, (padded > 0).astype(float), levels=[level])[level]
+
+    x_axis = np.arange(nx, dtype=float) if x is None else np.asarray(x, dtype=float)
+    y_axis = np.arange(ny, dtype=float) if y is None else np.asarray(y, dtype=float)
+    boundaries = {}
+    best_area = {}
+    for xs, ys in loops:
+        px, py = xs[0], ys[0]
+        # 起点位于两个相邻网格中心之间，其中一个属于该区域
+        if px != int(px):
+            candidates = padded[int(py), int(px)], padded[int(py), int(px) + 1]
+        else:
+            candidates = padded[int(py), int(px)], padded[int(py) + 1, int(px)]
+        region = max(candidates)
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        area = abs(np.dot(xs[:-1], ys[1:]) - np.dot(xs[1:], ys[:-1])) / 2
+        if area > best_area.get(region, -1):
+            best_area[region] = area
+            boundaries[region] = (
+                np.interp(xs - 1, np.arange(nx), x_axis),
+                np.interp(ys - 1, np.arange(ny), y_axis)
+            )
+    return boundaries
+
+
+def threshold_regions(x, y, z, threshold=None, level_range=None, below=False, min_cells=10,
+                      connectivity=4, style=None, name="区域"):
+    """检测超过阈值（或位于数值范围内）的连通区域并生成多边形形状
+
+    Args:
+        x: x轴坐标
+        y: y轴坐标
+        z: 二维网格数据
+        threshold: 阈值，默认检测不低于阈值的区域
+        level_range: [最小值, 最大值]，指定后检测位于范围内的区域
+        below: 为True时检测不高于阈值的区域
+        min_cells: 区域的最少网格数，更小的区域被忽略
+        connectivity: 连通方式，4或8
+        style: 多边形样式，默认使用DEFAULT_REGION_STYLE
+        name: 区域名称前缀
+
+    Returns:
+        tuple: (多边形形状列表, 标记数组)，形状格式与initShape一致，另含cells、area、mean、max
+    """
+    z = np.asarray(z, dtype=float)
+    with np.errstate(invalid="ignore"):
+        if level_range is not None:
+            mask = (z >= level_range[0]) & (z <= level_range[1])
+        elif threshold is None:
+            raise ValueError("必须指定threshold或level_range")
+        elif below:
+            mask = z <= threshold
+        else:
+            mask = z >= threshold
+
+    labels, count, runs = label_regions(mask, connectivity)
+    if count == 0:
+        return [], labels
+
+    stats = region_statistics(z, runs, count, x, y)
+    region_ids = np.flatnonzero(stats["cells"] >= min_cells) + 1
+    boundaries = region_boundaries(labels, region_ids, x, y, connectivity)
+
+    shapes = []
+    for region in region_ids.tolist():
+        if region not in boundaries:
+            continue
+        xs, ys = boundaries[region]
+        k = region - 1
+        area = float(stats["area"][k])
+        mean = float(stats["mean"][k])
+        maximum = float(stats["max"][k])
+        shape_name = f"{name}{len(shapes) + 1}"
+        shapes.append({
+            "id": f"{name}_{region}",
+            "type": "polygon",
+            "name": shape_name,
+            "points": [{"x": px, "y": py} for px, py in zip(xs.tolist(), ys.tolist())],
+            "note": f"面积: {area:.4g}<br>平均值: {mean:.4g}<br>最大值: {maximum:.4g}",
+            "style": style or DEFAULT_REGION_STYLE,
+            "label": region,
+            "cells": int(stats["cells"][k]),
+            "area": area,
+            "mean": mean,
+            "max": maximum
+        })
+    return shapes, labels
+
+
+def polygon_vertices(points):
+    """把顶点转换为坐标数组
+
+    只有由两个数值序列组成的元组才按 (xs, ys) 处理，其他序列（包括缓存中只读的顶点字典序列）按 [{x, y}, ...] 处理
+
+    Args:
+        points: 顶点 [{x, y}, ...] 或 (xs, ys)
+
+    Returns:
+        tuple: (xs, ys) 浮点数组
+    """
+    if isinstance(points, tuple) and len(points) == 2 and not any(
+            isinstance(values, (dict, str)) or np.ndim(values) != 1 for values in points):
+        xs, ys = (np.asarray(values, dtype=float) for values in points)
+        return xs, ys
+    xs = np.array([p.get("x") for p in points], dtype=float)
+    ys = np.array([p.get("y") for p in points], dtype=float)
+    return xs, ys
+
+
+def rasterize_polygon(x, y, points, tolerance=0.0):
+    """扫描线栅格化多边形，返回网格中心（网格节点）落在多边形内的网格
+
+    对每一行一次性求出与所有边的交点，排序后按奇偶规则取交点之间的列范围，
+    计算量与多边形顶点数乘以行数加上内部网格数成正比
+
+    Args:
+        x: 升序的x轴坐标
+        y: y轴坐标
+        points: 多边形顶点 [{x, y}, ...] 或 (xs, ys)
+        tolerance: 边界容差，恰好落在边界上（或在容差内）的网格也算在多边形内
+
+    Returns:
+        np.ndarray: 多边形内网格的一维索引 (行号 * 列数 + 列号)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    px, py = polygon_vertices(points)
+    if len(px) < 3:
+        return np.zeros(0, dtype=np.int64)
+
+    x0, y0 = px, py
+    x1, y1 = np.roll(px, -1), np.roll(py, -1)
+    y_min, y_max = py.min(), py.max()
+    rows = np.flatnonzero((y >= y_min - tolerance) & (y <= y_max + tolerance))
+    if rows.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    yj = y[rows][:, None]
+    if tolerance > 0:
+        # 把位于上下边界上的行移入多边形内部少许，使其与两侧的边相交
+        inset = (y_max - y_min) * 1e-9
+        yj = np.clip(yj, y_min + inset, y_max - inset)
+    crosses = (y0 <= yj) != (y1 <= yj)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xs = np.where(crosses, x0 + (yj - y0) * (x1 - x0) / (y1 - y0), np.nan)
+    xs.sort(axis=1)
+
+    # 奇偶规则：每行的第1、2个交点之间，第3、4个交点之间……为内部
+    pairs = xs.shape[1] // 2
+    left = xs[:, 0:2 * pairs:2]
+    right = xs[:, 1:2 * pairs:2]
+    valid = np.isfinite(left) & np.isfinite(right)
+    row_index = np.broadcast_to(rows[:, None], left.shape)[valid]
+    starts = np.searchsorted(x, left[valid] - tolerance, side="left")
+    ends = np.searchsorted(x, right[valid] + tolerance, side="right")
+    lengths = np.maximum(ends - starts, 0)
+
+    flat_starts = row_index * len(x) + starts
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(flat_starts, lengths) + offsets
+
+
+def polygon_mask(x, y, points, tolerance=0.0):
+    """计算网格节点是否位于多边形内的二维掩码
+
+    Args:
+        x: x轴坐标，可以是降序
+        y: y轴坐标
+        points: 多边形顶点 [{x, y}, ...] 或 (xs, ys)
+        tolerance: 边界容差
+
+    Returns:
+        np.ndarray: 形状为 (len(y), len(x)) 的布尔数组
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    reversed_x = len(x) > 1 and x[0] > x[-1]
+    cells = rasterize_polygon(x[::-1] if reversed_x else x, y, points, tolerance)
+    mask = np.zeros(len(y) * len(x), dtype=bool)
+    mask[cells] = True
+    mask = mask.reshape(len(y), len(x))
+    return mask[:, ::-1] if reversed_x else mask
+
+
+class ZonalStatistics:
+    """
+    多边形分区统计
+    每个网格几何只栅格化一次，保存各多边形覆盖的网格索引（允许多边形相互重叠），
+    所有多边形的统计量在一次bincount中完成，修改某个多边形时只重新栅格化该多边形
+    """
+
+    def __init__(self, x, y):
+        """
+        初始化分区统计
+
+        参数:
+            x: x轴坐标
+            y: y轴坐标
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        # 扫描线需要升序的x轴，降序时在翻转后的轴上栅格化再换算列号
+        self._x_reversed = len(x) > 1 and x[0] > x[-1]
+        self.x = x[::-1] if self._x_reversed else x
+        self.y = y
+        self.cell_area = np.outer(_cell_sizes(y), _cell_sizes(x)).ravel()
+        self.members = {}
+        self._points = {}
+
+    def set_shape(self, shape_id, points):
+        """加入或更新一个多边形，顶点未改变时不重新栅格化
+
+        Args:
+            shape_id: 形状id
+            points: 多边形顶点 [{x, y}, ...]
+
+        Returns:
+            bool: 是否重新栅格化
+        """
+        key = tuple((p.get("x"), p.get("y")) for p in points)
+        if self._points.get(shape_id) == key:
+            return False
+        cells = rasterize_polygon(self.x, self.y, points)
+        if self._x_reversed:
+            nx = len(self.x)
+            cells = cells // nx * nx + (nx - 1 - cells % nx)
+        self.members[shape_id] = cells
+        self._points[shape_id] = key
+        return True
+
+    def remove_shape(self, shape_id):
+        """删除多边形"""
+        self.members.pop(shape_id, None)
+        self._points.pop(shape_id, None)
+
+    def compute(self, z, threshold=None, shape_ids=None):
+        """计算多边形内的统计量
+
+        Args:
+            z: 二维网格数据，NaN网格不参与统计
+            threshold: 计算体积的阈值，体积为高于阈值部分 (z - threshold) 与面积乘积之和
+            shape_ids: 需要统计的形状id，默认全部
+
+        Returns:
+            dict: {形状id: {cells, min, max, mean, area, volume}}，没有有效网格时数值为None
+        """
+        shape_ids = list(self.members) if shape_ids is None else [i for i in shape_ids if i in self.members]
+        if not shape_ids:
+            return {}
+
+        flat = np.asarray(z, dtype=float).ravel()
+        cells = np.concatenate([self.members[i] for i in shape_ids])
+        codes = np.repeat(np.arange(len(shape_ids)), [len(self.members[i]) for i in shape_ids])
+        values = flat[cells]
+        finite = np.isfinite(values)
+        cells, codes, values = cells[finite], codes[finite], values[finite]
+        areas = self.cell_area[cells]
+
+        count = len(shape_ids)
+        counts = np.bincount(codes, minlength=count)
+        sums = np.bincount(codes, weights=values, minlength=count)
+        area = np.bincount(codes, weights=areas, minlength=count)
+        volume = None
+        if threshold is not None:
+            volume = np.bincount(codes, weights=np.maximum(values - threshold, 0) * areas, minlength=count)
+        minimum = np.full(count, np.inf)
+        maximum = np.full(count, -np.inf)
+        np.minimum.at(minimum, codes, values)
+        np.maximum.at(maximum, codes, values)
+
+        results = {}
+        for k, shape_id in enumerate(shape_ids):
+            empty = counts[k] == 0
+            results[shape_id] = {
+                "cells": int(counts[k]),
+                "min": None if empty else float(minimum[k]),
+                "max": None if empty else float(maximum[k]),
+                "mean": None if empty else float(sums[k] / counts[k]),
+                "area": float(area[k]),
+                "volume": None if volume is None else float(volume[k])
+            }
+        return results
+
+
+def format_statistics(stats):
+    """把分区统计结果格式化为悬停文本"""
+    if stats["cells"] == 0:
+        return "无有效网格"
+    text = (
+        f"最小值: {stats['min']:.4g}<br>最大值: {stats['max']:.4g}<br>"
+        f"平均值: {stats['mean']:.4g}<br>面积: {stats['area']:.4g}"
+    )
+    if stats.get("volume") is not None:
+        text += f"<br>体积: {stats['volume']:.4g}"
+    return text
+
+
+def _cross(ox, oy, ax, ay, bx, by):
+    """向量OA与OB的叉积"""
+    return (ax - ox) * (by - oy) - (ay - oy) * (bx - ox)
+
+
+def convex_hull(xs, ys):
+    """计算点集的凸包（Andrew单调链）
+
+    每个x只保留y最小和最大的点作为候选，大幅减少参与单调链的点数
+
+    Args:
+        xs: 点的x坐标
+        ys: 点的y坐标
+
+    Returns:
+        tuple: (hx, hy) 逆时针排列的凸包顶点，不重复首点
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[finite], ys[finite]
+    if xs.size == 0:
+        return np.zeros(0), np.zeros(0)
+
+    order = np.lexsort((ys, xs))
+    xs, ys = xs[order], ys[order]
+    first = np.concatenate([[True], xs[1:] != xs[:-1]])
+    last = np.concatenate([xs[1:] != xs[:-1], [True]])
+    keep = first | last
+    points = list(zip(xs[keep].tolist(), ys[keep].tolist()))
+    if len(points) < 3:
+        hx, hy = zip(*points)
+        return np.array(hx), np.array(hy)
+
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and _cross(*lower[-2], *lower[-1], *p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and _cross(*upper[-2], *upper[-1], *p) <= 0:
+            upper.pop()
+        upper.append(p)
+    hull = lower[:-1] + upper[:-1]
+    hx, hy = zip(*hull)
+    return np.array(hx), np.array(hy)
+
+
+def envelope_hull(xs, ys, bins=None):
+    """按y分带计算点集的包络多边形，适用于拟断面这类每层左右边界不同的凹形数据范围
+
+    点按y值分带（默认每个不同的y值为一带），每带取x的最小值和最大值，
+    左边界自上而下、右边界自下而上连接成多边形
+
+    Args:
+        xs: 点的x坐标
+        ys: 点的y坐标
+        bins: 分带数量，为None时按不同的y值分带（不同y值过多时使用50带）
+
+    Returns:
+        tuple: (hx, hy) 多边形顶点，不重复首点
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[finite], ys[finite]
+    if xs.size == 0:
+        return np.zeros(0), np.zeros(0)
+
+    levels, band = np.unique(ys, return_inverse=True)
+    if bins is not None or len(levels) > 200:
+        edges = np.linspace(ys.min(), ys.max(), (bins or 50) + 1)
+        band = np.clip(np.searchsorted(edges, ys, side="right") - 1, 0, len(edges) - 2)
+        used = np.unique(band)
+        band = np.searchsorted(used, band)
+        centers = (edges[:-1] + edges[1:]) / 2
+        levels = centers[used]
+        # 首尾两带取数据的实际y范围，避免包络向外或向内偏移
+        levels[0], levels[-1] = ys.min(), ys.max()
+
+    count = len(levels)
+    left = np.full(count, np.inf)
+    right = np.full(count, -np.inf)
+    np.minimum.at(left, band, xs)
+    np.maximum.at(right, band, xs)
+    hx = np.concatenate([left, right[::-1]])
+    hy = np.concatenate([levels, levels[::-1]])
+    return hx, hy
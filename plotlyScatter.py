@@ -1,8 +1,19 @@
-import json
+import numpy as np
 import plotly.graph_objects as go
 import os
 import plotly.io as pio
 from typing import List, Union
+from plotlyExport import build_animation, export_frames, export_tiles
+from plotlyLabelLayout import LabelPlacer
+from plotlyReader import as_scatter_data
+from plotlyCache import load_json
+from plotlyFastFigure import build_figure, requires_figure
+from plotlyColorMap import ColorMap, LogScale
+from plotlySketch import sketch_values, robust_range
+from plotlySurvey import header_data_from_survey, reciprocal_error, neighborhood_index, level_column, robust_residuals
+
+COLORBAR_NAME = "custom_colorbar"  # 自定义颜色条图形和文本的name，用于识别和移除
+
 
 class CustomColorBar:
     """
@@ -12,7 +23,7 @@ class CustomColorBar:
     
     def __init__(
         self,
-        color_stops: List[List[Union[int, float, str]]],
+        color_stops: Union[List[List[Union[int, float, str]]], ColorMap],
         x_position: float = 1.05,
         y_position: List[float] = [0.1, 0.9],
         width: float = 0.04,
@@ -26,13 +37,15 @@ class CustomColorBar:
         title_font_size: int = 16,
         title_font_color: str = "black",
         auto_position: bool = True,  # 控制是否自动计算位置
-        use_paper_coords: bool = True  # 使用纸面坐标系统
+        use_paper_coords: bool = True,  # 使用纸面坐标系统
+        log_scale: bool = False  # 颜色在log10空间插值
     ):
         """
         初始化自定义颜色条
         
         参数:
-            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]
+            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]，
+                也可以是ColorMap，此时颜色段与使用同一ColorMap的轨迹颜色一致
             x_position: 颜色条的x位置 (相对于绘图区域，1.0是右边界)
             y_position: 颜色条的y范围 [底部, 顶部] (相对于绘图区域)
             width: 颜色条的宽度
@@ -47,8 +60,20 @@ class CustomColorBar:
             title_font_color: 标题的颜色
             auto_position: 是否自动计算颜色条位置
             use_paper_coords: 是否使用纸面坐标系统
+            log_scale: color_stops为ColorMap时，是否在log10空间插值颜色，与对数模式的轨迹一致
         """
-        self.color_stops = sorted(color_stops, key=lambda x: x[0])
+        if isinstance(color_stops, ColorMap):
+            self.colormap = color_stops
+            self.color_stops = color_stops.color_stops()
+            self.segments = color_stops.segments(log=log_scale)
+        else:
+            self.colormap = None
+            self.color_stops = sorted(color_stops, key=lambda x: x[0])
+            # 每两个停止点之间一段，使用前一个停止点的颜色
+            self.segments = [
+                (self.color_stops[i][0], self.color_stops[i + 1][0], self.color_stops[i][1])
+                for i in range(len(self.color_stops) - 1)
+            ]
         self.x_position = x_position
         self.y_position = y_position
         self.width = width
@@ -167,24 +192,34 @@ class CustomColorBar:
             self.tick_text_offset = 0.03
             self.title_offset = 0.07
         
+        # 先移除已有的自定义颜色条，重复添加或替换颜色条时不会叠加
+        self.remove_from_figure(fig)
+        shape_count, annotation_count = len(fig.layout.shapes), len(fig.layout.annotations)
+        
         # 根据坐标系统选择不同的添加方式
         if self.use_paper_coords:
             self._add_to_figure_paper_coords(fig)
         else:
             self._add_to_figure_data_coords(fig)
+        
+        # 标记颜色条的图形和文本，便于移除
+        for item in fig.layout.shapes[shape_count:] + fig.layout.annotations[annotation_count:]:
+            item.name = COLORBAR_NAME
             
         return fig
+    
+    @staticmethod
+    def remove_from_figure(fig: go.Figure) -> go.Figure:
+        """移除图表上由add_to_figure添加的颜色条图形和文本"""
+        if any(item.name == COLORBAR_NAME for item in fig.layout.shapes + fig.layout.annotations):
+            fig.layout.shapes = [s for s in fig.layout.shapes if s.name != COLORBAR_NAME]
+            fig.layout.annotations = [a for a in fig.layout.annotations if a.name != COLORBAR_NAME]
+        return fig
         
     def _add_to_figure_paper_coords(self, fig: go.Figure) -> None:
         """使用纸面坐标系统添加颜色条"""
         # 添加颜色条的矩形段
-        for i in range(len(self.color_stops) - 1):
-            current_stop = self.color_stops[i]
-            next_stop = self.color_stops[i + 1]
-            
-            current_value, current_color = current_stop
-            next_value, next_color = next_stop
-            
+        for current_value, next_value, current_color in self.segments:
             # 计算相对位置 (0-1范围)
             y0_norm = (current_value - self.min_value) / self.value_range
             y1_norm = (next_value - self.min_value) / self.value_range
@@ -269,13 +304,7 @@ class CustomColorBar:
     def _add_to_figure_data_coords(self, fig: go.Figure) -> None:
         """使用数据坐标系统添加颜色条"""
         # 添加颜色条的矩形段
-        for i in range(len(self.color_stops) - 1):
-            current_stop = self.color_stops[i]
-            next_stop = self.color_stops[i + 1]
-            
-            current_value, current_color = current_stop
-            next_value, next_color = next_stop
-            
+        for current_value, next_value, current_color in self.segments:
             # 计算当前段的y坐标范围
             y0 = self._value_to_y_position(current_value)
             y1 = self._value_to_y_position(next_value)
@@ -341,6 +370,76 @@ class CustomColorBar:
             font=dict(size=self.title_font_size, color=self.title_font_color)
         )
 
+class HeaderLayer:
+    """
+    头节点图层
+    维护num到点索引的字典以及逐点的颜色和大小数组，
+    高亮和重置只修改涉及的点，不重建图层；高亮的点绘制在只包含这些点的覆盖图层中
+    """
+    
+    def __init__(self, name, trace_index, nums, color, size):
+        """
+        初始化头节点图层
+        
+        参数:
+            name: 图层名称
+            trace_index: 图层在图表中的索引
+            nums: 头节点编号列表
+            color: 标记颜色，单个颜色或逐点颜色列表
+            size: 标记大小，单个值或逐点大小列表
+        """
+        self.name = name
+        self.trace_index = trace_index
+        self.overlay_index = None  # 高亮覆盖图层在图表中的索引，首次高亮时创建
+        self.set_points(nums, color, size)
+    
+    def set_points(self, nums, color, size):
+        """重置头节点编号和原始样式"""
+        self.nums = list(nums)
+        self.index = {num: i for i, num in enumerate(self.nums)}
+        self.original_colors = []
+        self.original_sizes = []
+        self.set_style(color=color, size=size)
+    
+    def set_style(self, color=None, size=None):
+        """设置原始颜色或大小，并清除高亮状态"""
+        n = len(self.nums)
+        if color is not None:
+            self.original_colors = list(color) if isinstance(color, (list, tuple)) else [color] * n
+        if size is not None:
+            self.original_sizes = list(size) if isinstance(size, (list, tuple)) else [size] * n
+        self.colors = list(self.original_colors)
+        self.sizes = list(self.original_sizes)
+        self.highlighted = set()
+    
+    def indices_of(self, nums):
+        """返回编号对应的点索引，不存在的编号被忽略"""
+        return [self.index[num] for num in nums if num in self.index]
+    
+    def highlight(self, nums, colors, size=None):
+        """高亮指定编号的点，返回是否有点被修改"""
+        changed = self.reset()
+        for k, num in enumerate(nums):
+            i = self.index.get(num)
+            if i is None:
+                continue
+            self.colors[i] = colors[k % len(colors)]
+            if size is not None:
+                self.sizes[i] = size
+            self.highlighted.add(i)
+            changed = True
+        return changed
+    
+    def reset(self):
+        """恢复被高亮点的原始样式，返回是否有点被修改"""
+        if not self.highlighted:
+            return False
+        for i in self.highlighted:
+            self.colors[i] = self.original_colors[i]
+            self.sizes[i] = self.original_sizes[i]
+        self.highlighted.clear()
+        return True
+
 class PlotlyScatterChart:
     """Python版的散点图类，模仿plotlyScatter.js的功能"""
     
@@ -364,55 +463,67 @@ class PlotlyScatterChart:
         self.selected_points = set()  # 存储被选中的点
         self.hidden_points = set()  # 存储被隐藏的点
         self.point_ids = []  # 存储所有点的id
-        self.extended_data = []  # 存储扩展属性
+        self.extended_data = {}  # 存储扩展属性（a、b、m、n、row、pseu列）
+        self.source_data = {}  # 存储init传入的列式数据
+        self.reciprocal_errors = None  # 存储互易误差（百分比）
+        self.auto_hidden_points = set()  # 存储被离群点检测自动隐藏的点
+        self._outlier_cache = {}  # 缓存离群点检测的邻域和残差
         self.header_trace_index = None  # 存储头节点图层的索引
+        self.header_layers = {}  # 存储头节点图层，名称 -> HeaderLayer
         self.custom_colorbar = None  # 存储自定义颜色条
+        self.log_scale = False  # 是否使用对数颜色刻度
+        self._log = LogScale()  # 对数变换，按数值列缓存
+        self._sketch = None  # 数值列的分位数草图 (对应的数值列, QuantileSketch)
+        self._frames = None  # set_frames的参数 (帧, 名称, 标题, 时长)
         
     def init(self, options=None):
         """初始化散点图
         
         Args:
             options: 配置选项
-                - data: 数据对象 {x: [], y: [], v: [], visible: [], id: []}
-                - style: 样式配置
+                - data: 数据对象 {x: [], y: [], v: [], visible: [], id: []}，
+                    也可以是DataFrame（每列一个属性）或Parquet文件路径
+                - style: 样式配置，logScale为True时使用对数颜色刻度
                 - layout: 布局配置
+                - fast: 为True时self.fig为FigureSpec（字典描述，数组不复制、不逐元素校验），
+                    只用于显示和导出；需要修改图表时先用 self.fig = self.fig.to_figure() 转换，否则这些方法抛出TypeError
                 - yaxis_reversed: 是否反转Y轴，默认为True
         """
         if options is None:
             options = {}
             
-        data = options.get("data", {})
+        data = as_scatter_data(options.get("data", {}))
+        if data is None:
+            return None
         style = options.get("style", {})
         layout = options.get("layout", {})
         yaxis_reversed = options.get("yaxis_reversed", True)  # 默认反转Y轴
         
         # 保存点的id和扩展属性
+        self.source_data = data
+        self._outlier_cache = {}
+        self.auto_hidden_points = set()
         self.point_ids = data.get("id", [])
         
-        # 处理扩展属性
+        # 处理扩展属性，按列保存为NumPy数组
         a_values = data.get("a", [])
-        if a_values:
-            self.extended_data = []
-            for i in range(len(a_values)):
-                self.extended_data.append({
-                    "a": data.get("a", [])[i] if i < len(data.get("a", [])) else None,
-                    "b": data.get("b", [])[i] if i < len(data.get("b", [])) else None,
-                    "m": data.get("m", [])[i] if i < len(data.get("m", [])) else None,
-                    "n": data.get("n", [])[i] if i < len(data.get("n", [])) else None,
-                    "row": data.get("row", [])[i] if i < len(data.get("row", [])) else None,
-                    "pseu": data.get("pseu", [])[i] if i < len(data.get("pseu", [])) else None
-                })
+        self.extended_data = {}
+        if len(a_values) > 0:  # 兼容NumPy数组
+            for key in ("a", "b", "m", "n", "row", "pseu"):
+                values = data.get(key)
+                if values is not None and len(values) == len(a_values):
+                    self.extended_data[key] = np.asarray(values)
+        self.log_scale = False
+        self._log.clear()
         
         # 根据visible数组初始化点的不透明度（0=显示，1=隐藏）
-        visible_data = data.get("visible", [])
+        visible_data = np.asarray(data.get("visible", []))
         # 修改逻辑：1表示隐藏（不透明度为0），0表示显示（不透明度为1）
-        opacities = [0 if v == 1 else 1 for v in visible_data]
+        opacities = np.where(visible_data == 1, 0, 1)
         
         # 初始化隐藏点集合
         self.hidden_points.clear()  # 先清空集合
-        for i, v in enumerate(visible_data):
-            if v == 1:  # 1表示隐藏
-                self.hidden_points.add(i)
+        self.hidden_points.update(np.flatnonzero(visible_data == 1).tolist())  # 1表示隐藏
         
         print(f"初始隐藏点数量: {len(self.hidden_points)}")
         
@@ -420,7 +531,7 @@ class PlotlyScatterChart:
         color_scale = style.get("colorscale", None)
         
         # 创建散点图
-        scatter_trace = go.Scatter(
+        scatter_trace = dict(
             x=data.get("x", []),
             y=data.get("y", []),
             mode=style.get("mode", "markers"),
@@ -428,23 +539,19 @@ class PlotlyScatterChart:
                 size=style.get("markerSize", 7),
                 color=data.get("v", []),
                 colorscale=color_scale,
+                cmin=style.get("cmin", None),  # 固定颜色范围，例如时移变化图以0为中心
+                cmax=style.get("cmax", None),
                 symbol='square',
                 opacity=opacities,
+                # 所有点的边线相同，使用标量而不是逐点列表，省去plotly对每个元素的校验和序列化
                 line=dict(
-                    color=["white"] * len(data.get("x", [])),
-                    width=[1] * len(data.get("x", []))
+                    color="white",
+                    width=1
                 ),
                 showscale=False  # 将showscale移到marker中
             ),
-            hovertemplate=(
-                "X: %{x}<br>"
-                "Y: %{y}<br>"
-                "Value: %{marker.color}<br>"
-                "a: %{customdata[0]}<br>"
-                "b: %{customdata[1]}"
-                "<extra></extra>"
-            ),
-            customdata=[[p.get("a", None), p.get("b", None)] for p in self.extended_data] if self.extended_data else None
+            hovertemplate=self._hover_template(),
+            customdata=self._hover_customdata()
         )
         
         # 创建布局
@@ -487,14 +594,185 @@ class PlotlyScatterChart:
         # 更新其他有效的布局属性
         self.layout.update(layout_copy)
         
-        # 创建图表
-        self.fig = go.Figure(data=[scatter_trace], layout=self.layout)
+        # 创建图表，快速模式下只组装字典描述，跳过plotly对每个数组元素的校验
+        fast = options.get("fast", False)
+        if fast:
+            self.fig = build_figure([dict(scatter_trace, type="scatter")], self.layout)
+        else:
+            scatter_trace = go.Scatter(**scatter_trace)
+            self.fig = go.Figure(data=[scatter_trace], layout=self.layout)
         
         # 保存数据引用
         self.data = [scatter_trace]
         
+        if style.get("logScale", False):
+            if fast:
+                print("快速模式不支持对数颜色刻度，请先用 fig.to_figure() 转换为go.Figure")
+            else:
+                self.set_log_scale(True)
+        
         return self.fig
     
+    def _hover_template(self):
+        """悬停模板，对数模式下颜色为log10值，数值取customdata中的原始值"""
+        value = "%{customdata[2]:.4g}" if self.log_scale else "%{marker.color}"
+        return (
+            "X: %{x}<br>"
+            "Y: %{y}<br>"
+            f"Value: {value}<br>"
+            "a: %{customdata[0]}<br>"
+            "b: %{customdata[1]}"
+            "<extra></extra>"
+        )
+    
+    def _hover_customdata(self, values=None):
+        """悬停用的customdata：a、b两列，指定values时追加一列原始值"""
+        columns = []
+        a_values = self.extended_data.get("a")
+        if a_values is not None:
+            columns = [a_values, self.extended_data.get("b", np.full(len(a_values), None))]
+        if values is not None:
+            if not columns:
+                columns = [np.full(len(values), None)] * 2
+            columns.append(values)
+        return np.column_stack(columns) if columns else None
+    
+    @requires_figure
+    def set_log_scale(self, enabled=True):
+        """切换对数颜色刻度，适用于跨越多个数量级的数据（如视电阻率）
+        
+        对数模式下点的颜色为log10(v)，颜色条刻度的标签为实际值，悬停显示原始值；
+        log10(v)按数值列缓存，重复切换不会重新计算。非正值不着色
+        
+        Args:
+            enabled: 是否使用对数刻度
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return False
+        
+        values = self.source_data.get("v")
+        if values is None or len(values) == 0:
+            print("没有数值数据，无法使用对数刻度")
+            return False
+        
+        trace = self.fig.data[0]
+        marker = trace.marker
+        if enabled and not self.log_scale:
+            cmin, cmax = LogScale.to_log(marker.cmin), LogScale.to_log(marker.cmax)
+            self.log_scale = True
+            marker.update(color=self._log.transform(values), cmin=cmin, cmax=cmax)
+            self._log.rebind(values, marker.color)
+            trace.update(customdata=self._hover_customdata(values), hovertemplate=self._hover_template())
+        elif not enabled and self.log_scale:
+            cmin, cmax = LogScale.from_log(marker.cmin), LogScale.from_log(marker.cmax)
+            self.log_scale = False
+            marker.update(color=values, cmin=cmin, cmax=cmax, colorbar_tickvals=None, colorbar_ticktext=None)
+            trace.update(customdata=self._hover_customdata(), hovertemplate=self._hover_template())
+        
+        if self.log_scale:
+            self._update_log_ticks()
+        if self._frames is not None and self.fig.frames:
+            self.set_frames(*self._frames)
+        return True
+    
+    def _update_log_ticks(self):
+        """按当前颜色范围（未设置时为数据范围）生成对数颜色条刻度"""
+        marker = self.fig.data[0].marker
+        low, high = marker.cmin, marker.cmax
+        if low is None or high is None:
+            log_values = marker.color
+            if np.isnan(log_values).all():
+                return
+            low = float(np.nanmin(log_values)) if low is None else low
+            high = float(np.nanmax(log_values)) if high is None else high
+        tickvals, ticktext = LogScale.ticks(low, high)
+        marker.update(colorbar_tickvals=tickvals, colorbar_ticktext=ticktext)
+    
+    @requires_figure
+    def set_color_range(self, range_values):
+        """设置颜色范围
+        
+        Args:
+            range_values: [min, max] 格式的列表，对数模式下也使用实际值
+        """
+        if not isinstance(range_values, list) or len(range_values) != 2:
+            print("颜色范围格式不正确")
+            return
+            
+        if not self.fig:
+            print("图表未初始化")
+            return
+        
+        marker = self.fig.data[0].marker
+        if self.log_scale:
+            marker.update(cmin=LogScale.to_log(range_values[0]), cmax=LogScale.to_log(range_values[1]))
+            self._update_log_ticks()
+            return
+        marker.update(cmin=range_values[0], cmax=range_values[1])
+    
+    @requires_figure
+    def value_sketch(self, precision=7):
+        """数值列v的分位数草图，只遍历一次数据，按数值列缓存"""
+        values = self.source_data.get("v", [])
+        cached = self._sketch
+        if cached is None or cached[0] is not values or cached[1].precision != precision:
+            self._sketch = cached = (values, sketch_values(np.asarray(values, dtype=float), precision))
+        return cached[1]
+    
+    @requires_figure
+    def auto_color_range(self, low=2.0, high=98.0):
+        """按数据的百分位数设置颜色范围，去掉两端的极值
+        
+        Args:
+            low: 下限百分位数
+            high: 上限百分位数
+            
+        Returns:
+            list: 设置的 [最小值, 最大值]，失败返回None
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+        
+        value_range = robust_range(self.value_sketch(), low, high)
+        if value_range is None:
+            print("没有有效数据，无法计算颜色范围")
+            return None
+        self.set_color_range(value_range)
+        return value_range
+    
+    @requires_figure
+    def equalize_colors(self, colorscale=None, count=16, low=0.0, high=100.0, colorbar=True, **kwargs):
+        """直方图均衡的颜色刻度：颜色停止点取在数据的等间隔分位数上，同时用于数据点和自定义颜色条
+        
+        Args:
+            colorscale: 配色，为None时使用当前的colorscale
+            count: 颜色段数量
+            low: 第一个停止点的百分位数
+            high: 最后一个停止点的百分位数
+            colorbar: 是否同时添加自定义颜色条
+            **kwargs: 其他传递给CustomColorBar的参数
+            
+        Returns:
+            ColorMap: 均衡后的颜色映射，失败返回None
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+        
+        colorscale = colorscale or self.fig.data[0].marker.colorscale or "Viridis"
+        colormap = ColorMap.equalized(self.value_sketch(), colorscale, count, low, high)
+        if colormap is None:
+            print("有效数据不足，无法均衡颜色")
+            return None
+        self.apply_colormap(colormap, colorbar, **kwargs)
+        return colormap
+    
+    @requires_figure
     def update_data(self, new_data):
         """更新数据
         
@@ -510,6 +788,7 @@ class PlotlyScatterChart:
         
         self.fig.update_traces(x=x_values, y=y_values, text=text_values)
     
+    @requires_figure
     def update_layout(self, new_layout):
         """更新布局
         
@@ -521,6 +800,7 @@ class PlotlyScatterChart:
             
         self.fig.update_layout(**new_layout)
     
+    @requires_figure
     def flip_y_axis(self, reversed=True):
         """翻转Y轴
         
@@ -584,6 +864,82 @@ class PlotlyScatterChart:
         except Exception as e:
             print(f"保存HTML时出错: {e}")
             return False
+
+    @requires_figure
+    def set_frames(self, frames, names=None, titles=None, duration=500):
+        """设置多期数据的动画帧
+        
+        Args:
+            frames: 每一期的数值数组，与初始化时的点一一对应
+            names: 每一帧的名称（显示在滑块上），默认使用帧序号
+            titles: 每一帧的标题，为None时不修改标题
+            duration: 每一帧的播放时长 (毫秒)
+            
+        Returns:
+            fig: 添加了动画帧的图表对象
+        """
+        if not self.fig:
+            print("图表未初始化，无法设置动画帧")
+            return None
+        
+        # 保存原始帧数据，切换对数刻度时重新生成
+        self._frames = (frames, names, titles, duration)
+        if self.log_scale:
+            # 帧的颜色与轨迹一样使用log10值，原始值放在customdata中用于悬停
+            log = LogScale()
+            deltas = [
+                {"marker": {"color": log.transform(values)}, "customdata": self._hover_customdata(values)}
+                for values in frames
+            ]
+        else:
+            deltas = [{"marker": {"color": values}} for values in frames]
+        return build_animation(
+            self.fig,
+            deltas,
+            trace_index=0,
+            names=names,
+            titles=titles,
+            duration=duration,
+            redraw=False
+        )
+    
+    def export_tiles(self, output_dir, zooms=4, tile_size=256, aspect=1.0, processes=None):
+        """导出XYZ瓦片金字塔，用于分页浏览很长的测线
+        
+        Args:
+            output_dir: 输出目录，瓦片保存为 {z}/{x}/{y}.png，并写入manifest.json
+            zooms: 级别数量，或级别列表
+            tile_size: 瓦片边长 (像素)
+            aspect: 纵向放大倍数
+            processes: 进程数量，默认为CPU核心数
+            
+        Returns:
+            dict: 瓦片清单，失败返回None
+        """
+        if not self.fig:
+            print("图表未初始化，无法导出瓦片")
+            return None
+        
+        return export_tiles(self.fig, output_dir, zooms=zooms, tile_size=tile_size, aspect=aspect, processes=processes)
+    
+    @requires_figure
+    def export_frames(self, output_dir, prefix="frame", format="png", processes=None):
+        """并行导出每一帧为图片，用于合成视频
+        
+        Args:
+            output_dir: 输出目录
+            prefix: 文件名前缀
+            format: 图片格式，默认为png
+            processes: 进程数量，默认为CPU核心数
+            
+        Returns:
+            list: 成功导出的文件路径
+        """
+        if not self.fig:
+            print("图表未初始化，无法导出")
+            return []
+        
+        return export_frames(self.fig, output_dir, prefix=prefix, format=format, width=800, height=600, processes=processes)
     
     def show(self):
         """显示图表"""
@@ -591,69 +947,198 @@ class PlotlyScatterChart:
             print("图表未初始化，无法显示")
             return
         
-        # Add custom colorbar if it exists
-        if self.custom_colorbar:
-            self.custom_colorbar.add_to_figure(self.fig)
-        
         self.fig.show(config=self.config)
     
+    @requires_figure
     def hide_selected_points(self):
         """隐藏选中的点"""
         if not self.fig or not self.selected_points:
             return
         
-        # 获取当前不透明度
-        current_opacities = self.fig.data[0].marker.opacity or [1] * len(self.fig.data[0].x)
-        
-        # 创建新的不透明度数组
-        new_opacities = list(current_opacities)
-        
         # 更新选中点的不透明度
-        for idx in self.selected_points:
-            self.hidden_points.add(idx)
-            new_opacities[idx] = 0
-        
-        # 更新图表
-        self.fig.update_traces(marker=dict(opacity=new_opacities))
+        self.hidden_points.update(self.selected_points)
+        self._set_points_opacity(list(self.selected_points), 0)
         
         # 清除选中状态
         self.selected_points.clear()
     
+    @requires_figure
     def show_hidden_points(self):
         """显示所有被隐藏的点"""
         if not self.fig or not self.hidden_points:
             return
         
+        # 更新隐藏点的不透明度
+        self._set_points_opacity(list(self.hidden_points), 1)
+        
+        # 清空隐藏点集合
+        self.hidden_points.clear()
+        
+    @requires_figure
+    def hide_points(self, indices):
+        """批量隐藏指定索引的点
+        
+        Args:
+            indices: 要隐藏的点的索引，可以是列表、集合或NumPy数组
+            
+        Returns:
+            int: 新隐藏的点的数量
+        """
+        if not self.fig:
+            return 0
+        
+        indices = np.unique(np.asarray(list(indices) if isinstance(indices, set) else indices, dtype=np.int64))
+        new_indices = [idx for idx in indices.tolist() if idx not in self.hidden_points]
+        if not new_indices:
+            return 0
+        
+        self.hidden_points.update(new_indices)
+        self._set_points_opacity(new_indices, 0)
+        
+        return len(new_indices)
+    
+    @requires_figure
+    def show_points(self, indices):
+        """批量显示指定索引的被隐藏点
+        
+        Args:
+            indices: 要显示的点的索引
+            
+        Returns:
+            int: 重新显示的点的数量
+        """
+        if not self.fig:
+            return 0
+        
+        shown = [idx for idx in np.asarray(list(indices), dtype=np.int64).tolist() if idx in self.hidden_points]
+        if not shown:
+            return 0
+        
+        self.hidden_points.difference_update(shown)
+        self._set_points_opacity(shown, 1)
+        
+        return len(shown)
+    
+    def _set_points_opacity(self, indices, value):
+        """一次性修改数据图层中指定点的不透明度"""
         # 获取当前不透明度
-        current_opacities = self.fig.data[0].marker.opacity or [1] * len(self.fig.data[0].x)
+        trace = self.fig.data[0]
+        opacity = trace.marker.opacity
+        if opacity is None or np.isscalar(opacity) or len(opacity) != len(trace.x):
+            new_opacities = np.full(len(trace.x), float(opacity) if np.isscalar(opacity) else 1.0)
+        else:
+            new_opacities = np.array(opacity, dtype=float)
         
-        # 创建新的不透明度数组
-        new_opacities = list(current_opacities)
+        new_opacities[indices] = value
         
-        # 更新隐藏点的不透明度
-        for idx in self.hidden_points:
-            new_opacities[idx] = 1
+        # 只更新数据图层，头节点等其他图层不受影响
+        trace.marker.opacity = new_opacities
+    
+    @requires_figure
+    def auto_hide_outliers(self, threshold=3.5, value_key="v", log=True, half_window=2, across_rows=True,
+                           level_key=None):
+        """按行的稳健离群点检测，自动隐藏尖峰点
         
-        # 更新图表
-        self.fig.update_traces(marker=dict(opacity=new_opacities))
+        对每个点取同一行（层级）前后half_window个点以及相邻行中x最近的点，
+        用邻域中位数和MAD计算稳健残差，超过阈值的点被隐藏。
+        邻域和残差会被缓存，只调整threshold时无需重新计算；
+        上一次自动隐藏、本次不再超限的点会重新显示。
         
-        # 清空隐藏点集合
-        self.hidden_points.clear()
+        Args:
+            threshold: 稳健残差的绝对值阈值
+            value_key: 测量值列名
+            log: 是否在log10域中计算
+            half_window: 同一行内的半窗口大小
+            across_rows: 是否包含相邻行的点
+            level_key: 层级列名，为None时优先使用row，row只是序号时使用y
+            
+        Returns:
+            np.ndarray: 被判定为离群点的索引
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+        
+        geometry_key = (half_window, across_rows, level_key)
+        residual_key = geometry_key + (value_key, log)
+        cache = self._outlier_cache
+        if cache.get("geometry_key") != geometry_key:
+            cache.clear()
+            cache["geometry_key"] = geometry_key
+            cache["neighbors"] = neighborhood_index(
+                level_column(self.source_data, level_key),
+                self.source_data.get("x"),
+                half_window=half_window,
+                across_rows=across_rows
+            )
+        if cache.get("residual_key") != residual_key:
+            # 初始就隐藏的点（visible为1）不参与邻域统计
+            visible = self.source_data.get("visible")
+            exclude = np.asarray(visible) == 1 if visible is not None and len(visible) > 0 else None
+            cache["residual_key"] = residual_key
+            cache["residuals"] = robust_residuals(
+                self.source_data.get(value_key), cache["neighbors"], log=log, exclude=exclude
+            )
+        
+        with np.errstate(invalid="ignore"):
+            outliers = np.flatnonzero(np.abs(cache["residuals"]) > threshold)
+        
+        # 上次自动隐藏但本次不再超限的点重新显示，其他方式隐藏的点保持不变
+        outlier_set = set(outliers.tolist())
+        self.show_points(self.auto_hidden_points - outlier_set)
+        self.auto_hidden_points &= outlier_set
+        newly_hidden = outlier_set - self.hidden_points
+        self.hide_points(newly_hidden)
+        self.auto_hidden_points |= newly_hidden
+        print(f"离群点数量: {len(outliers)}，新隐藏 {len(newly_hidden)} 个")
+        
+        return outliers
+    
+    @requires_figure
+    def hide_reciprocal_errors(self, threshold=5.0, value_key="v"):
+        """根据互易误差自动隐藏测量点
+        
+        对init传入的数据按 (a,b,m,n) 与 (m,n,a,b) 配对，互易误差超过阈值的测量点会被隐藏
+        
+        Args:
+            threshold: 互易误差阈值（百分比）
+            value_key: 用于比较的数值列名，默认为视电阻率v
+            
+        Returns:
+            np.ndarray: 每个点的互易误差，没有互易测量的点为NaN
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+        
+        errors, _ = reciprocal_error(self.source_data, value_key=value_key)
+        self.reciprocal_errors = errors
+        
+        with np.errstate(invalid="ignore"):
+            bad = np.flatnonzero(errors > threshold)
+        hidden = self.hide_points(bad)
+        print(f"互易误差超过 {threshold}% 的点: {len(bad)}，新隐藏 {hidden} 个")
         
+        return errors
+    
+    @requires_figure
     def addHeaderPoints(self, header_data):
         """添加头节点
         
         Args:
             header_data: 头节点数据，格式为 {headOption: {}, headerData: []}
                 headOption: 头节点样式配置
+                    - name: 图层名称，默认为'Header Points'，同名图层会被原地更新
                     - markerSize: 标记大小
                     - markerSymbol: 标记形状
                     - markerColor: 标记颜色
                     - markerLine: 标记边框配置
                     - showLabels: 是否显示标签
-                    - smartLabels: 是否启用智能标签布局
+                    - smartLabels: 是否启用智能标签布局（避让重叠标签）
                     - maxLabels: 最大显示标签数量
-                headerData: 头节点数据，每个元素是 {x, y, v, num} 格式的字典
+                    - labelPositions: 智能标签的候选位置列表，按尝试顺序排列
+                headerData: 头节点数据，每个元素是 {x, y, v, num} 格式的字典，
+                    可选priority字段指定标签优先级
         
         Returns:
             int: 添加的头节点图层的索引
@@ -670,10 +1155,15 @@ class PlotlyScatterChart:
             print("头节点数据为空")
             return -1
         
+        # 同名图层已存在时原地更新，不重建图层
+        name = head_option.get("name", "Header Points")
+        if name in self.header_layers:
+            self.updateHeaderPoints(header_data, name=name)
+            return self.header_layers[name].trace_index
+        
         # 提取数据
         x_values = [point.get("x") for point in header_data_points]
         y_values = [point.get("y") for point in header_data_points]
-        v_values = [point.get("v") for point in header_data_points]
         num_values = [point.get("num") for point in header_data_points]
         
         # 获取样式配置
@@ -683,28 +1173,8 @@ class PlotlyScatterChart:
         marker_line = head_option.get("markerLine", {"color": "white", "width": 1})
         show_labels = head_option.get("showLabels", True)
         
-        # 智能标签配置
-        smart_labels = head_option.get("smartLabels", False)
-        max_labels = head_option.get("maxLabels", 50)
-        
         # 处理标签显示
-        text_values = num_values.copy()
-        text_positions = ['top center'] * len(num_values)
-        
-        # 如果启用智能标签布局且点数量超过最大标签数
-        if show_labels and smart_labels and len(header_data_points) > max_labels:
-            # 方法1: 只显示部分标签
-            step = max(1, round(len(header_data_points) / max_labels))
-            text_values = [str(num) if i % step == 0 else "" for i, num in enumerate(num_values)]
-            
-            # 方法2（可选）: 交错显示标签位置
-            # positions = ['top center', 'top right', 'top left', 'bottom center', 'bottom left', 'bottom right']
-            # text_positions = []
-            # for i in range(len(num_values)):
-            #     if text_values[i] == "":
-            #         text_positions.append('top center')  # 空标签位置无所谓
-            #     else:
-            #         text_positions.append(positions[i % len(positions)])
+        text_values, text_positions = self._header_labels(header_data_points, head_option)
         
         # 创建头节点图层
         header_trace = go.Scatter(
@@ -730,42 +1200,298 @@ class PlotlyScatterChart:
             hovertemplate=(
                 "X: %{x}<br>"
                 "Y: %{y}<br>"
-                "Num: %{text}<br>"
+                "Num: %{customdata}<br>"
                 "<extra></extra>"
             ),
             customdata=num_values,
-            name='Header Points',
+            name=name,
             showlegend=False
         )
         
         # 添加头节点图层
         self.fig.add_trace(header_trace)
         
-        # 保存头节点图层索引
-        self.header_trace_index = len(self.fig.data) - 1
+        # 保存头节点图层
+        layer = HeaderLayer(name, len(self.fig.data) - 1, num_values, marker_color, marker_size)
+        self.header_layers[name] = layer
+        self.header_trace_index = layer.trace_index
         
         print(f"添加了 {len(header_data_points)} 个头节点")
         
         return self.header_trace_index
     
-    def removeHeaderPoints(self):
-        """移除头节点图层"""
-        if not self.fig or self.header_trace_index is None:
+    def _header_labels(self, header_data_points, head_option):
+        """计算头节点的标签文本和位置
+        
+        Args:
+            header_data_points: 头节点数据列表
+            head_option: 头节点样式配置
+            
+        Returns:
+            tuple: (标签文本列表, 标签位置列表)
+        """
+        num_values = [point.get("num") for point in header_data_points]
+        text_values = num_values.copy()
+        text_positions = ['top center'] * len(num_values)
+        
+        # 如果启用智能标签布局，按优先级放置标签并避开重叠
+        if head_option.get("showLabels", True) and head_option.get("smartLabels", False):
+            priorities = [point.get("priority") for point in header_data_points]
+            placer = LabelPlacer.from_figure(
+                self.fig,
+                marker_size=head_option.get("markerSize", 16),
+                positions=head_option.get("labelPositions")
+            )
+            text_values, text_positions = placer.place(
+                [point.get("x") for point in header_data_points],
+                [point.get("y") for point in header_data_points],
+                num_values,
+                priorities=None if None in priorities else priorities,
+                max_labels=head_option.get("maxLabels", 50)
+            )
+        
+        return text_values, text_positions
+    
+    def getHeaderLayer(self, name=None):
+        """获取头节点图层
+        
+        Args:
+            name: 图层名称，为None时返回最近添加的图层
+            
+        Returns:
+            HeaderLayer: 头节点图层，不存在时返回None
+        """
+        if name is None:
+            for layer in self.header_layers.values():
+                if layer.trace_index == self.header_trace_index:
+                    return layer
+            return None
+        return self.header_layers.get(name)
+    
+    @requires_figure
+    def updateHeaderPoints(self, header_data, name=None):
+        """原地更新头节点图层的数据和样式
+        
+        Args:
+            header_data: 头节点数据，格式同addHeaderPoints，headOption中只需包含要修改的配置
+            name: 图层名称，为None时更新最近添加的图层
+        """
+        layer = self.getHeaderLayer(name)
+        if not self.fig or layer is None:
+            print("头节点图层不存在")
+            return
+        
+        header_data_points = header_data.get("headerData", [])
+        head_option = header_data.get("headOption", {})
+        trace = self.fig.data[layer.trace_index]
+        
+        with self.fig.batch_update():
+            if header_data_points:
+                num_values = [point.get("num") for point in header_data_points]
+                label_option = dict(head_option)
+                label_option.setdefault("markerSize", layer.original_sizes[0] if layer.original_sizes else 16)
+                label_option.setdefault("showLabels", trace.text is not None)
+                text_values, text_positions = self._header_labels(header_data_points, label_option)
+                
+                trace.x = [point.get("x") for point in header_data_points]
+                trace.y = [point.get("y") for point in header_data_points]
+                trace.customdata = num_values
+                if trace.text is not None:
+                    trace.text = text_values
+                    trace.textposition = text_positions
+                layer.set_points(
+                    num_values,
+                    head_option.get("markerColor", layer.original_colors[0] if layer.original_colors else "blue"),
+                    head_option.get("markerSize", layer.original_sizes[0] if layer.original_sizes else 16)
+                )
+                trace.marker.color = layer.colors
+                trace.marker.size = layer.sizes
+            else:
+                if "markerColor" in head_option:
+                    layer.set_style(color=head_option["markerColor"])
+                    trace.marker.color = layer.colors
+                if "markerSize" in head_option:
+                    layer.set_style(size=head_option["markerSize"])
+                    trace.marker.size = layer.sizes
+            
+            if "markerSymbol" in head_option:
+                trace.marker.symbol = head_option["markerSymbol"]
+            if "markerLine" in head_option:
+                trace.marker.line.update(head_option["markerLine"])
+            if "showLabels" in head_option:
+                trace.mode = 'markers+text' if head_option["showLabels"] else 'markers'
+        
+        # 修改点或样式会清除高亮，覆盖图层同步清空（在batch_update之外读取更新后的图层）
+        self._apply_header_style(layer)
+    
+    @requires_figure
+    def highlightHeaderPoints(self, nums, colors=None, size=None, name=None):
+        """高亮指定编号的头节点，如四极装置的A、B、M、N电极
+        
+        只修改涉及的点，其余点保持原样，之前的高亮会被自动重置
+        
+        Args:
+            nums: 头节点编号列表
+            colors: 高亮颜色列表，与nums一一对应，默认为 ['red', 'blue', 'green', '#F4B008']
+            size: 高亮点的标记大小，为None时保持原大小
+            name: 图层名称，为None时处理所有头节点图层
+        """
+        if not self.fig or not self.header_layers:
+            return
+        if name is not None and name not in self.header_layers:
+            print(f"头节点图层不存在: {name}")
+            return
+        
+        if colors is None:
+            colors = ['red', 'blue', 'green', '#F4B008']
+        
+        layers = [self.header_layers[name]] if name is not None else list(self.header_layers.values())
+        with self.fig.batch_update():
+            for layer in layers:
+                changed = layer.highlight(nums, colors, size)
+                if changed:
+                    self._apply_header_style(layer)
+    
+    @requires_figure
+    def resetHeaderPointsColor(self, name=None):
+        """恢复头节点的原始颜色和大小
+        
+        Args:
+            name: 图层名称，为None时处理所有头节点图层
+        """
+        if not self.fig or not self.header_layers:
+            return
+        if name is not None and name not in self.header_layers:
+            print(f"头节点图层不存在: {name}")
             return
         
-        # 删除头节点图层
-        self.fig.data = [trace for i, trace in enumerate(self.fig.data) if i != self.header_trace_index]
+        layers = [self.header_layers[name]] if name is not None else list(self.header_layers.values())
+        with self.fig.batch_update():
+            for layer in layers:
+                if layer.reset():
+                    self._apply_header_style(layer)
+    
+    def _apply_header_style(self, layer):
+        """把图层的高亮点写入覆盖图层
+        
+        覆盖图层只包含高亮的点，使用与头节点图层相同的形状，绘制在其上方；
+        头节点图层本身保持原始样式，高亮和重置的开销与高亮点数有关，与头节点数量无关
+        """
+        trace = self.fig.data[layer.trace_index]
+        points = sorted(layer.highlighted)
+        if layer.overlay_index is None:
+            if not points:
+                return
+            self.fig.add_trace(go.Scatter(
+                mode="markers",
+                hoverinfo="skip",
+                name=f"{layer.name} (highlight)",
+                showlegend=False
+            ))
+            layer.overlay_index = len(self.fig.data) - 1
+        
+        self.fig.data[layer.overlay_index].update(
+            x=[trace.x[i] for i in points],
+            y=[trace.y[i] for i in points],
+            marker=dict(
+                color=[layer.colors[i] for i in points],
+                size=[layer.sizes[i] for i in points],
+                symbol=trace.marker.symbol,
+                line=trace.marker.line
+            )
+        )
+    
+    @requires_figure
+    def removeHeaderPoints(self, name=None):
+        """移除头节点图层
+        
+        Args:
+            name: 图层名称，为None时移除最近添加的图层
+        """
+        layer = self.getHeaderLayer(name)
+        if not self.fig or layer is None:
+            return
+        
+        # 删除头节点图层及其高亮覆盖图层
+        removed = {layer.trace_index, layer.overlay_index} - {None}
+        self.fig.data = [trace for i, trace in enumerate(self.fig.data) if i not in removed]
+        del self.header_layers[layer.name]
+        
+        # 后面图层的索引前移
+        for other in self.header_layers.values():
+            other.trace_index -= sum(i < other.trace_index for i in removed)
+            if other.overlay_index is not None:
+                other.overlay_index -= sum(i < other.overlay_index for i in removed)
         
         # 重置头节点图层索引
-        self.header_trace_index = None
+        self.header_trace_index = max(
+            (other.trace_index for other in self.header_layers.values()), default=None
+        )
         
         print("头节点图层已移除")
 
+    @requires_figure
+    def addSurveyHeaderPoints(self, spacing=1.0, coordinates=None, head_option=None, **kwargs):
+        """根据init传入数据的a、b、m、n列添加头节点，无需单独的头节点文件
+        
+        Args:
+            spacing: 电极间距
+            coordinates: 电极坐标表，见plotlySurvey.electrode_table
+            head_option: 头节点样式配置，同addHeaderPoints的headOption
+            **kwargs: 其他传递给plotlySurvey.electrode_table的参数
+            
+        Returns:
+            int: 添加的头节点图层的索引
+        """
+        if not self.fig:
+            print("图表未初始化，无法添加头节点")
+            return -1
+        
+        header_data = header_data_from_survey(
+            self.source_data,
+            spacing=spacing,
+            coordinates=coordinates,
+            head_option=head_option,
+            **kwargs
+        )
+        return self.addHeaderPoints(header_data)
+
+    @requires_figure
+    def apply_colormap(self, colormap, colorbar=True, **kwargs):
+        """用同一个ColorMap设置数据点的颜色刻度和自定义颜色条，二者的颜色和值域一致
+
+        Args:
+            colormap: ColorMap对象
+            colorbar: 是否同时添加自定义颜色条
+            **kwargs: 其他传递给CustomColorBar的参数
+
+        Returns:
+            CustomColorBar: 创建的颜色条对象，不添加颜色条时返回None
+        """
+        if not self.fig:
+            print("图表未初始化")
+            return None
+
+        # 对数模式下点的颜色为log10值，停止点也换到log10空间
+        trace_colormap = colormap.log10() if self.log_scale else colormap
+        self.fig.data[0].marker.update(
+            colorscale=trace_colormap.colorscale(),
+            cmin=trace_colormap.vmin,
+            cmax=trace_colormap.vmax
+        )
+        if self.log_scale:
+            self._update_log_ticks()
+        if colorbar:
+            kwargs.setdefault("log_scale", self.log_scale)
+            return self.addCustomColorBar(colormap, **kwargs)
+        return None
+
+    @requires_figure
     def addCustomColorBar(self, color_stops, **kwargs):
         """添加自定义颜色条
         
         Args:
-            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]
+            color_stops: 颜色停止点列表，格式为 [[值1, '颜色1'], [值2, '颜色2'], ...]，或ColorMap
             **kwargs: 其他传递给CustomColorBar的参数
             
         Returns:
@@ -793,13 +1519,12 @@ def load_plot_data(data_file):
         data_file: 数据文件路径
     
     Returns:
-        dict: 加载的数据
+        dict: 加载的数据，多次加载同一文件时共享缓存中的只读结果
     """
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            print(f"成功加载 {data_file}，包含数据点: {len(data.get('x', []))}")
-            return data
+        data = load_json(data_file)
+        print(f"成功加载 {data_file}，包含数据点: {len(data.get('x', []))}")
+        return data
     except Exception as e:
         print(f"载入数据时出错: {e}")
         return {}
@@ -811,12 +1536,10 @@ def load_color_scale(color_scale_file):
         color_scale_file: 颜色刻度文件路径
     
     Returns:
-        list: 颜色刻度数组
+        list: 颜色刻度数组（只读）
     """
     try:
-        with open(color_scale_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("colorScale", [])
+        return load_json(color_scale_file, "colorScale")
     except Exception as e:
         print(f"载入颜色刻度时出错: {e}")
         return []
@@ -828,14 +1551,13 @@ def load_header_data(header_data_file):
         header_data_file: 头节点数据文件路径
     
     Returns:
-        dict: 头节点数据和配置
+        dict: 头节点数据和配置（只读）
     """
     try:
-        with open(header_data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            header_data = data.get("headerData", [])
-            print(f"成功加载 {header_data_file}，包含 {len(header_data)} 个头节点")
-            return data
+        data = load_json(header_data_file)
+        header_data = data.get("headerData", [])
+        print(f"成功加载 {header_data_file}，包含 {len(header_data)} 个头节点")
+        return data
     except Exception as e:
         print(f"载入头节点数据时出错: {e}")
         return {}
@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    流式近似分位数
+    按float64的位模式分桶（符号、指数和尾数的高precision位），每个桶内的相对宽度为2^-precision，
+    分位数的相对误差不超过2^-(precision+1)；只需要一次遍历，可以按块更新（内存映射、分块读取），
+    多个草图可以合并
+    """
+
+    def __init__(self, precision=7):
+        """
+        初始化分位数草图
+
+        参数:
+            precision: 保留的尾数位数，默认7位，相对误差约0.4%，桶计数约占4 MB
+        """
+        self.precision = precision
+        self._shift = np.uint64(52 - precision)
+        self.size = 1 << (12 + precision)
+        self.counts = np.zeros(self.size, dtype=np.int64)
+        self._sorted = None  # 排序后的 (代表值, 累计计数)，更新后失效
+
+    def update(self, values, chunk_size=1 << 20):
+        """加入一批数值，按块处理，不复制整个数组
+
+        Args:
+            values: 任意形状的数值数组或内存映射数组，NaN和无穷大被忽略
+            chunk_size: 每块的元素数
+
+        Returns:
+            QuantileSketch: self，便于链式调用
+        """
+        values = np.asarray(values)
+        flat = values.reshape(-1)
+        for start in range(0, flat.size, chunk_size):
+            chunk = np.ascontiguousarray(flat[start:start + chunk_size], dtype=np.float64)
+            index = (chunk.view(np.uint64) >> self._shift).view(np.int64)
+            self.counts += np.bincount(index, minlength=self.size)
+        self._sorted = None
+        return self
+
+    def merge(self, other):
+        """合并另一个相同精度的草图，例如多进程分块统计的结果"""
+        if other.precision != self.precision:
+            raise ValueError("只能合并精度相同的分位数草图")
+        self.counts += other.counts
+        self._sorted = None
+        return self
+
+    def _valid_buckets(self):
+        """有计数的有限值桶编号（指数全为1的桶对应NaN和无穷大）"""
+        buckets = np.flatnonzero(self.counts)
+        exponent = (buckets >> self.precision) & 0x7FF
+        return buckets[exponent != 0x7FF]
+
+    @property
+    def count(self):
+        """有限值的数量"""
+        return int(self.counts[self._valid_buckets()].sum())
+
+    def _cumulative(self):
+        """按代表值排序的 (代表值, 累计计数)"""
+        if self._sorted is None:
+            buckets = self._valid_buckets()
+            # 代表值取桶的中点：尾数的下一位置1
+            bits = (buckets.astype(np.uint64) << self._shift) | (np.uint64(1) << (self._shift - np.uint64(1)))
+            centers = bits.view(np.float64)
+            centers[(buckets >> self.precision) & 0x7FF == 0] = 0.0  # 0和非规格化数
+            order = np.argsort(centers, kind="stable")
+            self._sorted = (centers[order], np.cumsum(self.counts[buckets[order]]))
+        return self._sorted
+
+    def quantiles(self, q):
+        """近似分位数
+
+        Args:
+            q: 0-1之间的分位点，标量或数组
+
+        Returns:
+            float或np.ndarray: 对应的值，没有数据时为NaN
+        """
+        centers, cumulative = self._cumulative()
+        q = np.asarray(q, dtype=float)
+        if centers.size == 0:
+            return np.full(q.shape, np.nan) if q.ndim else float("nan")
+        # 第k个值（从0开始）落在累计计数第一个大于k的桶中
+        rank = np.clip(np.round(q * (cumulative[-1] - 1)), 0, cumulative[-1] - 1)
+        result = centers[np.searchsorted(cumulative, rank, side="right")]
+        return result if q.ndim else float(result)
+
+
+def sketch_values(values, precision=7, chunk_size=1 << 20):
+    """对数组（可以是内存映射）做一次遍历，返回分位数草图"""
+    return QuantileSketch(precision).update(values, chunk_size)
+
+
+def robust_range(sketch, low=2.0, high=98.0):
+    """由分位数草图计算稳健的颜色范围
+
+    Args:
+        sketch: QuantileSketch
+        low: 下限百分位数
+        high: 上限百分位数
+
+    Returns:
+        list: [最小值, 最大值]，没有数据时返回None
+    """
+    bounds = sketch.quantiles([low / 100, high / 100])
+    if not np.isfinite(bounds).all():
+        return None
+    return [float(bounds[0]), float(bounds[1])]
@@ -0,0 +1,1033 @@
+import numpy as np
+import pandas as pd
+
+# 四极装置的电极列，依次为供电电极A、B和测量电极M、N
+ELECTRODE_COLUMNS = ("a", "b", "m", "n")
+
+
+def _column(data, key):
+    """从列式数据中取出一列并转换为NumPy数组，缺失的列返回None
+
+    整数列保持原样不复制，含None的列转换为浮点数组，None变为NaN
+    """
+    values = data.get(key)
+    if values is None or len(values) == 0:
+        return None
+    array = np.asarray(values)
+    if array.dtype.kind not in "iuf":
+        array = np.asarray(values, dtype=float)
+    return array
+
+
+def _electrode_values(column):
+    """去掉电极列中的空值（无穷远电极），返回int64数组"""
+    if column.dtype.kind == "f":
+        column = column[np.isfinite(column)]
+    return column.astype(np.int64, copy=False)
+
+
+def electrode_table(data, spacing=1.0, coordinates=None, origin=0.0, first_num=1):
+    """从a、b、m、n列中提取所有用到的电极并计算位置
+
+    Args:
+        data: 列式数据，格式同plotlyData.json {a: [], b: [], m: [], n: [], ...}
+        spacing: 电极间距，未提供坐标表时 x = origin + (num - first_num) * spacing
+        coordinates: 电极坐标表，可以是 {num: (x, y)} 字典，
+            也可以是 {num: [], x: [], y: []} 列式数据或headerData格式的列表
+        origin: 第一个电极的x坐标
+        first_num: 第一个电极的编号
+
+    Returns:
+        dict: {num, x, y, count} 均为NumPy数组，按电极编号升序排列，
+            count为每个电极在测量数据中被使用的次数
+    """
+    columns = [_column(data, key) for key in ELECTRODE_COLUMNS]
+    columns = [column for column in columns if column is not None]
+    if not columns:
+        empty = np.array([], dtype=float)
+        return {"num": np.array([], dtype=np.int64), "x": empty, "y": empty, "count": np.array([], dtype=np.int64)}
+
+    # 无穷远电极（如二极装置的B、N）在数据中为空值，直接丢弃
+    stacked = np.concatenate([_electrode_values(column) for column in columns])
+    nums, counts = _count_unique(stacked)
+
+    if coordinates is None:
+        x = origin + (nums - first_num) * float(spacing)
+        y = np.zeros(len(nums), dtype=float)
+    else:
+        table_nums, table_x, table_y = _coordinate_arrays(coordinates)
+        order = np.argsort(table_nums, kind="stable")
+        table_nums, table_x, table_y = table_nums[order], table_x[order], table_y[order]
+        x = np.full(len(nums), np.nan)
+        y = np.full(len(nums), np.nan)
+        if len(table_nums):
+            pos = np.minimum(np.searchsorted(table_nums, nums), len(table_nums) - 1)
+            found = table_nums[pos] == nums
+            x[found] = table_x[pos[found]]
+            y[found] = table_y[pos[found]]
+        missing = int(np.count_nonzero(np.isnan(x)))
+        if missing:
+            print(f"坐标表中缺少 {missing} 个电极的位置")
+
+    return {"num": nums, "x": x, "y": y, "count": counts}
+
+
+def _count_unique(values):
+    """统计整数数组中每个取值出现的次数
+
+    电极编号通常是连续的小整数，此时用bincount在O(n)内完成计数，
+    编号稀疏时退回到基于排序的np.unique
+    """
+    if values.size == 0:
+        return values, np.array([], dtype=np.int64)
+    low, high = int(values.min()), int(values.max())
+    if high - low <= 4 * values.size + 1024:
+        bins = np.bincount(values - low)
+        nums = np.flatnonzero(bins)
+        return nums + low, bins[nums]
+    return np.unique(values, return_counts=True)
+
+
+def _coordinate_arrays(coordinates):
+    """将各种格式的坐标表统一为 (num, x, y) 三个数组"""
+    if isinstance(coordinates, dict) and "num" in coordinates:
+        nums = np.asarray(coordinates["num"], dtype=np.int64)
+        x = np.asarray(coordinates["x"], dtype=float)
+        y = np.asarray(coordinates.get("y", np.zeros(len(nums))), dtype=float)
+    elif isinstance(coordinates, dict):
+        nums = np.fromiter(coordinates.keys(), dtype=np.int64, count=len(coordinates))
+        xy = np.array([tuple(value)[:2] for value in coordinates.values()], dtype=float).reshape(-1, 2)
+        x, y = xy[:, 0], xy[:, 1]
+    else:
+        nums = np.array([point.get("num") for point in coordinates], dtype=np.int64)
+        x = np.array([point.get("x") for point in coordinates], dtype=float)
+        y = np.array([point.get("y", 0) for point in coordinates], dtype=float)
+    return nums, x, y
+
+
+def header_data_from_survey(data, spacing=1.0, coordinates=None, head_option=None, **kwargs):
+    """根据测量数据的a、b、m、n列生成头节点数据
+
+    Args:
+        data: 列式数据，格式同plotlyData.json
+        spacing: 电极间距
+        coordinates: 电极坐标表，见electrode_table
+        head_option: 头节点样式配置，直接放入返回结果的headOption
+        **kwargs: 其他传递给electrode_table的参数
+
+    Returns:
+        dict: 可直接传给addHeaderPoints的头节点数据 {headOption: {}, headerData: []}，
+            每个头节点的v为该电极的使用次数
+    """
+    table = electrode_table(data, spacing=spacing, coordinates=coordinates, **kwargs)
+    valid = np.isfinite(table["x"]) & np.isfinite(table["y"])
+    header_points = [
+        {"x": x, "y": y, "v": count, "num": num}
+        for x, y, count, num in zip(
+            table["x"][valid].tolist(),
+            table["y"][valid].tolist(),
+            table["count"][valid].tolist(),
+            table["num"][valid].tolist()
+        )
+    ]
+    return {"headOption": dict(head_option or {}), "headerData": header_points}
+
+
+def electrode_coordinates(data, spacing=1.0, coordinates=None, origin=0.0, first_num=1):
+    """计算每个测量点四个电极的坐标
+
+    Args:
+        data: 列式数据，包含a、b、m、n列
+        spacing: 电极间距，未提供坐标表时使用
+        coordinates: 电极坐标表，格式见electrode_table
+        origin: 第一个电极的x坐标
+        first_num: 第一个电极的编号
+
+    Returns:
+        tuple: (x, y) 两个形状为 (4, n) 的数组，行依次对应a、b、m、n，
+            缺失的电极（无穷远电极）坐标为NaN
+    """
+    columns = [_column(data, key) for key in ELECTRODE_COLUMNS]
+    n = max((len(column) for column in columns if column is not None), default=0)
+    x = np.full((4, n), np.nan)
+    y = np.full((4, n), np.nan)
+
+    if coordinates is not None:
+        table_nums, table_x, table_y = _coordinate_arrays(coordinates)
+        lookup = _NumLookup(table_nums)
+
+    for row, column in enumerate(columns):
+        if column is None:
+            continue
+        if coordinates is None:
+            x[row] = origin + (column - first_num) * float(spacing)
+            y[row] = np.where(np.isnan(x[row]), np.nan, 0.0)
+        else:
+            pos, found = lookup(column)
+            x[row, found] = table_x[pos[found]]
+            y[row, found] = table_y[pos[found]]
+    return x, y
+
+
+class _NumLookup:
+    """电极编号到坐标表行号的向量化查找
+
+    编号连续时使用直接索引表，O(1)查找；稀疏时使用searchsorted
+    """
+
+    def __init__(self, nums):
+        self.nums = np.asarray(nums, dtype=np.int64)
+        self.low = int(self.nums.min()) if self.nums.size else 0
+        span = int(self.nums.max()) - self.low + 1 if self.nums.size else 0
+        self.dense = None
+        if 0 < span <= 4 * self.nums.size + 1024:
+            self.dense = np.full(span, -1, dtype=np.int64)
+            self.dense[self.nums - self.low] = np.arange(self.nums.size)
+        else:
+            self.order = np.argsort(self.nums, kind="stable")
+            self.sorted = self.nums[self.order]
+
+    def __call__(self, values):
+        """返回 (行号, 是否找到) 两个数组，未找到的行号无意义"""
+        values = np.asarray(values)
+        valid = np.isfinite(values) if values.dtype.kind == "f" else np.ones(values.shape, dtype=bool)
+        keys = np.where(valid, values, self.low).astype(np.int64)
+        if self.nums.size == 0:
+            return np.zeros(keys.shape, dtype=np.int64), np.zeros(keys.shape, dtype=bool)
+        if self.dense is not None:
+            offset = keys - self.low
+            inside = valid & (offset >= 0) & (offset < self.dense.size)
+            pos = self.dense[np.where(inside, offset, 0)]
+            found = inside & (pos >= 0)
+            return np.maximum(pos, 0), found
+        idx = np.minimum(np.searchsorted(self.sorted, keys), self.sorted.size - 1)
+        found = valid & (self.sorted[idx] == keys)
+        return self.order[idx], found
+
+
+def _distances(x, y, i, j):
+    """电极i与电极j之间的距离，任一电极缺失时为NaN"""
+    if y is None:
+        return np.abs(x[i] - x[j])
+    return np.hypot(x[i] - x[j], y[i] - y[j])
+
+
+# 四极装置中参与计算的电极对 (供电电极, 测量电极, 符号)：AM、AN、BM、BN
+_ELECTRODE_PAIRS = ((0, 2, 1.0), (0, 3, -1.0), (1, 2, -1.0), (1, 3, 1.0))
+
+
+def _pair_distances(x, y):
+    """返回AM、AN、BM、BN四个距离数组和对应符号，缺失电极的距离为inf"""
+    pairs = []
+    for i, j, sign in _ELECTRODE_PAIRS:
+        r = _distances(x, y, i, j)
+        pairs.append((np.where(np.isnan(r), np.inf, r), sign))
+    return pairs
+
+
+def geometric_factor(x, y=None):
+    """计算任意四极装置在均匀半空间地表的装置系数
+
+    K = 2π / (1/AM - 1/AN - 1/BM + 1/BN)，无穷远电极对应的项为0
+
+    Args:
+        x: 形状为 (4, n) 的电极x坐标，行依次对应a、b、m、n
+        y: 形状为 (4, n) 的电极y坐标（如地形高程），为None时只用x计算距离
+
+    Returns:
+        np.ndarray: 每个测量点的装置系数，电极重合或系数无穷大时为NaN
+    """
+    x = np.asarray(x, dtype=float)
+    y = None if y is None else np.asarray(y, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = np.zeros(x.shape[1])
+        for r, sign in _pair_distances(x, y):
+            total += sign / r
+        k = 2 * np.pi / total
+    k[~np.isfinite(k)] = np.nan
+    return k
+
+
+def apparent_resistivity(voltage, current, k):
+    """计算视电阻率 ρa = K · V / I
+
+    Args:
+        voltage: 测量电压
+        current: 供电电流
+        k: 装置系数
+
+    Returns:
+        np.ndarray: 视电阻率，电流为0时为NaN
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    current = np.asarray(current, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = np.asarray(k, dtype=float) * voltage / current
+    rho[~np.isfinite(rho)] = np.nan
+    return rho
+
+
+def median_depth(x, y=None, iterations=40, tolerance=1e-6, chunk_size=1_000_000):
+    """计算Edwards (1977) 中值探测深度，作为拟断面的伪深度
+
+    对均匀半空间，点电源对的深度灵敏度累积函数为 1 - r / sqrt(r² + 4z²)，
+    四极装置按AM、AN、BM、BN的符号叠加后，累积灵敏度达到一半处即为中值深度。
+    对所有测量点同时用带区间保护的牛顿法求解，按块处理以限制内存占用。
+
+    Args:
+        x: 形状为 (4, n) 的电极x坐标
+        y: 形状为 (4, n) 的电极y坐标，为None时只用x计算距离
+        iterations: 最大迭代次数
+        tolerance: 相对于装置长度的收敛精度
+        chunk_size: 每块处理的测量点数量
+
+    Returns:
+        np.ndarray: 每个测量点的中值深度，无法求解时为NaN
+    """
+    x = np.asarray(x, dtype=float)
+    y = None if y is None else np.asarray(y, dtype=float)
+    z = np.empty(x.shape[1])
+    for start in range(0, x.shape[1], chunk_size):
+        stop = start + chunk_size
+        z[start:stop] = _median_depth_chunk(
+            x[:, start:stop],
+            None if y is None else y[:, start:stop],
+            iterations,
+            tolerance
+        )
+    return z
+
+
+def _median_depth_chunk(x, y, iterations, tolerance):
+    """对一块测量点求解中值深度"""
+    pairs = _pair_distances(x, y)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 电极排列顺序不同会使K为负，统一到正方向求解
+        target = 0.5 * sum(sign / r for r, sign in pairs)
+        orientation = np.where(target < 0, -1.0, 1.0)
+        # 以最长的有限电极距作为深度尺度
+        scale = np.maximum.reduce([np.where(np.isfinite(r), r, 0.0) for r, _ in pairs])
+        active = np.isfinite(target) & (target != 0) & (scale > 0)
+
+    z = np.full(x.shape[1], np.nan)
+    idx = np.flatnonzero(active)
+    if idx.size == 0:
+        return z
+
+    # 在归一化单位 t = z / scale 下求解，只保留需要的列，避免每次迭代重复计算
+    scale = scale[idx]
+    target = np.abs(target[idx]) * scale
+    u = [(r[idx] / scale) ** 2 for r, _ in pairs]
+    w = [sign * orientation[idx] for _, sign in pairs]
+
+    lo = np.zeros(idx.size)
+    hi = np.full(idx.size, 4.0)
+    t = np.full(idx.size, 0.4)
+    result = np.empty(idx.size)
+    pending = np.arange(idx.size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(iterations):
+            # f(t) = Σ w / sqrt(u + 4t²) - target，随t单调递减
+            t2 = 4 * t * t
+            f = -target
+            df = np.zeros_like(t)
+            for u_k, w_k in zip(u, w):
+                d2 = u_k + t2
+                inv = 1 / np.sqrt(d2)
+                f = f + w_k * inv
+                df -= w_k * inv / d2
+            df *= 4 * t
+            lo = np.where(f > 0, t, lo)
+            hi = np.where(f > 0, hi, t)
+            step = t - f / df
+            t_new = np.where((step > lo) & (step < hi), step, 0.5 * (lo + hi))
+
+            # 已收敛的测量点写入结果并移出工作集
+            done = np.abs(t_new - t) <= tolerance
+            result[pending[done]] = t_new[done]
+            keep = ~done
+            if not keep.any():
+                break
+            pending = pending[keep]
+            t, lo, hi, target = t_new[keep], lo[keep], hi[keep], target[keep]
+            u = [u_k[keep] for u_k in u]
+            w = [w_k[keep] for w_k in w]
+        else:
+            result[pending] = t
+
+    z[idx] = result * scale
+    return z
+
+
+def geometry_groups(data):
+    """按四个电极编号的相对偏移对测量点分组
+
+    等间距测线上，相对偏移相同的四极装置系数和中值深度完全相同，
+    只需对每组计算一次。偏移超出编码范围时返回None。
+
+    Args:
+        data: 列式数据，包含a、b、m、n列
+
+    Returns:
+        tuple: (代表测量点的索引, 每个测量点所属组的索引)，无法分组时为None
+    """
+    columns = [_column(data, key) for key in ELECTRODE_COLUMNS]
+    n = max((len(column) for column in columns if column is not None), default=0)
+    nums = np.full((4, n), np.nan)
+    for row, column in enumerate(columns):
+        if column is not None:
+            nums[row] = column
+
+    if n == 0:
+        return None
+    valid = np.isfinite(nums)
+    ref = np.where(valid, nums, np.inf).min(axis=0)
+    if not np.all(np.isfinite(ref)):
+        return None
+    offsets = np.where(valid, nums - ref, _MISSING_OFFSET)
+    if np.where(valid, offsets, 0).max() >= _MISSING_OFFSET:
+        return None
+
+    # 四个16位偏移打包为一个64位整数
+    offsets = offsets.astype(np.uint64)
+    key = offsets[0] | (offsets[1] << np.uint64(16)) | (offsets[2] << np.uint64(32)) | (offsets[3] << np.uint64(48))
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return first, inverse
+
+
+# 相对偏移的编码上限，同时表示缺失的电极
+_MISSING_OFFSET = 0xFFFF
+
+
+def midpoint(x):
+    """计算四极装置的中点x坐标（忽略无穷远电极）
+
+    Args:
+        x: 形状为 (4, n) 的电极x坐标
+
+    Returns:
+        np.ndarray: 每个测量点的中点x坐标
+    """
+    x = np.asarray(x, dtype=float)
+    valid = np.isfinite(x)
+    with np.errstate(invalid="ignore"):
+        return np.where(valid, x, 0.0).sum(axis=0) / valid.sum(axis=0)
+
+
+def pseudosection(data, spacing=1.0, coordinates=None, voltage_key=None, current_key=None, **kwargs):
+    """根据电极编号计算整条测线的拟断面数据
+
+    Args:
+        data: 列式数据，包含a、b、m、n列
+        spacing: 电极间距
+        coordinates: 电极坐标表，格式见electrode_table
+        voltage_key: 电压列名，与current_key同时提供时计算视电阻率写入v
+        current_key: 电流列名
+        **kwargs: 其他传递给electrode_coordinates的参数
+
+    Returns:
+        dict: 在data基础上更新了x（中点）、y（中值深度）、k（装置系数）的新字典，
+            x、y、k均为NumPy数组，
+            提供电压和电流时v为视电阻率，可直接作为PlotlyScatterChart.init的data
+    """
+    x, y = electrode_coordinates(data, spacing=spacing, coordinates=coordinates, **kwargs)
+    electrode_y = y if coordinates is not None else None
+
+    result = dict(data)
+    result["x"] = midpoint(x)
+
+    # 等间距测线上按相对偏移分组，装置系数和中值深度每组只计算一次
+    groups = geometry_groups(data) if coordinates is None else None
+    if groups is not None:
+        first, inverse = groups
+        result["k"] = geometric_factor(x[:, first])[inverse]
+        result["y"] = median_depth(x[:, first])[inverse]
+    else:
+        result["k"] = geometric_factor(x, electrode_y)
+        result["y"] = median_depth(x, electrode_y)
+    if voltage_key and current_key:
+        result["v"] = apparent_resistivity(data[voltage_key], data[current_key], result["k"])
+    return result
+
+
+def pack_quadrupoles(a, b, m, n):
+    """将四个电极编号打包为一个64位整数键
+
+    每个编号占16位，缺失的电极（无穷远电极）编码为0xFFFF
+
+    Args:
+        a, b, m, n: 电极编号数组
+
+    Returns:
+        np.ndarray: uint64键数组，编号超出范围时抛出ValueError
+    """
+    key = np.zeros(len(a), dtype=np.uint64)
+    for shift, column in zip((0, 16, 32, 48), (a, b, m, n)):
+        column = np.asarray(column)
+        if column.dtype.kind not in "iuf":
+            column = np.asarray(column, dtype=float)
+        missing = ~np.isfinite(column) if column.dtype.kind == "f" else np.zeros(column.shape, dtype=bool)
+        column = np.where(missing, 0, column).astype(np.int64)
+        # 0xFFFF保留给缺失的电极，实际编号不能等于它
+        if column.size and (column.min() < 0 or column.max() >= _MISSING_OFFSET):
+            raise ValueError("电极编号超出0-65534的范围，无法打包")
+        column[missing] = _MISSING_OFFSET
+        key |= column.astype(np.uint64) << np.uint64(shift)
+    return key
+
+
+def _swap_bits(key, bits):
+    """交换64位整数键的高低两半"""
+    shift = np.uint64(bits)
+    return (key >> shift) | (key << shift)
+
+
+def _reverse_fields(key):
+    """将打包键 (a, b, m, n) 的四个16位字段反序为 (n, m, b, a)"""
+    mask = np.uint64(0x0000FFFF0000FFFF)
+    swapped = ((key & mask) << np.uint64(16)) | ((key >> np.uint64(16)) & mask)
+    return _swap_bits(swapped, 32)
+
+
+def reciprocal_index(data):
+    """为每个测量点查找其互易测量 (m, n, a, b)
+
+    基于打包键的哈希连接，时间复杂度O(n)。同时接受电极对整体反向的
+    (n, m, b, a)，两者的传输电阻相同。同一四极重复测量时取第一次。
+
+    Args:
+        data: 列式数据，包含a、b、m、n列
+
+    Returns:
+        np.ndarray: 每个测量点的互易测量点索引，没有互易测量时为-1
+    """
+    columns = [data.get(key) for key in ELECTRODE_COLUMNS]
+    count = max((len(column) for column in columns if column is not None), default=0)
+    a, b, m, n = [np.full(count, np.nan) if column is None else column for column in columns]
+    if count == 0:
+        return np.array([], dtype=np.int64)
+
+    # 哈希表在Index上缓存，唯一性检查和后续查找共用同一张表
+    normal = pack_quadrupoles(a, b, m, n)
+    table = pd.Index(normal)
+    if table.is_unique:
+        first = None
+    else:
+        first = np.flatnonzero(~table.duplicated())
+        table = pd.Index(normal[first])
+
+    # 互易键直接由打包键的位运算得到：(m, n, a, b) 为高低32位互换
+    partner = table.get_indexer(_swap_bits(normal, 32)).astype(np.int64)
+    # 只对未找到的测量点尝试 (n, m, b, a)，即四个16位字段整体反序
+    missing = np.flatnonzero(partner < 0)
+    if missing.size:
+        partner[missing] = table.get_indexer(_reverse_fields(normal[missing]))
+    if first is not None:
+        partner = np.where(partner >= 0, first[partner], -1)
+
+    # 对称装置的"互易"就是自身，不算作互易测量
+    partner[partner == np.arange(count)] = -1
+    return partner
+
+
+def reciprocal_error(data, value_key="v", partner=None):
+    """计算每个测量点的互易误差（百分比）
+
+    误差 = |R正 - R互| / |(R正 + R互) / 2| × 100，
+    互易测量的装置系数相同，因此既可以用电阻也可以用视电阻率计算
+
+    Args:
+        data: 列式数据，包含a、b、m、n列和value_key列
+        value_key: 用于比较的数值列名
+        partner: 预先计算好的reciprocal_index结果
+
+    Returns:
+        tuple: (误差数组, 互易测量点索引数组)，没有互易测量的点误差为NaN
+    """
+    if partner is None:
+        partner = reciprocal_index(data)
+    values = np.asarray(data.get(value_key, []), dtype=float)
+    error = np.full(len(partner), np.nan)
+    has_partner = partner >= 0
+    normal = values[has_partner]
+    reciprocal = values[partner[has_partner]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        error[has_partner] = np.abs(normal - reciprocal) / np.abs((normal + reciprocal) / 2) * 100
+    return error, partner
+
+
+def _searchsorted_sorted(haystack, needles, chunk_size=4096):
+    """与np.searchsorted(haystack, needles)相同，needles也已排序
+
+    每块查询只落在haystack的一小段中，在这一段内二分查找可以留在CPU缓存中，比整体查找快约一倍
+    """
+    n = len(needles)
+    result = np.empty(n, dtype=np.intp)
+    if n == 0:
+        return result
+    firsts = np.searchsorted(haystack, needles[::chunk_size])
+    lasts = np.searchsorted(haystack, needles[chunk_size - 1::chunk_size], side="right")
+    lasts = np.append(lasts, len(haystack))
+    for k, start in enumerate(range(0, n, chunk_size)):
+        low, high = firsts[k], lasts[k]
+        result[start:start + chunk_size] = low + np.searchsorted(haystack[low:high], needles[start:start + chunk_size])
+    return result
+
+
+def neighborhood_index(rows, x, half_window=2, across_rows=True, cross_window=1):
+    """构建每个测量点的邻域索引矩阵，用于按行的稳健统计
+
+    同一行（拟断面的同一层）内按x排序，取前后half_window个点；
+    启用跨行时，再取相邻两行中x最近的点及其前后cross_window个点。
+    邻域只依赖测点几何位置，可以缓存后对不同的数值重复使用。
+
+    Args:
+        rows: 每个测量点所在的行（层级）
+        x: 每个测量点的x坐标
+        half_window: 同一行内的半窗口大小
+        across_rows: 是否包含相邻行的点
+        cross_window: 相邻行中最近点两侧各取的点数
+
+    Returns:
+        np.ndarray: 形状为 (n, W) 的整数索引矩阵，第0列为点自身，缺失的邻居为-1；
+            矩阵按列存储（Fortran顺序），robust_residuals按块读取时每一列连续
+    """
+    rows = np.asarray(rows, dtype=float)
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if n == 0:
+        return np.empty((0, 1), dtype=np.int32)
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+
+    # 行秩加上归一化到 [0, 0.5] 的x构成单调键，按键排序即按 (行, x) 排序，
+    # 同一个键也用于在相邻行中查找x最近的点；NaN行排在最后，与np.unique一致
+    if np.all(rows[1:] >= rows[:-1]):
+        # 已按行排列（不含NaN）时行秩就是取值变化次数的累加
+        level_rank = np.concatenate(([0], np.cumsum(rows[1:] != rows[:-1])))
+    else:
+        codes, levels = pd.factorize(rows, sort=True)
+        level_rank = np.where(codes < 0, len(levels), codes)
+    finite = np.isfinite(x)
+    x_min = x[finite].min() if finite.any() else 0.0
+    x_span = (x[finite].max() - x_min) if finite.any() else 1.0
+    x_norm = np.where(finite, (x - x_min) / (x_span or 1.0) * 0.5, 0.0)
+    key = level_rank + x_norm
+    if np.all(key[1:] >= key[:-1]):
+        # 已按 (行, x) 排列的数据（常见的测量文件顺序）不需要排序
+        order = None
+        rank = level_rank
+    else:
+        order = np.argsort(key)
+        tied = key[order[1:]] == key[order[:-1]]
+        if tied.any():
+            # 键相同的点按原始顺序排列（与稳定排序一致），只对这些点按 (组号, 原始索引) 再排序
+            group = np.cumsum(np.concatenate(([True], ~tied)))
+            in_run = np.flatnonzero(np.concatenate(([False], tied)) | np.concatenate((tied, [False])))
+            order[in_run] = np.sort(group[in_run] * n + order[in_run]) % n
+        key = key[order]
+        rank = level_rank[order]
+        x_norm = x_norm[order]
+    row_count = int(rank[-1]) + 1
+    counts = np.bincount(rank, minlength=row_count)
+    ends = np.cumsum(counts).astype(dtype)
+    starts = ends - counts.astype(dtype)
+    row_start = np.repeat(starts, counts)
+    row_end = np.repeat(ends, counts)
+
+    width = 1 + 2 * half_window + (2 * (2 * cross_window + 1) if across_rows and row_count > 1 else 0)
+    # 先在排序域中按列填写邻居的位置，无效处为-1
+    columns = np.empty((width, n), dtype=dtype)
+    columns[0] = np.arange(n, dtype=dtype)
+
+    def put(column, pos, valid):
+        np.putmask(pos, ~valid, -1)
+        columns[column] = pos
+
+    column = 1
+    for offset in range(1, half_window + 1):
+        before = np.arange(-offset, n - offset, dtype=dtype)
+        put(column, before, before >= row_start)
+        after = np.arange(offset, n + offset, dtype=dtype)
+        put(column + 1, after, after < row_end)
+        column += 2
+
+    if across_rows and row_count > 1:
+        row_ranks = np.arange(row_count)
+        for direction in (-1, 1):
+            inside = (rank > 0) if direction < 0 else (rank < row_count - 1)
+            target_rank = np.clip(row_ranks + direction, 0, row_count - 1)
+            target_start = np.repeat(starts[target_rank], counts)
+            target_end = np.repeat(ends[target_rank], counts)
+            # 目标行中第一个x不小于该点的位置，位于目标行内或为目标行的末尾，目标行至少有一个点
+            query = (rank + direction) + x_norm
+            right = _searchsorted_sorted(key, query).astype(dtype)
+            left = right - 1
+            right_gap = key[np.minimum(right, n - 1)] - query
+            left_gap = query - key[np.maximum(left, 0)]
+            use_right = (right < target_end) & ((right == target_start) | (right_gap < left_gap))
+            nearest = np.where(use_right, right, left)
+            for offset in range(-cross_window, cross_window + 1):
+                pos = nearest + dtype(offset)
+                put(column, pos, inside & (pos >= target_start) & (pos < target_end))
+                column += 1
+
+    if order is not None:
+        # 位置换算为原始索引（-1取到末尾追加的-1），再按逆排列把各列放回原始点顺序
+        lookup = np.append(order.astype(dtype), dtype(-1))
+        inverse = np.empty(n, dtype=dtype)
+        inverse[order] = np.arange(n, dtype=dtype)
+        columns = np.take(lookup[columns], inverse, axis=1)
+    return columns.T
+
+
+def _sorting_network(width):
+    """Batcher奇偶归并排序网络的比较器 [(i, j), ...]，i < j
+
+    按不小于width的2的幂构造，去掉涉及width及以后位置的比较器（相当于末尾补+inf）
+    """
+    size = 1
+    while size < width:
+        size *= 2
+    pairs = []
+    p = 1
+    while p < size:
+        k = p
+        while k >= 1:
+            for j in range(k % p, size - k, 2 * k):
+                for i in range(min(k, size - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p) and i + j + k < width:
+                        pairs.append((i + j, i + j + k))
+            k //= 2
+        p *= 2
+    return pairs
+
+
+def _sort_rows(rows, pairs, spare):
+    """用排序网络对等长数组逐位置排序，完成后rows[k]为每个位置第k小的值
+
+    每个比较器只是一次np.minimum和一次np.maximum，比对 (m, W) 矩阵按行np.sort快得多
+
+    Returns:
+        np.ndarray: 新的备用数组
+    """
+    for i, j in pairs:
+        np.minimum(rows[i], rows[j], out=spare)
+        np.maximum(rows[i], rows[j], out=rows[j])
+        rows[i], spare = spare, rows[i]
+    return spare
+
+
+def _sorted_median(rows):
+    """已排序的rows逐位置取有效值的中位数，无效值为+inf（排在末尾），没有有效值时为NaN"""
+    width = len(rows)
+    if width % 2:
+        median = rows[width // 2].copy()
+    else:
+        median = (rows[width // 2 - 1] + rows[width // 2]) / 2
+    # 最大值为+inf的位置有无效值，按有效值个数单独取中位数
+    partial = np.flatnonzero(rows[-1] == np.inf)
+    if partial.size:
+        ordered = np.stack([row[partial] for row in rows])
+        valid = np.count_nonzero(ordered < np.inf, axis=0)
+        columns = np.arange(partial.size)
+        lower = ordered[np.maximum((valid - 1) // 2, 0), columns]
+        upper = ordered[valid // 2, columns]
+        median[partial] = np.where(valid > 0, (lower + upper) / 2, np.nan)
+    return median
+
+
+def robust_residuals(values, neighbors, log=True, exclude=None, min_scale=1.0, chunk_size=1 << 15):
+    """计算每个点相对邻域中位数的稳健残差（Hampel滤波）
+
+    残差 = (值 - 邻域中位数) / (1.4826 × 邻域MAD)，
+    邻域MAD低于全局典型值的min_scale倍时使用该下限，避免平坦区域误判
+
+    Args:
+        values: 测量值，如视电阻率v
+        neighbors: neighborhood_index返回的索引矩阵
+        log: 是否在log10域中计算（电阻率跨越多个数量级时推荐）
+        exclude: 布尔数组，为True的点不参与邻域统计（如已隐藏的点）
+        min_scale: 尺度下限相对于全局中位尺度的比例
+        chunk_size: 每块的点数，块内的邻域值可以留在CPU缓存中
+
+    Returns:
+        np.ndarray: 每个点的稳健残差，无法计算时为NaN
+    """
+    values = np.asarray(values, dtype=float)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0, np.log10(values), np.nan)
+
+    # float32足以判断离群点；无效值和排除的点记为+inf，排序后位于末尾，
+    # 缺失的邻居（-1）取到末尾追加的+inf
+    own = values.astype(np.float32)
+    own[~np.isfinite(own)] = np.inf
+    pool = np.append(own, np.float32(np.inf))
+    if exclude is not None:
+        pool[:-1][np.asarray(exclude, dtype=bool)] = np.inf
+
+    n, width = neighbors.shape
+    pairs = _sorting_network(width)
+    median = np.empty(n, dtype=np.float32)
+    mad = np.empty(n, dtype=np.float32)
+    spare = np.empty(min(chunk_size, n), dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        block = slice(start, start + chunk_size)
+        window = pool.take(neighbors[block].T)
+        # 点自身始终参与统计
+        window[0] = own[block]
+        rows = list(window)
+        spare = _sort_rows(rows, pairs, spare[:window.shape[1]])
+        median[block] = center = _sorted_median(rows)
+        # 无效值的偏差仍为+inf
+        for row in rows:
+            np.abs(np.subtract(row, center, out=row), out=row)
+        spare = _sort_rows(rows, pairs, spare)
+        mad[block] = _sorted_median(rows)
+
+    scale = 1.4826 * mad.astype(float)
+    positive = scale[scale > 0]
+    typical = np.median(positive) if positive.size else 1.0
+    scale = np.maximum(np.nan_to_num(scale, nan=typical), min_scale * typical)
+    return (values - median) / scale
+
+
+def level_column(data, level_key=None):
+    """选择表示拟断面层级的列
+
+    优先使用row列；如果row的取值几乎各不相同（只是测点序号），
+    则退回到伪深度y，同一伪深度的测点属于同一层
+
+    Args:
+        data: 列式数据
+        level_key: 指定的层级列名，为None时自动选择
+
+    Returns:
+        np.ndarray: 每个测量点的层级值
+    """
+    if level_key is not None:
+        return np.asarray(data.get(level_key), dtype=float)
+    rows = data.get("row")
+    if rows is not None and len(rows) > 0:
+        rows = np.asarray(rows, dtype=float)
+        if len(pd.unique(rows)) <= len(rows) // 2:
+            return rows
+    return np.asarray(data.get("y"), dtype=float)
+
+
+def detect_outliers(data, threshold=3.5, value_key="v", log=True, neighbors=None, exclude=None,
+                    level_key=None, **kwargs):
+    """按层检测离群的测量点
+
+    Args:
+        data: 列式数据，包含x、value_key列以及row或y列
+        threshold: 稳健残差的绝对值阈值
+        value_key: 测量值列名
+        log: 是否在log10域中计算
+        neighbors: 预先计算的邻域索引矩阵，为None时根据层级和x计算
+        exclude: 不参与邻域统计的点
+        level_key: 层级列名，为None时见level_column
+        **kwargs: 其他传递给neighborhood_index的参数
+
+    Returns:
+        tuple: (离群点布尔数组, 稳健残差数组)
+    """
+    if neighbors is None:
+        neighbors = neighborhood_index(level_column(data, level_key), data.get("x"), **kwargs)
+    residuals = robust_residuals(data.get(value_key), neighbors, log=log, exclude=exclude)
+    with np.errstate(invalid="ignore"):
+        return np.abs(residuals) > threshold, residuals
+
+
+# 时移变化图使用的发散色阶，0附近为白色
+DIVERGING_COLORSCALE = [
+    [0, 'rgb(5,48,97)'],
+    [0.1, 'rgb(33,102,172)'],
+    [0.2, 'rgb(67,147,195)'],
+    [0.3, 'rgb(146,197,222)'],
+    [0.4, 'rgb(209,229,240)'],
+    [0.5, 'rgb(247,247,247)'],
+    [0.6, 'rgb(253,219,199)'],
+    [0.7, 'rgb(244,165,130)'],
+    [0.8, 'rgb(214,96,77)'],
+    [0.9, 'rgb(178,24,43)'],
+    [1, 'rgb(103,0,31)'],
+]
+
+
+def grid_from_points(x, y, z):
+    """把位于规则行列上的散点转换为等值线图的网格数据
+
+    x、y各自取唯一值作为网格轴，没有数据的网格为NaN
+
+    Args:
+        x: 点的x坐标
+        y: 点的y坐标
+        z: 点的数值
+
+    Returns:
+        dict: {x, y, z, zmin, zmax}，格式同plotlyContourData.json，z为形状 (len(y), len(x)) 的数组
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+    x_axis, ix = np.unique(x, return_inverse=True)
+    y_axis, iy = np.unique(y, return_inverse=True)
+    grid = np.full((len(y_axis), len(x_axis)), np.nan)
+    grid[iy, ix] = z
+    finite = np.isfinite(z)
+    return {
+        "x": x_axis,
+        "y": y_axis,
+        "z": grid,
+        "zmin": float(z[finite].min()) if finite.any() else None,
+        "zmax": float(z[finite].max()) if finite.any() else None
+    }
+
+
+class TimeLapse:
+    """
+    时移（监测）数据分析
+    以基准期数据建立一次哈希索引，之后每一期数据只需一次查找即可与基准期对齐，
+    相邻两期测量序列相同时直接复用上一次的对齐结果
+    """
+
+    MODES = ("percent", "ratio", "difference")
+
+    def __init__(self, baseline, key="quadrupole", value_key="v"):
+        """
+        初始化时移分析
+
+        参数:
+            baseline: 基准期的列式数据，格式同plotlyData.json
+            key: 对齐方式，"quadrupole" 按 (a,b,m,n) 对齐，"id" 按测量id对齐
+            value_key: 参与比较的数值列名
+        """
+        if key not in ("quadrupole", "id"):
+            raise ValueError(f"不支持的对齐方式: {key}")
+        self.baseline = baseline
+        self.key = key
+        self.value_key = value_key
+        self.baseline_values = np.asarray(baseline.get(value_key), dtype=float)
+
+        keys = self._keys(baseline)
+        index = pd.Index(keys)
+        if index.is_unique:
+            self._first = None
+        else:
+            # 同一四极重复测量时取第一次
+            self._first = np.flatnonzero(~index.duplicated())
+            index = pd.Index(keys[self._first])
+        self._index = index
+        self._last_keys = None
+        self._last_alignment = None
+
+    def _keys(self, data):
+        """计算数据的对齐键"""
+        if self.key == "id":
+            return np.asarray(data.get("id"))
+        return pack_quadrupoles(*(data.get(column) for column in ELECTRODE_COLUMNS))
+
+    def align(self, epoch):
+        """将某一期数据与基准期对齐
+
+        Args:
+            epoch: 该期的列式数据
+
+        Returns:
+            np.ndarray: 该期每个测量点对应的基准期索引，基准期中没有时为-1
+        """
+        keys = self._keys(epoch)
+        if self._last_keys is not None and np.array_equal(keys, self._last_keys):
+            return self._last_alignment
+
+        alignment = self._index.get_indexer(keys).astype(np.int64)
+        if self._first is not None:
+            alignment = np.where(alignment >= 0, self._first[alignment], -1)
+        self._last_keys = keys
+        self._last_alignment = alignment
+        return alignment
+
+    def change(self, epoch, mode="percent"):
+        """计算某一期相对基准期的变化
+
+        Args:
+            epoch: 该期的列式数据
+            mode: "percent" 百分比变化，"ratio" 比值，"difference" 差值
+
+        Returns:
+            np.ndarray: 每个测量点的变化量，基准期中没有对应测量时为NaN
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的变化类型: {mode}")
+
+        alignment = self.align(epoch)
+        values = np.asarray(epoch.get(self.value_key), dtype=float)
+        matched = alignment >= 0
+        base = np.full(len(values), np.nan)
+        base[matched] = self.baseline_values[alignment[matched]]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if mode == "percent":
+                result = (values - base) / base * 100
+            elif mode == "ratio":
+                result = values / base
+            else:
+                result = values - base
+        result[~np.isfinite(result)] = np.nan
+        return result
+
+    def _color_range(self, values, mode, limit):
+        """计算以无变化为中心的对称颜色范围"""
+        center = 1.0 if mode == "ratio" else 0.0
+        if limit is None:
+            finite = values[np.isfinite(values)]
+            limit = float(np.abs(finite - center).max()) if finite.size else 0.0
+        # 没有变化时保留一个非零范围，避免颜色范围退化
+        limit = limit or 1.0
+        return center - limit, center + limit
+
+    def scatter_options(self, epoch, mode="percent", limit=None, layout=None):
+        """生成可直接传给PlotlyScatterChart.init的配置
+
+        Args:
+            epoch: 该期的列式数据
+            mode: 变化类型，见change
+            limit: 颜色范围相对中心的半宽，为None时取最大变化量
+            layout: 布局配置
+
+        Returns:
+            dict: {data, style, layout}，v为变化量，基准期中没有的测量点被隐藏
+        """
+        values = self.change(epoch, mode)
+        cmin, cmax = self._color_range(values, mode, limit)
+        visible = np.asarray(epoch.get("visible", np.zeros(len(values))))
+        data = dict(epoch)
+        data["v"] = values
+        data["visible"] = np.where(np.isnan(values), 1, visible if visible.size else 0)
+        return {
+            "data": data,
+            "style": {"colorscale": DIVERGING_COLORSCALE, "cmin": cmin, "cmax": cmax},
+            "layout": dict(layout or {})
+        }
+
+    def contour_options(self, epoch, mode="percent", limit=None, layout=None, style=None):
+        """生成可直接传给PlotlyContourChart.init的配置
+
+        Args:
+            epoch: 该期的列式数据，点位于规则的行列上
+            mode: 变化类型，见change
+            limit: 颜色范围相对中心的半宽，为None时取最大变化量
+            layout: 布局配置
+            style: 其他样式配置
+
+        Returns:
+            dict: {data, style, layout}
+        """
+        values = self.change(epoch, mode)
+        data = grid_from_points(epoch.get("x"), epoch.get("y"), values)
+        data["zmin"], data["zmax"] = self._color_range(values, mode, limit)
+        contour_style = {"colorscale": DIVERGING_COLORSCALE}
+        contour_style.update(style or {})
+        return {"data": data, "style": contour_style, "layout": dict(layout or {})}
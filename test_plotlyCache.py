@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from plotlyCache import LoaderCache, _read_json
+
+
+def _write(path, data, mtime_offset=0):
+    """写入JSON文件，mtime_offset（秒）用于确保修改时间变化"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    if mtime_offset:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset * 10 ** 9))
+
+
+def test_hits_and_invalidation(tmp_path):
+    path = str(tmp_path / "data.json")
+    _write(path, {"x": [1, 2, 3], "name": "a"})
+    cache = LoaderCache()
+    first = cache.load(path, _read_json)
+    assert cache.load(path, _read_json) is first
+    assert cache.stats()["hits"] == 1
+
+    # 共享结果只读，复制后可以修改
+    with pytest.raises(TypeError):
+        first["name"] = "b"
+    with pytest.raises(TypeError):
+        first["x"].append(4)
+    # 与json.load的结果类型兼容
+    assert isinstance(first, dict) and isinstance(first["x"], list) and first["x"] == [1, 2, 3]
+    copy = first.copy()
+    copy["name"] = "b"
+
+    _write(path, {"x": [4], "name": "c"}, mtime_offset=1)
+    second = cache.load(path, _read_json)
+    assert second == {"x": [4], "name": "c"}
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["entries"] == 1
+
+
+def test_projection_and_budget(tmp_path):
+    paths = []
+    for index in range(3):
+        paths.append(str(tmp_path / f"{index}.json"))
+        _write(paths[-1], {"values": list(range(1000)), "other": index})
+    cache = LoaderCache(max_bytes=80000)
+    for path in paths:
+        assert cache.load(path, _read_json, "other") in (0, 1, 2)
+        assert len(cache.load(path, _read_json, "values")) == 1000
+    stats = cache.stats()
+    assert stats["bytes"] <= 80000 and stats["evictions"] > 0
+
+
+def test_edit_during_load_is_reloaded(tmp_path):
+    path = str(tmp_path / "data.json")
+    _write(path, {"v": 1})
+    calls = []
+
+    def editing_loader(path, projection):
+        data = _read_json(path, projection)
+        if not calls:
+            # 读取完成后、缓存之前文件被修改
+            _write(path, {"v": 2}, mtime_offset=1)
+        calls.append(data)
+        return data
+
+    cache = LoaderCache()
+    assert cache.load(path, editing_loader)["v"] == 2
+    assert cache.load(path, _read_json)["v"] == 2
+    assert len(calls) == 2
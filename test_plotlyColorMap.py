@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from plotlyColorMap import ColorMap, LogScale, parse_color
+
+
+def test_parse_color():
+    assert parse_color("#f00") == (255.0, 0.0, 0.0, 1.0)
+    assert parse_color("#00ff0080") == (0.0, 255.0, 0.0, 128 / 255)
+    assert parse_color("rgb(1, 2, 3)") == (1.0, 2.0, 3.0, 1.0)
+    # 透明度大于1时按0-255处理
+    assert parse_color("rgba(126,84,255,255)") == (126.0, 84.0, 255.0, 1.0)
+    assert parse_color((1, 2, 3)) == (1.0, 2.0, 3.0, 1.0)
+    with pytest.raises(ValueError):
+        parse_color("red")
+
+
+def test_map_matches_interpolation():
+    rng = np.random.default_rng(4)
+    # 间距很不均匀的停止点，一个桶内包含多个停止点
+    values = np.sort(np.concatenate([[0.0, 1000.0], rng.random(30) * 0.05, rng.random(10) * 1000]))
+    colors = rng.integers(0, 256, (len(values), 4))
+    stops = [[v, f"rgba({r},{g},{b},{a})"] for v, (r, g, b, a) in zip(values, colors)]
+    colormap = ColorMap(stops)
+    rgba = np.array([parse_color(color) for _, color in stops])
+    rgba[:, 3] = np.where(colors[:, 3] > 1, colors[:, 3], colors[:, 3] * 255)
+
+    samples = np.concatenate([rng.random(5000) * 1000, rng.random(2000) * 0.05, values, [-5.0, 2000.0, np.nan]])
+    result = colormap.map(samples, chunk_size=777)
+    clipped = np.clip(samples[:-1], 0, 1000)
+    expected = np.stack([np.interp(clipped, values, rgba[:, k]) for k in range(4)], axis=1)
+    assert result.dtype == np.uint8 and np.abs(result[:-1].astype(float) - expected).max() <= 1
+    # NaN为全透明
+    assert result[-1].tolist() == [0, 0, 0, 0]
+
+    discrete = colormap.map(samples[:-1], discrete=True)
+    index = np.clip(np.searchsorted(values, clipped, side="right") - 1, 0, len(values) - 2)
+    assert np.array_equal(discrete, np.rint(rgba[index]).astype(np.uint8))
+    assert colormap.map(np.zeros((2, 3))).shape == (2, 3, 4)
+
+
+def test_colorscale_and_segments():
+    colormap = ColorMap.from_colorscale([[0, "#000000"], [0.5, "#ff0000"], [1, "#ffffff"]], vmin=10, vmax=30)
+    assert colormap.color_stops()[1] == [20.0, "rgba(255,0,0,1)"]
+    assert colormap.css([15]) == ["rgba(128,0,0,1)"]
+    assert [pos for pos, _ in colormap.colorscale()] == [0.0, 0.5, 1.0]
+    assert [pos for pos, _ in colormap.colorscale(discrete=True)] == [0.0, 0.5, 0.5, 1.0]
+    segments = colormap.segments(count=4)
+    assert len(segments) == 4 and segments[0][:2] == (10.0, 15.0)
+    assert len(ColorMap([[0, "#000"], [1, "#fff"]], discrete=True).segments()) == 1
+    assert len(ColorMap.from_colorscale("Viridis")) == 10
+    with pytest.raises(ValueError):
+        ColorMap([[0, "#000"]])
+
+
+def test_log_scale():
+    log = LogScale(levels_per_decade=2)
+    values = np.array([1.0, 100.0, 0.0, -5.0, np.nan])
+    result = log.transform(values)
+    assert np.array_equal(result, [0.0, 2.0, np.nan, np.nan, np.nan], equal_nan=True)
+    # 同一个数组只计算一次，结果只读
+    assert log.transform(values) is result and not result.flags.writeable
+    assert log.transform(values.copy()) is not result
+
+    assert LogScale.to_log(1000) == 3.0 and LogScale.to_log(0) is None and LogScale.from_log(2) == 100.0
+    assert log.levels(0.2, 2.9) == {"start": 0.5, "end": 2.5, "size": 0.5}
+    positions, labels = LogScale.ticks(0.0, 2.0)
+    assert labels == ["1", "2", "5", "10", "20", "50", "100"] and np.allclose(positions, np.log10([1, 2, 5, 10, 20, 50, 100]))
+    assert LogScale.ticks(-1.0, 5.0)[1] == ["0.1", "1", "10", "100", "1000", "10000", "100000"]
+
+    # 对数颜色映射在log10空间插值，颜色段的起止值仍为实际值
+    colormap = ColorMap([[1, "#000000"], [100, "#ffffff"]])
+    assert colormap.log10().css([1.0]) == ["rgba(128,128,128,1)"]
+    segments = colormap.segments(count=2, log=True)
+    assert np.allclose([segment[1] for segment in segments], [10.0, 100.0])
@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+
+from plotlyCache import load_json
+from plotlyContour import PlotlyContourChart
+
+SHAPE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plotlyContourShape.json")
+
+
+def _chart():
+    """覆盖示例形状范围的线性网格，z = x - y"""
+    x = np.linspace(0, 130, 131)
+    y = np.linspace(-30, 0, 31)
+    chart = PlotlyContourChart()
+    chart.init({"data": {"x": x, "y": y, "z": np.subtract.outer(-y, -x)}})
+    return chart
+
+
+def test_log_scale_round_trip():
+    chart = PlotlyContourChart()
+    z = np.array([[1.0, 10.0, 100.0], [1000.0, 0.0, 50.0]])
+    chart.init({"data": {"x": np.arange(3.0), "y": np.arange(2.0), "z": z, "zmin": 1.0, "zmax": 1000.0}})
+    assert chart.set_log_scale(True, levels_per_decade=2)
+    trace = chart.fig.data[0]
+    assert np.array_equal(trace.z, np.log10(np.where(z > 0, z, np.nan)), equal_nan=True)
+    assert (trace.zmin, trace.zmax) == (0.0, 3.0) and trace.contours.size == 0.5
+    assert list(trace.colorbar.ticktext) == ["1", "2", "5", "10", "20", "50", "100", "200", "500", "1000"]
+    # 查询仍返回实际值
+    assert chart.query([2.0], [0.0])["z"][0] == 100.0
+
+    assert chart.set_log_scale(False)
+    trace = chart.fig.data[0]
+    assert np.array_equal(trace.z, z) and (trace.zmin, trace.zmax) == (1.0, 1000.0) and trace.customdata is None
+
+
+def test_cached_shapes():
+    # 缓存返回只读的形状，顶点序列不能被当作 (xs, ys)
+    chart = _chart()
+    shapes = load_json(SHAPE_FILE)
+    for key in ("polyline", "polygon", "polygon1"):
+        assert chart.initShape(shapes[key]) == shapes[key]["id"]
+
+    stats = chart.zonal_statistics()
+    assert set(stats) == {shapes["polygon"]["id"], shapes["polygon1"]["id"]}
+    assert all(item["cells"] > 0 for item in stats.values())
+
+    profile = chart.sample_along(shapes["polyline"]["id"], 1.0)
+    assert profile is not None and np.all(profile["inside"])
+    assert np.allclose(profile["z"], profile["x"] - profile["y"])
+
+    chart.blank(shape_id=shapes["polygon"]["id"], trim=False)
+    z = np.asarray(chart.fig.data[0].z, dtype=float)
+    assert 0 < np.isfinite(z).sum() < z.size
+
+
+def test_query():
+    chart = _chart()
+    xs = np.array([10.5, 60.25, -1.0, 130.0])
+    ys = np.array([-0.5, -20.75, -5.0, -30.0])
+    result = chart.query(xs, ys)
+    assert result["inside"].tolist() == [True, True, False, True]
+    assert np.allclose(result["z"][result["inside"]], (xs - ys)[result["inside"]])
+    nearest = chart.query(xs, ys, method="nearest")
+    # 恰好位于两个节点中间时取后一个节点
+    assert np.array_equal(nearest["z"], [11.0, 81.0, np.nan, 160.0], equal_nan=True)
+    assert chart.query(xs, ys, method="cubic") is None
+    assert chart.query(xs, ys[:2]) is None
+
+    # 缩减视图下仍查询原始分辨率的网格，空值网格返回NaN
+    chart.show_window(max_cells=100)
+    assert np.allclose(chart.query(xs[:2], ys[:2])["z"], (xs - ys)[:2])
+    chart.blank(points=([0, 50, 50, 0], [-30, -30, 0, 0]), trim=False)
+    result = chart.query([20.5, 70.5], [-3.5, -3.5])
+    assert result["valid"].tolist() == [True, False] and result["inside"].all()
+
+
+def test_pyramid_views(tmp_path):
+    chart = _chart()
+    pyramid = chart.build_pyramid()
+    assert chart.build_pyramid() is pyramid and len(pyramid) > 2
+
+    level = chart.show_window(x_range=[0, 130], y_range=[-30, 0], max_cells=1000)
+    assert level > 0 and np.asarray(chart.fig.data[0].z).size <= 1000 * 4
+    assert chart.fig.layout.xaxis.range == (0, 130)
+    chart.reset_view()
+    assert np.asarray(chart.fig.data[0].z).shape == (31, 131) and chart.build_pyramid() is pyramid
+
+    # 按大小上限保存的HTML使用缩减的网格，图表本身不变
+    full = tmp_path / "full.html"
+    small = tmp_path / "small.html"
+    assert chart.save_as_html(str(full)) and chart.save_as_html(str(small), size_budget=5000)
+    assert chart.level_for_size(5000) > 0 and small.stat().st_size < full.stat().st_size
+    assert np.asarray(chart.fig.data[0].z).shape == (31, 131)
+
+
+def test_sample_along_several_lines():
+    chart = _chart()
+    lines = [([10, 40], [-10, -10]), [{"x": 0, "y": 0}, {"x": 0, "y": -30}], ([120, 140], [-5, -5])]
+    profiles = chart.sample_along(lines, 2.0, show_profile=True)
+    assert len(profiles) == 3
+    assert np.allclose(profiles[0]["z"], profiles[0]["x"] + 10) and profiles[0]["distance"][-1] == 30
+    assert np.allclose(profiles[1]["z"], -profiles[1]["y"])
+    # 超出网格的部分为NaN
+    assert profiles[2]["inside"].tolist() == [True] * 6 + [False] * 5
+    assert np.isnan(profiles[2]["z"][~profiles[2]["inside"]]).all()
+    # 剖面绘制在下方的子图中
+    assert sum(trace.yaxis == "y2" for trace in chart.fig.data) == 3
+
+
+def test_blank_pseudosection_footprint():
+    # 拟断面的梯形数据范围：每层两侧各收缩10
+    chart = _chart()
+    xs = np.concatenate([np.arange(10 * level, 131 - 10 * level, 5.0) for level in range(4)])
+    ys = np.concatenate([np.full(len(np.arange(10 * level, 131 - 10 * level, 5.0)), -10.0 * level) for level in range(4)])
+    blanked = chart.blank(points={"x": xs, "y": ys}, hull="concave")
+    z = np.asarray(chart.fig.data[0].z, dtype=float)
+    x = np.asarray(chart.fig.data[0].x, dtype=float)
+    y = np.asarray(chart.fig.data[0].y, dtype=float)
+    # 包络外的三角形区域被白化，整行为空的部分被裁掉
+    assert blanked > 0 and y.min() == -30 and np.isfinite(z).sum() + blanked == 131 * 31
+    row = np.flatnonzero(y == -30)[0]
+    assert np.array_equal(np.isfinite(z[row]), (x >= 30) & (x <= 100))
+    assert chart.blank(points=(xs, ys), hull="star") is None
+
+    chart.clear_blanking()
+    assert np.isfinite(np.asarray(chart.fig.data[0].z, dtype=float)).all()
+
+
+def test_blank_outside_grid_keeps_z():
+    # 边界与网格不相交时不白化全部网格
+    chart = _chart()
+    before = np.array(chart.fig.data[0].z, dtype=float)
+    assert chart.blank(points=([1000, 1100, 1050], [0, 0, 50])) is None
+    assert np.array_equal(np.asarray(chart.fig.data[0].z, dtype=float), before)
+
+    assert chart.blank(points=([0, 60, 60, 0], [-30, -30, 0, 0])) > 0
+    z = np.asarray(chart.fig.data[0].z, dtype=float)
+    assert np.isfinite(z).all() and z.shape == (31, 61)
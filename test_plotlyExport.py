@@ -0,0 +1,63 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from plotlyExport import TileScheme, _data_points, _tile_base, apply_frame, build_animation
+
+
+def test_animation_frames_carry_only_deltas():
+    fig = go.Figure(go.Scatter(x=[0, 1, 2], y=[0, 0, 0], mode="markers", marker={"color": [1, 2, 3], "size": 8}))
+    build_animation(fig, [{"marker": {"color": [4, 5, 6]}}, {"marker": {"color": [7, 8, 9]}}],
+                    names=["2024", "2025"], titles=["第一期", "第二期"], redraw=False)
+    assert [frame.name for frame in fig.frames] == ["2024", "2025"]
+    assert [step["label"] for step in fig.layout.sliders[0].steps] == ["2024", "2025"]
+    frame = fig.frames[1].to_plotly_json()
+    # 帧中不重复保存坐标和其他标记属性
+    assert frame["data"][0]["marker"] == {"color": [7, 8, 9]} and "x" not in frame["data"][0]
+
+    spec = fig.to_plotly_json()
+    spec.pop("frames")
+    rendered = apply_frame(spec, frame)
+    assert rendered["data"][0]["marker"]["color"] == [7, 8, 9] and rendered["data"][0]["marker"]["size"] == 8
+    assert rendered["layout"]["title"]["text"] == "第二期"
+    # 基础图表字典不被修改
+    assert list(spec["data"][0]["marker"]["color"]) == [1, 2, 3] and "title" not in spec["layout"]
+
+    # 名称数量不一致时不添加帧
+    assert len(build_animation(go.Figure(go.Scatter(x=[0])), [{}], names=["a", "b"]).frames) == 0
+
+
+def test_tile_extent_and_profile_axes():
+    # 等值线在主坐标轴上，剖面线绘制在xaxis2/yaxis2上，不计入瓦片范围
+    spec = {
+        "data": [
+            {"type": "contour", "x": [0.0, 1.0, 2.0], "y": [-2.0, -1.0, 0.0], "z": [[1, 1, np.nan], [1, 1, 1], [1, 1, 1]]},
+            {"type": "scatter", "mode": "markers", "x": [0.5], "y": [-0.5], "marker": {"size": 10}},
+            {"type": "scatter", "mode": "lines", "x": [0.0, 500.0], "y": [100.0, 900.0], "xaxis": "x2", "yaxis": "y2"}
+        ],
+        "layout": {"xaxis2": {"anchor": "y2"}, "yaxis2": {"domain": [0.8, 1.0]}}
+    }
+    xs, ys, half_x, half_y, radius = _data_points(spec)
+    # 8个有限值网格和1个散点
+    assert len(xs) == 9 and xs.max() == 2.0 and ys.max() == 0.0
+    assert np.all(half_x[:8] == 0.5) and radius[-1] == 5
+
+    base = _tile_base(spec, 256)
+    assert "xaxis2" not in base["layout"] and base["data"][2]["visible"] is False
+    assert base["data"][0].get("visible", True) is not False
+
+
+def test_occupied_tiles():
+    scheme = TileScheme([0, 10], [0, 10], tile_size=256)
+    assert scheme.tile_count(0) == (1, 1) and scheme.tile_count(2) == (4, 4)
+    # 行号从图的上方开始
+    tiles = scheme.occupied(1, np.array([1.0]), np.array([9.0]))
+    assert tiles.tolist() == [[0, 0]]
+    # 跨越瓦片边界的网格单元占据相邻的瓦片
+    tiles = scheme.occupied(1, np.array([5.0]), np.array([5.0]), half_x=0.5, half_y=0.5)
+    assert sorted(map(tuple, tiles.tolist())) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    # 标记半径按级别的分辨率换算：第3级每像素约0.005，100像素的半径跨到相邻瓦片
+    assert len(scheme.occupied(3, np.array([1.0]), np.array([9.0]), radius=100)) > 1
+    assert len(scheme.occupied(3, np.array([0.6]), np.array([9.4]), radius=2)) == 1
+
+    reversed_scheme = TileScheme([0, 10], [0, 10], y_reversed=True)
+    assert reversed_scheme.occupied(1, np.array([1.0]), np.array([1.0])).tolist() == [[0, 0]]
@@ -0,0 +1,69 @@
+from unittest import mock
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+import plotlyFastFigure
+from plotlyFastFigure import FigureSpec, build_figure
+
+
+def _scatter(n=5, **marker):
+    return {
+        "type": "scatter",
+        "x": np.arange(n, dtype=float),
+        "y": np.arange(n, dtype=float),
+        "mode": "markers",
+        "marker": dict({"color": np.ones(n), "opacity": np.ones(n), "line": {"color": "white", "width": 1}}, **marker)
+    }
+
+
+def test_structure_validation():
+    assert plotlyFastFigure.structure_supported()
+    layout = {"xaxis2": {"range": [0, 1]}, "annotations": [{"text": "a", "x": 0, "y": 0}]}
+    spec = build_figure([_scatter()], layout)
+    assert isinstance(spec, FigureSpec) and spec.data[0]["x"] is not None
+    figure = spec.to_figure()
+    assert isinstance(figure, go.Figure) and figure.layout.xaxis2.range == (0, 1)
+
+    with pytest.raises(ValueError, match="markr"):
+        build_figure([dict(_scatter(), markr={})])
+    with pytest.raises(ValueError, match="colr"):
+        build_figure([_scatter(line={"colr": "red"})])
+    with pytest.raises(ValueError, match="xaxis2"):
+        build_figure([_scatter()], {"xaxis2": {"rnge": [0, 1]}})
+    with pytest.raises(ValueError, match="opacity"):
+        build_figure([_scatter(opacity=np.ones(4))])
+    with pytest.raises(ValueError, match="类型不存在"):
+        build_figure([dict(_scatter(), type="scater")])
+
+    # 网格轨迹检查x、y与z的形状
+    build_figure([{"type": "contour", "x": np.arange(3), "y": np.arange(2), "z": np.zeros((2, 3))}])
+    with pytest.raises(ValueError, match="形状"):
+        build_figure([{"type": "contour", "x": np.arange(2), "y": np.arange(2), "z": np.zeros((2, 3))}])
+
+
+def test_unsupported_plotly_falls_back_to_full_validation():
+    # 校验器查询与预期不一致（如plotly升级）时使用go.Figure完整校验，逐元素的错误也能发现
+    with mock.patch.object(plotlyFastFigure, "_STRUCTURE_SUPPORTED", False):
+        with pytest.raises(ValueError):
+            build_figure([_scatter(opacity=["x"] * 5)])
+    build_figure([_scatter(opacity=["x"] * 5)], validation="none")
+
+
+def test_fast_chart_methods_require_conversion(tmp_path):
+    from plotlyContour import PlotlyContourChart
+
+    chart = PlotlyContourChart()
+    chart.init({"data": {"x": np.arange(4.0), "y": np.arange(3.0), "z": np.ones((3, 4))}, "fast": True})
+    assert isinstance(chart.fig, FigureSpec)
+    # 显示和导出直接使用字典描述，需要go.Figure的方法抛出异常而不是静默返回
+    assert chart.save_as_html(str(tmp_path / "fast.html"))
+    with pytest.raises(TypeError, match="to_figure"):
+        chart.set_color_range([0, 1])
+    with pytest.raises(TypeError, match="to_figure"):
+        chart.save_as_html(str(tmp_path / "budget.html"), size_budget=100)
+
+    chart.fig = chart.fig.to_figure()
+    chart.set_color_range([0, 1])
+    assert chart.fig.data[0].zmax == 1
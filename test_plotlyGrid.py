@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from plotlyGrid import AxisIndex, GridPyramid, bilinear_sample, block_reduce, densify_polylines, nearest_sample
+
+
+def _bilinear(x, y):
+    """双线性插值对该函数是精确的"""
+    return 3 + 2 * x - y + 0.5 * x * y
+
+
+def test_bilinear_sample_is_exact():
+    rng = np.random.default_rng(2)
+    axes = [
+        (np.linspace(0, 10, 11), np.linspace(-5, 0, 6)),
+        (np.cumsum(rng.random(15) + 0.1), np.sort(rng.random(9)) * -4),
+        (np.linspace(10, 0, 21), np.linspace(0, -5, 11))
+    ]
+    for x, y in axes:
+        z = _bilinear(*np.meshgrid(x, y))
+        x_index, y_index = AxisIndex(x), AxisIndex(y)
+        assert x_index.uniform == (np.ptp(np.diff(x)) < 1e-9)
+        xs = rng.uniform(x.min(), x.max(), 500)
+        ys = rng.uniform(y.min(), y.max(), 500)
+        # 包括恰好落在网格节点和轴端点上的点
+        xs[:3] = [x[0], x[-1], x[len(x) // 2]]
+        ys[:3] = [y[0], y[-1], y[len(y) // 2]]
+        values, inside = bilinear_sample(z, x_index, y_index, xs, ys)
+        assert inside.all() and np.allclose(values, _bilinear(xs, ys))
+
+        values, inside = bilinear_sample(z, x_index, y_index, [x.max() + 1, x.min()], [y.min(), y.max() + 1])
+        assert not inside.any() and np.isnan(values).all()
+
+    # 四个角点中有NaN时结果为NaN
+    x = np.arange(4.0)
+    z = np.ones((4, 4))
+    z[1, 1] = np.nan
+    values, _ = bilinear_sample(z, AxisIndex(x), AxisIndex(x), [0.5, 2.5], [0.5, 2.5])
+    assert np.isnan(values[0]) and values[1] == 1
+
+
+def test_nearest_sample():
+    x = np.array([0.0, 1.0, 3.0, 7.0])
+    y = np.array([2.0, 1.0, 0.0])
+    z = np.arange(12.0).reshape(3, 4)
+    values, inside = nearest_sample(z, AxisIndex(x), AxisIndex(y), [0.4, 0.6, 2.1, 7.0, 8.0], [2.0, 1.6, 0.4, 0.0, 0.0])
+    assert inside.tolist() == [True] * 4 + [False]
+    assert np.array_equal(values, [0.0, 1.0, 10.0, 11.0, np.nan], equal_nan=True)
+
+
+def test_densify_polylines():
+    polylines = [([0, 3, 3], [0, 0, 4]), ([5], [5]), ([1, 1], [1, 1.25])]
+    x, y, distance, offsets = densify_polylines(polylines, 1.0)
+    assert offsets.tolist() == [0, 8, 9, 11]
+    first = slice(0, 8)
+    assert x[first].tolist() == [0, 1, 2, 3, 3, 3, 3, 3] and y[first].tolist() == [0, 0, 0, 0, 1, 2, 3, 4]
+    assert distance[first].tolist() == [0, 1, 2, 3, 4, 5, 6, 7]
+    # 单个顶点的折线只有一个点，短线段保留两个端点
+    assert (x[8], y[8], distance[8]) == (5, 5, 0)
+    assert distance[9:].tolist() == [0, 0.25]
+
+    # 间距不整除线段长度时不超过给定间距
+    x, y, distance, _ = densify_polylines([([0, 10], [0, 0])], 3.0)
+    assert len(x) == 5 and np.diff(distance).max() <= 3.0 and distance[-1] == 10
+    with pytest.raises(ValueError):
+        densify_polylines(polylines, 0)
+
+
+def test_block_reduce_and_pyramid():
+    z = np.arange(20.0).reshape(4, 5)
+    z[0, 0] = np.nan
+    # 不整除的边缘块只有部分网格，NaN不参与计算
+    assert np.array_equal(block_reduce(z, 2), [[(1 + 5 + 6) / 3, 5.0, 6.5], [13.0, 15.0, 16.5]])
+    assert np.array_equal(block_reduce(z, (4, 5), "max"), [[19.0]])
+    assert np.isnan(block_reduce(np.full((2, 2), np.nan), 2, "min")[0, 0])
+    with pytest.raises(ValueError):
+        block_reduce(z, 2, "median")
+
+    x = np.linspace(0, 99, 100)
+    y = np.linspace(-39, 0, 40)
+    z = np.add.outer(y, x)
+    pyramid = GridPyramid(x, y, z)
+    assert [level[2].shape for level in pyramid.levels] == [(40, 100), (20, 50), (10, 25), (5, 13), (3, 7)]
+    assert np.array_equal(pyramid.level(1)[0][:2], [0.5, 2.5]) and pyramid.level(99) is pyramid.levels[-1]
+    # 线性数据按块平均后仍是同样的线性关系
+    for level_x, level_y, level_z in pyramid.levels[:3]:
+        assert np.allclose(level_z, np.add.outer(level_y, level_x))
+
+    assert pyramid.level_for_cells(4000) == 0 and pyramid.level_for_cells(1000) == 1
+    assert pyramid.level_for_cells(1) == len(pyramid) - 1
+    # 放大到局部时可以使用更精细的层
+    assert pyramid.level_for_cells(1000, x_range=[0, 20]) == 0
+    wx, wy, wz = pyramid.window(1, x_range=[10, 20], y_range=[-5, 0])
+    assert wx[0] < 10 and wx[-1] > 20 and wz.shape == (len(wy), len(wx))
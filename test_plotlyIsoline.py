@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+
+from plotlyIsoline import contour_levels, extract_isolines, isoline_path, save_dxf, save_geojson
+
+
+def test_levels():
+    z = np.array([[0.3, 1.0], [2.0, np.nan]])
+    assert contour_levels(z, size=0.5).tolist() == [0.5, 1.0, 1.5, 2.0]
+    assert contour_levels(z, levels=[2, 1, 2]).tolist() == [1.0, 2.0]
+    assert len(contour_levels(z, count=4)) == 4
+    assert contour_levels(np.full((2, 2), np.nan)).size == 0
+
+
+def test_closed_and_open_lines():
+    x = np.linspace(-5, 5, 41)
+    y = np.linspace(-4, 4, 33)
+    cone = np.hypot(*np.meshgrid(x, y))
+    lines = extract_isolines(x, y, cone, levels=[3.0])[3.0]
+    # 一条闭合的圆，各点到圆心的距离接近半径
+    assert len(lines) == 1
+    xs, ys = map(np.asarray, lines[0])
+    assert xs[0] == xs[-1] and ys[0] == ys[-1]
+    assert np.allclose(np.hypot(xs, ys), 3.0, atol=0.02)
+
+    # 平面 z = x 的等值线是一条竖直的开放折线，从网格底边延伸到顶边
+    plane = np.broadcast_to(x, (len(y), len(x)))
+    lines = extract_isolines(x, y, plane, levels=[1.1])[1.1]
+    assert len(lines) == 1
+    xs, ys = map(np.asarray, lines[0])
+    assert np.allclose(xs, 1.1) and {ys.min(), ys.max()} == {-4.0, 4.0}
+
+    # NaN所在的单元不生成等值线，折线在NaN处断开
+    holed = plane.copy()
+    holed[16, :] = np.nan
+    lines = extract_isolines(x, y, holed, levels=[1.1])[1.1]
+    assert len(lines) == 2
+    assert all(np.all(np.abs(np.asarray(line_y)) >= 0.25 - 1e-12) for _, line_y in lines)
+
+    xs, ys = isoline_path(lines)
+    assert np.isnan(xs).sum() == 2 and len(xs) == sum(len(line_x) + 1 for line_x, _ in lines)
+
+
+def test_vector_export(tmp_path):
+    x = np.arange(5.0)
+    isolines = extract_isolines(x, x, np.add.outer(x, x), levels=[2.5, 4.5, 100.0])
+    assert isolines[100.0] == []
+
+    path = tmp_path / "isolines.geojson"
+    assert save_geojson(isolines, str(path), crs="EPSG:32650")
+    collection = json.loads(path.read_text(encoding="utf-8"))
+    assert [feature["properties"]["level"] for feature in collection["features"]] == [2.5, 4.5]
+    assert collection["crs"]["properties"]["name"] == "EPSG:32650"
+
+    path = tmp_path / "isolines.dxf"
+    assert save_dxf(isolines, str(path))
+    text = path.read_text(encoding="ascii")
+    assert text.count("POLYLINE") == 2 and text.endswith("EOF\n")
+    assert text.count("VERTEX") == sum(len(line_x) for lines in isolines.values() for line_x, _ in lines)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from plotlyLabelLayout import LABEL_POSITIONS, LabelPlacer, default_label_priority, place_labels
+
+
+def _boxes(placer, xs, ys, texts, positions):
+    """按LabelPlacer的规则重新计算已显示标签的像素包围盒"""
+    px, py = placer._to_pixels(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+    half_h = placer.font_size * placer.line_height / 2 + placer.padding
+    boxes = []
+    for i, (text, position) in enumerate(zip(texts, positions)):
+        if not text:
+            continue
+        half_w = len(text) * placer.font_size * placer.char_width / 2 + placer.padding
+        dx, dy = LABEL_POSITIONS[position]
+        cx = px[i] + dx * (half_w + placer.marker_size / 2)
+        cy = py[i] + dy * (half_h + placer.marker_size / 2)
+        boxes.append((cx - half_w, cy - half_h, cx + half_w, cy + half_h))
+    return boxes
+
+
+def test_default_priority():
+    priority = default_label_priority([1, 2, 5, 10, 7, "A", 9])
+    assert priority.tolist() == [4, 1, 2, 3, 0, 0, 4]
+    assert len(default_label_priority([])) == 0
+
+
+def test_dense_labels_do_not_overlap():
+    xs = np.arange(200.0)
+    ys = np.zeros(200)
+    texts = [str(i + 1) for i in range(200)]
+    placer = LabelPlacer(width=800, height=400, marker_size=6)
+    shown, positions = placer.place(xs, ys, texts)
+    # 首尾标签总是显示，密集时只显示一部分
+    assert shown[0] == "1" and shown[-1] == "200"
+    assert 2 < sum(bool(t) for t in shown) < 200
+    boxes = _boxes(placer, xs, ys, shown, positions)
+    for i, a in enumerate(boxes):
+        for b in boxes[i + 1:]:
+            assert not (a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3])
+
+    # 稀疏时全部显示在第一个候选位置
+    shown, positions = place_labels([0, 50, 100], [0, 0, 0], ["a", "b", "c"], width=800, height=400)
+    assert shown == ["a", "b", "c"] and set(positions) == {"top center"}
+
+    shown, _ = place_labels(xs, ys, texts, max_labels=3, width=800, height=400)
+    assert sum(bool(t) for t in shown) == 3
@@ -0,0 +1,87 @@
+from fractions import Fraction
+
+import numpy as np
+
+from plotlyMesh import _bowyer_watson, delaunay
+
+
+def _pseudosection(levels=24, electrodes=60, spacing=0.5, depth=0.519):
+    """梯形的拟断面点：每层点数递减，斜边上的点在浮点下只是近似共线"""
+    xs, ys = [], []
+    for level in range(1, levels + 1):
+        for i in range(electrodes - 2 * level):
+            xs.append((i + level) * spacing + 0.25 * level)
+            ys.append(-level * depth)
+    return np.array(xs), np.array(ys)
+
+
+def _hull_area(xs, ys):
+    """单调链凸包的面积"""
+    points = sorted(set(zip(xs.tolist(), ys.tolist())))
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    chains = []
+    for sequence in (points, points[::-1]):
+        chain = []
+        for p in sequence:
+            while len(chain) >= 2 and cross(chain[-2], chain[-1], p) <= 0:
+                chain.pop()
+            chain.append(p)
+        chains.extend(chain[:-1])
+    hull = np.array(chains)
+    return 0.5 * abs(np.dot(hull[:, 0], np.roll(hull[:, 1], -1)) - np.dot(hull[:, 1], np.roll(hull[:, 0], -1)))
+
+
+def _check_triangulation(xs, ys, triangles):
+    # 用精确的有理数判断方向，接近共线的细长三角形在浮点下面积可能为0
+    X = [Fraction(value) for value in xs.tolist()]
+    Y = [Fraction(value) for value in ys.tolist()]
+    for a, b, c in triangles.tolist():
+        assert (X[b] - X[a]) * (Y[c] - Y[a]) - (Y[b] - Y[a]) * (X[c] - X[a]) > 0
+    a, b, c = triangles.T
+    area = 0.5 * ((xs[b] - xs[a]) * (ys[c] - ys[a]) - (ys[b] - ys[a]) * (xs[c] - xs[a]))
+    assert np.isclose(area.sum(), _hull_area(xs, ys), rtol=1e-12)
+    # 每个点都是某个三角形的顶点
+    assert np.array_equal(np.unique(triangles), np.arange(len(xs)))
+
+
+def test_regular_grids():
+    # 规则网格上每个网格的四个点共圆，行列上的点共线
+    for step_x, step_y in ((1.0, 1.0), (0.1, 0.3)):
+        gx, gy = np.meshgrid(np.arange(30) * step_x, np.arange(20) * step_y)
+        xs, ys = gx.ravel(), gy.ravel()
+        triangles = _bowyer_watson(xs, ys)
+        assert len(triangles) == 2 * 29 * 19
+        _check_triangulation(xs, ys, triangles)
+
+
+def test_pseudosection_and_random_points():
+    xs, ys = _pseudosection()
+    _check_triangulation(xs, ys, _bowyer_watson(xs, ys))
+
+    rng = np.random.default_rng(1)
+    points = np.unique(np.round(rng.random((2000, 2)) * 20) / 4, axis=0)
+    _check_triangulation(points[:, 0], points[:, 1], _bowyer_watson(points[:, 0], points[:, 1]))
+
+    xs, ys = rng.random(500), rng.random(500)
+    triangles = _bowyer_watson(xs, ys)
+    _check_triangulation(xs, ys, triangles)
+    # Delaunay：每个三角形的外接圆内没有其他点
+    for a, b, c in triangles.tolist():
+        adx, ady = xs[a] - xs, ys[a] - ys
+        bdx, bdy = xs[b] - xs, ys[b] - ys
+        cdx, cdy = xs[c] - xs, ys[c] - ys
+        det = ((adx ** 2 + ady ** 2) * (bdx * cdy - cdx * bdy)
+               - (bdx ** 2 + bdy ** 2) * (adx * cdy - cdx * ady)
+               + (cdx ** 2 + cdy ** 2) * (adx * bdy - bdx * ady))
+        assert det.max() < 1e-12
+
+
+def test_degenerate_input():
+    xs = np.arange(10.0)
+    assert len(_bowyer_watson(xs, 2 * xs)) == 0
+    # 重复的点只保留一个
+    triangles = delaunay([0, 1, 0, 1, 0], [0, 0, 1, 1, 0])
+    assert len(triangles) == 2 and triangles.max() < 4
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plotlyReader import as_contour_data, as_scatter_data, detect_grid, read_columns, read_instrument, read_model_dat
+
+
+def _write_blocks(path, blocks, header=b"X Z Resistivity\n"):
+    """写入带块标题和块内行列数说明（如 "2 2"）的模型文件"""
+    with open(path, "wb") as f:
+        f.write(header)
+        for index, rows in enumerate(blocks):
+            f.write(b"Block %d\n" % index)
+            f.write(b"%d %d\n" % (len(rows), 2))
+            for row in rows:
+                f.write((" ".join(str(value) for value in row) + "\n").encode())
+
+
+def test_block_size_lines_are_skipped(tmp_path):
+    # 三个块的 "2 2" 共6个数值，是3列的倍数，不能被当作数据
+    path = tmp_path / "model.dat"
+    blocks = [[(0, 1, 10), (1, 1, 11)], [(0, 2, 20), (1, 2, 21)], [(0, 3, 30), (1, 3, 31)]]
+    _write_blocks(path, blocks)
+    expected = np.array([row for rows in blocks for row in rows], dtype=float).T
+    for chunk_size in (16, 64, 1 << 20):
+        assert np.array_equal(read_columns(str(path), chunk_size=chunk_size), expected)
+
+
+def test_nan_marks_no_data(tmp_path):
+    path = tmp_path / "model.dat"
+    _write_blocks(path, [[(0, 1, 10), (1, 1, "nan")], [(0, 2, "NaN"), (1, 2, 21)]])
+    result = read_columns(str(path))
+    assert result.shape == (3, 4)
+    assert np.array_equal(np.isnan(result[2]), [False, True, True, False])
+
+    grid = read_model_dat(str(path))
+    assert grid["z"].shape == (2, 2)
+    assert np.isnan(grid["z"]).sum() == 2
+    assert grid["zmin"] == 10 and grid["zmax"] == 21
+
+
+def _wenner_rows(count):
+    """温纳装置 (a, b, m, n) = (i, i+3, i+1, i+2)，电流100 mA，电压按行变化"""
+    return [(k + 1, k + 1, k + 4, k + 2, k + 3, 100.0, 10.0 + k) for k in range(count)]
+
+
+def test_instrument_csv_in_chunks(tmp_path):
+    path = tmp_path / "survey.csv"
+    lines = ["# exported by instrument", "No,C1,C2,P1,P2,I(mA),V(mV)"]
+    rows = _wenner_rows(60)
+    for k, row in enumerate(rows):
+        lines.append(",".join(str(value) for value in row))
+        if k == 30:
+            # 块中间重复的列名行和空行被跳过
+            lines.extend(["No,C1,C2,P1,P2,I(mA),V(mV)", ""])
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    expected_v = 2 * np.pi * 2.0 * np.array([row[6] for row in rows]) / 100.0
+    for chunk_size, processes in ((1 << 20, 1), (200, 1), (200, 2)):
+        data = read_instrument(str(path), spacing=2.0, chunk_size=chunk_size, processes=processes)
+        assert data["a"].dtype == np.int64 and data["a"].tolist() == [row[1] for row in rows]
+        assert data["id"].tolist() == [str(row[0]) for row in rows]
+        assert np.allclose(data["v"], expected_v) and np.allclose(data["k"], 4 * np.pi)
+        assert np.allclose(data["x"], (np.arange(60) + 1.5) * 2.0) and np.allclose(data["y"], 0.519 * 2, atol=2e-3)
+        assert data["zmin"] == expected_v.min() and data["row"].tolist() == list(range(1, 61))
+
+
+def test_instrument_columns(tmp_path):
+    # 空白分隔的二极装置数据，只有视电阻率列，列名通过columns指定
+    path = tmp_path / "pole.txt"
+    path.write_text("A   M   Res\n1 2 100.5\n1 3 98.0\n", encoding="utf-8")
+    assert read_instrument(str(path)) is None
+    data = read_instrument(str(path), columns={"rho": "Res"})
+    assert data["v"].tolist() == [100.5, 98.0] and data["x"].tolist() == [0.5, 1.0]
+    assert read_instrument(str(tmp_path / "missing.txt")) is None
+
+
+def test_dataframe_input():
+    frame = pd.DataFrame({"x": np.arange(5.0), "y": np.ones(5), "v": np.arange(5.0) * 10, "note": list("abcde")})
+    data = as_scatter_data(frame)
+    # 只保留散点图使用的列，数值列不复制
+    assert set(data) == {"x", "y", "v"} and np.shares_memory(data["v"], frame["v"].to_numpy())
+    assert as_scatter_data({"x": [1]}) == {"x": [1]}
+
+    # 长格式的网格，x变化最快、y变化最快和打乱顺序的行得到同一个网格
+    x, y = np.meshgrid(np.arange(4.0), np.arange(3.0) * -2)
+    z = x * 10 - y
+    expected = {"x": np.arange(4.0), "y": np.array([-4.0, -2.0, 0.0])}
+    order = np.random.default_rng(0).permutation(12)
+    for xs, ys, zs in ((x.ravel(), y.ravel(), z.ravel()), (x.T.ravel(), y.T.ravel(), z.T.ravel()),
+                       (x.ravel()[order], y.ravel()[order], z.ravel()[order])):
+        grid = as_contour_data(pd.DataFrame({"X": xs, "Z": ys, "rho": zs}), x="X", y="Z", z="rho")
+        assert np.array_equal(np.sort(grid["x"]), expected["x"]) and np.array_equal(np.sort(grid["y"]), expected["y"])
+        gx, gy = np.meshgrid(grid["x"], grid["y"])
+        assert np.array_equal(grid["z"], gx * 10 - gy) and (grid["zmin"], grid["zmax"]) == (0.0, 34.0)
+    assert as_contour_data(pd.DataFrame({"x": [0.0]})) is None
+
+    # 缺失的网格点为NaN
+    grid = detect_grid([0, 1, 0], [0, 0, 1], [1, 2, -999], nodata=-999)
+    assert np.array_equal(grid["z"], [[1, 2], [np.nan, np.nan]], equal_nan=True)
+
+
+def test_parquet_input(tmp_path):
+    assert as_scatter_data(str(tmp_path / "missing.parquet")) is None
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "data.parquet"
+    pd.DataFrame({"x": [0.0, 1.0], "y": [1.0, 1.0], "v": [5.0, 6.0], "extra": [1, 2]}).to_parquet(path)
+    assert set(as_scatter_data(str(path))) == {"x", "y", "v"}
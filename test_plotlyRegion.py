@@ -0,0 +1,131 @@
+from collections import deque
+
+import numpy as np
+
+from plotlyRegion import ZonalStatistics, label_regions, polygon_mask, rasterize_polygon, threshold_regions
+
+
+def _flood_fill(mask, connectivity):
+    """逐像素广度优先搜索的连通区域标记"""
+    ny, nx = mask.shape
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if connectivity == 8:
+        steps += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    labels = np.zeros(mask.shape, dtype=int)
+    count = 0
+    for start in zip(*np.nonzero(mask)):
+        if labels[start]:
+            continue
+        count += 1
+        labels[start] = count
+        queue = deque([start])
+        while queue:
+            j, i = queue.popleft()
+            for dj, di in steps:
+                q = (j + dj, i + di)
+                if 0 <= q[0] < ny and 0 <= q[1] < nx and mask[q] and not labels[q]:
+                    labels[q] = count
+                    queue.append(q)
+    return labels, count
+
+
+def test_label_regions_matches_flood_fill():
+    rng = np.random.default_rng(11)
+    for density in (0.3, 0.5, 0.7):
+        mask = rng.random((40, 60)) < density
+        for connectivity in (4, 8):
+            labels, count, _ = label_regions(mask, connectivity)
+            expected, expected_count = _flood_fill(mask, connectivity)
+            assert count == expected_count
+            # 两种标记是同一个划分：标记对一一对应
+            pairs = set(zip(labels[mask].tolist(), expected[mask].tolist()))
+            assert len(pairs) == count and not labels[~mask].any()
+    assert label_regions(np.zeros((3, 3), dtype=bool))[1] == 0
+
+
+def test_threshold_regions():
+    x = np.linspace(0, 100, 101)
+    y = np.linspace(-40, 0, 41)
+    gx, gy = np.meshgrid(x, y)
+    z = 10 + 100 * np.exp(-((gx - 25) ** 2 + (gy + 20) ** 2) / 50) + 80 * np.exp(-((gx - 75) ** 2 + (gy + 15) ** 2) / 30)
+    # 一个孤立的高值网格，少于min_cells被忽略
+    z[2, 50] = 500
+    shapes, labels = threshold_regions(x, y, z, threshold=50, min_cells=5)
+    assert len(shapes) == 2 and labels.max() == 3
+    for shape in shapes:
+        region = labels == shape["label"]
+        assert shape["cells"] == region.sum() and shape["max"] == z[region].max()
+        assert np.isclose(shape["mean"], z[region].mean())
+        # 边界多边形包含区域的所有网格，不包含其他网格
+        inside = polygon_mask(x, y, shape["points"])
+        assert np.array_equal(inside, region)
+        assert shape["type"] == "polygon" and shape["points"][0] == shape["points"][-1]
+
+    shapes, _ = threshold_regions(x, y, z, threshold=20, below=True, min_cells=1)
+    assert len(shapes) == 1 and shapes[0]["max"] <= 20
+    shapes, _ = threshold_regions(x, y, z, level_range=[60, 70], min_cells=1)
+    assert all(60 <= shape["mean"] <= 70 for shape in shapes)
+
+
+def _inside(px, py, xs, ys):
+    """逐点的奇偶规则判断"""
+    inside = np.zeros(np.shape(px), dtype=bool)
+    for k in range(len(xs)):
+        x0, y0, x1, y1 = xs[k - 1], ys[k - 1], xs[k], ys[k]
+        crosses = (y0 <= py) != (y1 <= py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inside ^= crosses & (px < x0 + (py - y0) * (x1 - x0) / (y1 - y0))
+    return inside
+
+
+def _star(cx, cy, radius, count=7):
+    """星形的凹多边形，顶点不落在网格上"""
+    angles = np.linspace(0, 2 * np.pi, 2 * count, endpoint=False) + 0.1
+    r = np.where(np.arange(2 * count) % 2, radius * 0.45, radius)
+    return [{"x": cx + a, "y": cy + b} for a, b in zip(r * np.cos(angles), r * np.sin(angles))]
+
+
+def test_rasterize_matches_point_in_polygon():
+    x = np.linspace(0, 50, 51)
+    y = np.linspace(-20, 0, 41)
+    gx, gy = np.meshgrid(x, y)
+    for points in (_star(20.3, -9.7, 9.1), _star(0.2, 0.3, 14.7, count=4)):
+        xs = np.array([p["x"] for p in points])
+        ys = np.array([p["y"] for p in points])
+        expected = _inside(gx, gy, xs, ys)
+        cells = rasterize_polygon(x, y, points)
+        assert np.array_equal(np.sort(cells), np.flatnonzero(expected))
+        # 降序的x轴和 (xs, ys) 形式的顶点
+        assert np.array_equal(polygon_mask(x[::-1], y, (xs, ys)), expected[:, ::-1])
+
+
+def test_zonal_statistics():
+    x = np.linspace(10, 0, 21)
+    y = np.linspace(0, 5, 11)
+    z = np.add.outer(y, x)
+    z[4, 3:6] = np.nan
+    star = _star(5.1, 2.4, 2.3)
+    square = [{"x": 3.9, "y": 0.9}, {"x": 8.1, "y": 0.9}, {"x": 8.1, "y": 4.1}, {"x": 3.9, "y": 4.1}]
+    engine = ZonalStatistics(x, y)
+    assert engine.set_shape("star", star) and engine.set_shape("square", square)
+    # 顶点未改变时不重新栅格化
+    assert not engine.set_shape("star", list(star))
+
+    stats = engine.compute(z, threshold=8.0)
+    gx, gy = np.meshgrid(x, y)
+    for shape_id, points in (("star", star), ("square", square)):
+        xs = np.array([p["x"] for p in points])
+        ys = np.array([p["y"] for p in points])
+        values = z[_inside(gx, gy, xs, ys) & np.isfinite(z)]
+        item = stats[shape_id]
+        assert item["cells"] == values.size
+        assert (item["min"], item["max"]) == (values.min(), values.max())
+        assert np.isclose(item["mean"], values.mean())
+        # 网格间距为0.5，每个网格的面积为0.25
+        assert np.isclose(item["area"], values.size * 0.25)
+        assert np.isclose(item["volume"], np.maximum(values - 8.0, 0).sum() * 0.25)
+
+    engine.remove_shape("star")
+    assert list(engine.compute(z)) == ["square"]
+    engine.set_shape("outside", [{"x": 20, "y": 20}, {"x": 21, "y": 20}, {"x": 21, "y": 21}])
+    assert engine.compute(z, shape_ids=["outside"])["outside"]["mean"] is None
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from plotlyScatter import PlotlyScatterChart
+
+
+def _chart(n=20):
+    chart = PlotlyScatterChart()
+    chart.init({"data": {
+        "x": np.arange(n, dtype=float),
+        "y": np.ones(n),
+        "v": np.linspace(10, 100, n),
+        "visible": np.zeros(n, dtype=int),
+        "id": list(range(n))
+    }})
+    return chart
+
+
+def _header(nums, **head_option):
+    return {
+        "headOption": head_option,
+        "headerData": [{"x": float(num), "y": 0.0, "num": num} for num in nums]
+    }
+
+
+def test_auto_hide_outliers():
+    # 3层拟断面，第2层有一个尖峰，另有一个初始就隐藏的尖峰
+    rows = np.repeat([1, 2, 3], 20)
+    x = np.tile(np.arange(20.0), 3)
+    v = 100 * (1 + 0.02 * np.sin(x)) * np.repeat([1.0, 1.2, 1.5], 20)
+    v[25] = 5000.0
+    v[45] = 5000.0
+    visible = np.zeros(60, dtype=int)
+    visible[45] = 1
+    chart = PlotlyScatterChart()
+    chart.init({"data": {"x": x, "y": rows * -1.0, "v": v, "visible": visible, "row": rows,
+                         "a": np.arange(60), "b": np.arange(60) + 3, "m": np.arange(60) + 1, "n": np.arange(60) + 2}})
+    chart.hide_points([3])
+
+    outliers = chart.auto_hide_outliers(threshold=5)
+    assert outliers.tolist() == [25, 45]
+    assert chart.auto_hidden_points == {25} and chart.hidden_points == {3, 25, 45}
+    assert chart.fig.data[0].marker.opacity[25] == 0
+    # 提高阈值后自动隐藏的点重新显示，其他方式隐藏的点不变
+    neighbors = chart._outlier_cache["neighbors"]
+    assert len(chart.auto_hide_outliers(threshold=1e6)) == 0
+    assert chart._outlier_cache["neighbors"] is neighbors
+    assert chart.auto_hidden_points == set() and chart.hidden_points == {3, 45}
+
+
+def test_header_layers():
+    chart = _chart()
+    index = chart.addHeaderPoints(_header(range(1, 11), markerColor="blue", markerSize=16))
+    assert index == 1 and chart.fig.data[1].x == tuple(float(num) for num in range(1, 11))
+
+    # 高亮只写入覆盖图层，头节点图层保持原始样式
+    chart.highlightHeaderPoints([2, 5, 99], colors=["red", "green"], size=20)
+    layer = chart.getHeaderLayer()
+    overlay = chart.fig.data[layer.overlay_index]
+    assert overlay.x == (2.0, 5.0) and overlay.marker.color == ("red", "green") and overlay.marker.size == (20, 20)
+    assert chart.fig.data[1].marker.color == "blue"
+    # 再次高亮时之前的高亮被重置
+    chart.highlightHeaderPoints([3])
+    assert chart.fig.data[layer.overlay_index].x == (3.0,)
+    chart.resetHeaderPointsColor()
+    assert len(chart.fig.data[layer.overlay_index].x) == 0
+
+    # 同名图层原地更新，不新增图层
+    traces = len(chart.fig.data)
+    assert chart.addHeaderPoints(_header(range(1, 6), markerColor="black")) == 1
+    assert len(chart.fig.data) == traces and len(chart.fig.data[1].x) == 5
+    assert chart.fig.data[1].marker.color == ("black",) * 5
+    chart.updateHeaderPoints({"headOption": {"markerSize": 8}})
+    assert chart.fig.data[1].marker.size == (8,) * 5
+
+    # 移除第一个图层后，其他图层的索引前移
+    second = chart.addHeaderPoints(_header([1, 2], name="other"))
+    assert second == traces
+    chart.removeHeaderPoints(name="Header Points")
+    other = chart.getHeaderLayer("other")
+    assert other.trace_index == 1 and chart.fig.data[1].name == "other"
+    assert chart.header_trace_index == 1 and len(chart.fig.data) == 2
+
+
+def test_survey_header_points():
+    chart = PlotlyScatterChart()
+    chart.init({"data": {
+        "x": [1.5, 2.5], "y": [1.0, 1.0], "v": [10.0, 20.0], "visible": [0, 0],
+        "a": [1, 2], "b": [4, 5], "m": [2, 3], "n": [3, 4]
+    }})
+    index = chart.addSurveyHeaderPoints(spacing=0.5, head_option={"showLabels": False})
+    trace = chart.fig.data[index]
+    assert trace.customdata == (1, 2, 3, 4, 5) and trace.x == (0.0, 0.5, 1.0, 1.5, 2.0)
+    assert trace.mode == "markers"
+
+
+def test_dataframe_init():
+    frame = pd.DataFrame({"x": [0.0, 1.0, 2.0], "y": [1.0, 1.0, 2.0], "v": [5.0, 6.0, 7.0], "visible": [0, 1, 0],
+                          "a": [1, 2, 3], "b": [4, 5, 6], "m": [2, 3, 4], "n": [3, 4, 5]})
+    chart = PlotlyScatterChart()
+    chart.init({"data": frame})
+    assert chart.hidden_points == {1} and chart.extended_data["a"].tolist() == [1, 2, 3]
+    assert np.array_equal(chart.fig.data[0].marker.color, [5.0, 6.0, 7.0])
+
+
+def test_log_scale_round_trip():
+    chart = PlotlyScatterChart()
+    values = np.array([1.0, 10.0, 100.0, 0.0])
+    chart.init({"data": {"x": np.arange(4.0), "y": np.ones(4), "v": values, "visible": np.zeros(4)},
+                "style": {"logScale": True, "cmin": 1, "cmax": 100}})
+    marker = chart.fig.data[0].marker
+    assert chart.log_scale and np.array_equal(marker.color, [0.0, 1.0, 2.0, np.nan], equal_nan=True)
+    assert (marker.cmin, marker.cmax) == (0.0, 2.0) and list(marker.colorbar.ticktext) == ["1", "2", "5", "10", "20", "50", "100"]
+    # 悬停显示原始值
+    assert chart.fig.data[0].customdata[2][2] == 100.0
+
+    chart.set_log_scale(False)
+    marker = chart.fig.data[0].marker
+    assert np.array_equal(marker.color, values) and (marker.cmin, marker.cmax) == (1, 100)
+    assert marker.colorbar.tickvals is None
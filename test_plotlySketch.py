@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from plotlyColorMap import ColorMap
+from plotlySketch import QuantileSketch, robust_range, sketch_values
+
+
+def test_quantiles_within_relative_error():
+    rng = np.random.default_rng(8)
+    values = np.concatenate([rng.lognormal(3, 2, 20000), -rng.lognormal(0, 1, 3000), np.zeros(500)])
+    q = np.linspace(0, 1, 41)
+    sketch = sketch_values(np.concatenate([values, [np.nan, np.inf, -np.inf]]), chunk_size=4096)
+    assert sketch.count == values.size
+    exact = np.sort(values)[np.round(q * (values.size - 1)).astype(int)]
+    result = sketch.quantiles(q)
+    assert np.all(np.abs(result - exact) <= np.abs(exact) * 2.0 ** -8)
+    assert isinstance(sketch.quantiles(0.5), float)
+
+    # 分块统计后合并与一次统计相同
+    merged = QuantileSketch().update(values[:7000]).merge(QuantileSketch().update(values[7000:]))
+    assert np.array_equal(merged.counts, sketch_values(values).counts)
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(precision=5))
+
+    assert np.isnan(QuantileSketch().quantiles(0.5)) and robust_range(QuantileSketch()) is None
+    low, high = robust_range(sketch, 5, 95)
+    assert np.isclose(low, np.quantile(values, 0.05), rtol=1e-2) and np.isclose(high, np.quantile(values, 0.95), rtol=1e-2)
+
+
+def test_equalized_stops():
+    values = np.random.default_rng(9).lognormal(2, 1, 10000)
+    colormap = ColorMap.equalized(sketch_values(values), count=4, low=2, high=98)
+    # 停止点位于等间隔的分位数上，每段颜色覆盖相同数量的数据
+    assert len(colormap) == 5
+    assert np.allclose(colormap.values, np.quantile(values, [0.02, 0.26, 0.5, 0.74, 0.98]), rtol=1e-2)
+    assert ColorMap.equalized(sketch_values(np.ones(10))) is None
+
+
+def test_chart_auto_color_range():
+    from plotlyContour import PlotlyContourChart
+
+    z = np.arange(10000.0).reshape(100, 100)
+    z[0, 0] = 1e9
+    chart = PlotlyContourChart()
+    chart.init({"data": {"x": np.arange(100.0), "y": np.arange(100.0), "z": z}})
+    low, high = chart.auto_color_range(1, 99)
+    exact = np.sort(z.ravel())[[100, 9899]]
+    assert np.allclose([low, high], exact, rtol=2.0 ** -8)
+    assert (chart.fig.data[0].zmin, chart.fig.data[0].zmax) == (low, high)
+    assert chart.equalize_colors(count=8, colorbar=False) is not None
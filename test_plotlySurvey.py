@@ -0,0 +1,225 @@
+import numpy as np
+import pytest
+
+from plotlySurvey import (
+    apparent_resistivity, electrode_coordinates, electrode_table, geometric_factor, header_data_from_survey,
+    median_depth, neighborhood_index, pack_quadrupoles, pseudosection, reciprocal_error, reciprocal_index,
+    robust_residuals, TimeLapse
+)
+
+
+def _naive_neighbors(rows, x, half_window, across_rows, cross_window):
+    """逐点的邻域：同一行按 (x, 原始索引) 排序后取前后的点，相邻行取x最近的点及其两侧的点"""
+    rows = np.asarray(rows, dtype=float)
+    x = np.asarray(x, dtype=float)
+    levels = sorted(set(rows[np.isfinite(rows)].tolist()))
+    rank = [levels.index(row) if np.isfinite(row) else len(levels) for row in rows.tolist()]
+    finite = np.isfinite(x)
+    x_min = x[finite].min() if finite.any() else 0.0
+    x_span = (x[finite].max() - x_min) if finite.any() else 1.0
+    x_norm = np.where(finite, (x - x_min) / (x_span or 1.0) * 0.5, 0.0)
+    # 与实现相同的键，使最近点的距离比较在同一浮点域中进行
+    key = [r + v for r, v in zip(rank, x_norm.tolist())]
+    row_count = max(rank) + 1
+    members = [sorted((i for i in range(len(x)) if rank[i] == r), key=lambda i: (key[i], i)) for r in range(row_count)]
+
+    result = []
+    for i in range(len(x)):
+        own = members[rank[i]]
+        p = own.index(i)
+        item = [i]
+        for offset in range(1, half_window + 1):
+            item.append(own[p - offset] if p - offset >= 0 else -1)
+            item.append(own[p + offset] if p + offset < len(own) else -1)
+        if across_rows and row_count > 1:
+            for direction in (-1, 1):
+                target = rank[i] + direction
+                if not 0 <= target < row_count:
+                    item.extend([-1] * (2 * cross_window + 1))
+                    continue
+                other = members[target]
+                query = target + x_norm[i]
+                # 插入位置两侧的点中距离较近的一个，距离相同时取左侧
+                insert = sum(key[j] < query for j in other)
+                candidates = [q for q in (insert - 1, insert) if 0 <= q < len(other)]
+                nearest = min(candidates, key=lambda q: abs(key[other[q]] - query))
+                for offset in range(-cross_window, cross_window + 1):
+                    q = nearest + offset
+                    item.append(other[q] if 0 <= q < len(other) else -1)
+        result.append(item)
+    return np.array(result)
+
+
+def _naive_residuals(values, neighbors, log=True, exclude=None, min_scale=1.0):
+    """逐点取有效邻居（点自身始终参与）的中位数和MAD"""
+    values = np.asarray(values, dtype=float)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0, np.log10(values), np.nan)
+    # 实现以float32统计
+    rounded = values.astype(np.float32).astype(float)
+    excluded = np.zeros(len(values), dtype=bool) if exclude is None else np.asarray(exclude, dtype=bool)
+    median = np.full(len(values), np.nan)
+    mad = np.full(len(values), np.nan)
+    for i, item in enumerate(neighbors.tolist()):
+        window = [rounded[i]] + [rounded[j] for j in item[1:] if j >= 0 and not excluded[j]]
+        window = np.array([v for v in window if np.isfinite(v)])
+        if window.size:
+            median[i] = np.median(window)
+            mad[i] = np.median(np.abs(window - median[i]))
+    scale = 1.4826 * mad
+    positive = scale[scale > 0]
+    typical = np.median(positive) if positive.size else 1.0
+    scale = np.maximum(np.nan_to_num(scale, nan=typical), min_scale * typical)
+    return (values - median) / scale
+
+
+def _survey(rng, rows=6):
+    """拟断面形状的测点：每行点数递减，最后几行很短"""
+    levels, xs = [], []
+    for level in range(rows):
+        count = max(12 - 3 * level, 1)
+        levels.extend([level + 1] * count)
+        xs.extend((np.arange(count) + 0.5 * level).tolist())
+    return np.array(levels, dtype=float), np.array(xs)
+
+
+def test_neighborhood_index_matches_naive():
+    rng = np.random.default_rng(3)
+    rows, x = _survey(rng)
+    cases = [(rows, x)]
+    # 打乱顺序
+    order = rng.permutation(len(x))
+    cases.append((rows[order], x[order]))
+    # x相同的点（同一位置的重复测量）、NaN的x和NaN的行
+    tied_x = np.round(x / 2) * 2
+    tied_x[[3, 17]] = np.nan
+    tied_rows = rows.copy()
+    tied_rows[[5, 20]] = np.nan
+    cases.append((tied_rows[order], tied_x[order]))
+    # 只有一行、每行只有一个点
+    cases.append((np.ones(7), rng.random(7)))
+    cases.append((np.arange(5.0)[::-1], np.zeros(5)))
+    # 随机的行和有大量重复的x
+    cases.append((rng.integers(0, 4, 60).astype(float), rng.integers(0, 10, 60).astype(float)))
+
+    for case_rows, case_x in cases:
+        for half_window, across_rows, cross_window in ((2, True, 1), (1, False, 1), (3, True, 2)):
+            got = neighborhood_index(case_rows, case_x, half_window, across_rows, cross_window)
+            expected = _naive_neighbors(case_rows, case_x, half_window, across_rows, cross_window)
+            assert np.array_equal(got, expected)
+
+
+def test_robust_residuals_matches_naive():
+    rng = np.random.default_rng(5)
+    rows, x = _survey(rng)
+    order = rng.permutation(len(x))
+    rows, x = rows[order], x[order]
+    # 取值有重复，含非正值、NaN和离群点
+    values = np.round(rng.lognormal(3, 0.4, len(x)), 0)
+    values[::7] = values[1]
+    values[[2, 9]] = [0.0, -5.0]
+    values[11] = np.nan
+    values[13] = 1e5
+    exclude = np.zeros(len(x), dtype=bool)
+    exclude[[4, 13]] = True
+
+    for half_window, cross_window in ((2, 1), (3, 2)):
+        neighbors = neighborhood_index(rows, x, half_window, True, cross_window)
+        for log in (True, False):
+            for mask in (None, exclude):
+                # 较小的分块检查块边界
+                got = robust_residuals(values, neighbors, log=log, exclude=mask, chunk_size=7)
+                expected = _naive_residuals(values, neighbors, log=log, exclude=mask)
+                np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_electrodes_from_columns():
+    # 二极装置的B、N为无穷远电极，在数据中为空值
+    data = {"a": [1, 2, 3], "b": [None, None, None], "m": [2, 3, 4], "n": [None, None, None]}
+    table = electrode_table(data, spacing=2.0, origin=10.0)
+    assert table["num"].tolist() == [1, 2, 3, 4] and table["count"].tolist() == [1, 2, 2, 1]
+    assert table["x"].tolist() == [10.0, 12.0, 14.0, 16.0] and not table["y"].any()
+
+    # 坐标表中缺少的电极不生成头节点
+    header = header_data_from_survey(data, coordinates={1: (0, -1), 2: (5, -2), 4: (9, 0)}, head_option={"name": "e"})
+    assert header["headOption"] == {"name": "e"}
+    assert header["headerData"] == [
+        {"x": 0.0, "y": -1.0, "v": 1, "num": 1},
+        {"x": 5.0, "y": -2.0, "v": 2, "num": 2},
+        {"x": 9.0, "y": 0.0, "v": 1, "num": 4}
+    ]
+
+    x, y = electrode_coordinates(data, coordinates=[{"num": 2, "x": 5, "y": -2}, {"num": 3, "x": 7}])
+    assert np.array_equal(x, [[np.nan, 5, 7], [np.nan] * 3, [5, 7, np.nan], [np.nan] * 3], equal_nan=True)
+    assert np.array_equal(y[0], [np.nan, -2, 0], equal_nan=True)
+
+
+def test_geometric_factor_and_median_depth():
+    # 列依次为温纳、偶极-偶极 (n=1)、二极装置，电极距为1
+    x = np.array([[0.0, 1.0, 0.0], [3.0, 0.0, np.nan], [1.0, 2.0, 1.0], [2.0, 3.0, np.nan]])
+    assert np.allclose(geometric_factor(x), [2 * np.pi, 6 * np.pi, 2 * np.pi])
+    # Edwards (1977) 的中值深度，二极装置的解析解为 √3/2
+    assert np.allclose(median_depth(x), [0.519, 0.416, np.sqrt(3) / 2], atol=1e-3)
+    # 电极重合时没有装置系数
+    assert np.isnan(geometric_factor(np.zeros((4, 1)))[0])
+    assert np.isnan(apparent_resistivity([1.0, 1.0], [2.0, 0.0], [4.0, 4.0])).tolist() == [False, True]
+
+
+def test_pseudosection_groups_match_direct_computation():
+    # 等间距测线按相对偏移分组计算，与按坐标表逐点计算的结果相同
+    rng = np.random.default_rng(7)
+    a = rng.integers(1, 30, 200)
+    data = {"a": a, "b": a + 3 * rng.integers(1, 4, 200), "m": a + rng.integers(1, 3, 200), "n": a + 10,
+            "u": rng.random(200), "i": np.full(200, 2.0)}
+    grouped = pseudosection(data, spacing=2.0, voltage_key="u", current_key="i")
+    nums = np.arange(1, 60)
+    direct = pseudosection(data, coordinates={"num": nums, "x": (nums - 1) * 2.0, "y": np.zeros(len(nums))})
+    for key in ("x", "y", "k"):
+        assert np.allclose(grouped[key], direct[key], equal_nan=True)
+    assert np.allclose(grouped["v"], grouped["k"] * data["u"] / 2.0)
+
+
+def test_reciprocal_pairs():
+    # 0与1互为 (m, n, a, b)，2与3互为 (n, m, b, a)，4为二极装置，5为重复的0，6的互易就是自身
+    data = {
+        "a": [1, 3, 1, 6, 1, 1, 1],
+        "b": [2, 4, 2, 5, None, 2, 2],
+        "m": [3, 1, 5, 2, 2, 3, 2],
+        "n": [4, 2, 6, 1, None, 4, 1],
+        "v": [100.0, 110.0, 50.0, 50.0, 10.0, 90.0, 7.0]
+    }
+    partner = reciprocal_index(data)
+    assert partner.tolist() == [1, 0, 3, 2, -1, 1, -1]
+    error, _ = reciprocal_error(data, partner=partner)
+    assert np.isclose(error[0], 10 / 105 * 100) and np.isclose(error[5], 20 / 100 * 100)
+    assert error[2] == 0 and np.isnan(error[[4, 6]]).all()
+
+    key = pack_quadrupoles([1], [np.nan], [2], [3])
+    assert int(key[0]) == 1 | (0xFFFF << 16) | (2 << 32) | (3 << 48)
+    with pytest.raises(ValueError):
+        pack_quadrupoles([70000], [1], [2], [3])
+
+
+def test_time_lapse():
+    baseline = {"id": [10, 11, 12], "a": [1, 2, 3], "b": [2, 3, 4], "m": [3, 4, 5], "n": [4, 5, 6],
+                "x": [0.0, 1.0, 0.0], "y": [0.0, 0.0, 1.0], "v": [100.0, 200.0, 50.0]}
+    # 该期测量顺序不同，且有一个基准期中没有的测量
+    epoch = {"id": [12, 10, 13], "a": [3, 1, 7], "b": [4, 2, 8], "m": [5, 3, 9], "n": [6, 4, 10],
+             "x": [0.0, 0.0, 1.0], "y": [1.0, 0.0, 1.0], "v": [60.0, 90.0, 1.0]}
+    for key in ("quadrupole", "id"):
+        lapse = TimeLapse(baseline, key=key)
+        assert lapse.align(epoch).tolist() == [2, 0, -1]
+        assert np.allclose(lapse.change(epoch), [20.0, -10.0, np.nan], equal_nan=True)
+        assert np.allclose(lapse.change(epoch, "ratio"), [1.2, 0.9, np.nan], equal_nan=True)
+        assert np.allclose(lapse.change(epoch, "difference"), [10.0, -10.0, np.nan], equal_nan=True)
+    with pytest.raises(ValueError):
+        lapse.change(epoch, "log")
+
+    # 以0为中心的颜色范围，没有对应测量的点被隐藏
+    options = lapse.scatter_options(epoch)
+    assert options["style"]["cmin"] == -20 and options["style"]["cmax"] == 20
+    assert options["data"]["visible"].tolist() == [0, 0, 1]
+    options = lapse.contour_options(epoch, mode="ratio", limit=0.5)
+    assert (options["data"]["zmin"], options["data"]["zmax"]) == (0.5, 1.5)
+    assert np.allclose(options["data"]["z"], [[0.9, np.nan], [1.2, np.nan]], equal_nan=True)